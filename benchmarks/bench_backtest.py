@@ -0,0 +1,43 @@
+"""Время симуляции запасов: запчасти × дни × политики
+
+Запуск: python benchmarks/bench_backtest.py --parts 10000 --days 1095 --policies 24
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.backtest import InventoryBacktester
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--policies', type=int, default=24)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    avg_demand = rng.uniform(5, 30, args.parts)
+    demand = rng.poisson(avg_demand, size=(args.days, args.parts))
+    lead_time = rng.integers(3, 15, args.parts)
+    # Сетка политик: страховой запас от 0 до 6 дней среднего спроса
+    safety_days = np.linspace(0, 6, args.policies)[:, None]
+    reorder_point = avg_demand * (lead_time + safety_days)
+    order_up_to = reorder_point + avg_demand * 7
+
+    started = time.perf_counter()
+    result = InventoryBacktester().simulate(demand, reorder_point, order_up_to, lead_time, order_up_to)
+    elapsed = time.perf_counter() - started
+
+    fill_rate = 1 - result['shortage_units'].sum(axis=1) / demand.sum()
+    print(f"{args.parts} запчастей × {args.days} дней × {args.policies} политик: {elapsed:.1f} с")
+    print(f"Fill rate по политикам: {fill_rate.min():.3f} … {fill_rate.max():.3f}")
+
+
+if __name__ == '__main__':
+    main()
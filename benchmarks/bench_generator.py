@@ -0,0 +1,44 @@
+"""Сравнение скорости построчной и векторной генерации данных
+
+Запуск: python benchmarks/bench_generator.py --parts 5 50 500 --start 2022-01-01 --end 2024-01-01
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.generator import DataGenerator
+
+
+def _rows_per_sec(func) -> tuple:
+    start = time.perf_counter()
+    df = func()
+    elapsed = time.perf_counter() - start
+    return len(df), len(df) / elapsed if elapsed > 0 else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--parts', type=int, nargs='+', default=[5, 50, 500])
+    parser.add_argument('--start', default='2022-01-01')
+    parser.add_argument('--end', default='2024-01-01')
+    parser.add_argument('--loop-max-rows', type=int, default=200_000,
+                        help='не запускать построчную генерацию на больших объемах')
+    args = parser.parse_args()
+
+    print(f"{'Запчастей':>10} {'Строк':>12} {'Цикл, стр/с':>14} {'Вектор, стр/с':>14} {'Ускорение':>10}")
+    for n_parts in args.parts:
+        generator = DataGenerator(n_parts=n_parts)
+        n_rows, vector_rate = _rows_per_sec(lambda: generator.generate_business_data(args.start, args.end))
+        if n_rows <= args.loop_max_rows:
+            _, loop_rate = _rows_per_sec(lambda: generator._generate_business_data_loop(args.start, args.end))
+            loop_str, speedup = f"{loop_rate:,.0f}", f"{vector_rate / loop_rate:.1f}x"
+        else:
+            loop_str, speedup = '-', '-'
+        print(f"{n_parts:>10} {n_rows:>12,} {loop_str:>14} {vector_rate:>14,.0f} {speedup:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Масштабирование BusinessAnalyzer.generate_recommendations по числу запчастей
+
+Запуск: python benchmarks/bench_recommendations.py --parts 5 100 1000 10000 100000 --days 30
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.business_analyzer import BusinessAnalyzer
+from src.data.generator import DataGenerator
+
+
+def legacy_recommendations(df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
+    """Исходная реализация: iterrows и фильтрация всей таблицы для каждой запчасти"""
+    rows = []
+    for _, part in revenue_df.iterrows():
+        part_data = df[df['part_name'] == part['part_name']]
+        avg_demand = part_data['demand'].mean()
+        current_stock = part_data['stock'].iloc[-1]
+        optimal_stock = avg_demand * 7 + avg_demand * 1.5
+        status = 'Оптимальный' if current_stock >= optimal_stock * 0.8 else 'Недостаточный'
+        rows.append({'Запчасть': part['part_name'], 'Рекомендуемый запас': int(optimal_stock), 'Статус': status})
+    return pd.DataFrame(rows)
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--parts', type=int, nargs='+', default=[5, 100, 1000, 10000, 100000])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--legacy-max-parts', type=int, default=2000)
+    args = parser.parse_args()
+
+    analyzer = BusinessAnalyzer()
+    end_date = pd.Timestamp('2022-01-01') + pd.Timedelta(days=args.days - 1)
+    print(f"{'Запчастей':>10} {'Строк':>12} {'iterrows, с':>12} {'Вектор, с':>10} {'Ускорение':>10}")
+    for n_parts in args.parts:
+        df = DataGenerator(n_parts=n_parts).generate_business_data('2022-01-01', end_date)
+        revenue_df = analyzer.analyze_business_metrics(df)['revenue_analysis']
+        vector_time = _timed(lambda: analyzer.generate_recommendations(df, revenue_df))
+        if n_parts <= args.legacy_max_parts:
+            legacy_time = _timed(lambda: legacy_recommendations(df, revenue_df))
+            legacy_str, speedup = f"{legacy_time:.3f}", f"{legacy_time / vector_time:.0f}x"
+        else:
+            legacy_str, speedup = '-', '-'
+        print(f"{n_parts:>10} {len(df):>12,} {legacy_str:>12} {vector_time:>10.3f} {speedup:>10}")
+
+
+if __name__ == '__main__':
+    main()
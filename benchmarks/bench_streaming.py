@@ -0,0 +1,63 @@
+"""Пиковая память и время бизнес-анализа в памяти и в потоковом режиме
+
+Каждый режим запускается в отдельном процессе, чтобы пиковый RSS не смешивался.
+Запуск: python benchmarks/bench_streaming.py --parts 100 1000 --chunk-rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import contextlib, io, json, sys, time
+sys.path.insert(0, {root!r})
+from main import AviationDataAnalyzer, peak_rss_mb
+from src.analysis.aggregates import AggregateContext
+from src.data.generator import DataGenerator
+
+analyzer = AviationDataAnalyzer(data_generator=DataGenerator(n_parts={n_parts}))
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    if {mode!r} == 'streaming':
+        metrics = analyzer.run_streaming_analysis({chunk_rows}, {features_path!r})['business_metrics']
+    else:
+        df = analyzer.load_data()
+        X, y = analyzer.feature_engineer.prepare_features_for_training(analyzer.feature_engineer.create_features(df))
+        context = AggregateContext(df)
+        business_metrics = analyzer.business_analyzer.analyze_business_metrics(df, context)
+        recommendations = analyzer.business_analyzer.generate_recommendations(
+            df, business_metrics['revenue_analysis'], context)
+        metrics = analyzer.metrics_calculator.calculate_business_metrics(df, recommendations, context)
+print(json.dumps({{'seconds': time.perf_counter() - started, 'peak_rss_mb': peak_rss_mb(), 'metrics': metrics}},
+                 default=float))
+"""
+
+
+def run_mode(mode: str, n_parts: int, chunk_rows: int, features_path: str) -> dict:
+    code = SCRIPT.format(root=ROOT, mode=mode, n_parts=n_parts, chunk_rows=chunk_rows, features_path=features_path)
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--chunk-rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'запчастей':>10} {'в памяти, МБ':>14} {'потоково, МБ':>14} {'в памяти, с':>12} {'потоково, с':>12}  метрики")
+    for n_parts in args.parts:
+        with tempfile.TemporaryDirectory() as tmp:
+            in_memory = run_mode('in_memory', n_parts, args.chunk_rows, None)
+            streaming = run_mode('streaming', n_parts, args.chunk_rows, os.path.join(tmp, 'features'))
+        same = 'совпадают' if in_memory['metrics'] == streaming['metrics'] else 'РАЗЛИЧАЮТСЯ'
+        print(f"{n_parts:>10} {in_memory['peak_rss_mb']:>14.0f} {streaming['peak_rss_mb']:>14.0f} "
+              f"{in_memory['seconds']:>12.2f} {streaming['seconds']:>12.2f}  {same}")
+
+
+if __name__ == '__main__':
+    main()
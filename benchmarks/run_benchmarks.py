@@ -0,0 +1,251 @@
+"""Набор бенчмарков этапов полного анализа с кривыми масштабирования и проверкой регрессий
+
+Замер и сохранение базовой линии:
+    python benchmarks/run_benchmarks.py --parts 5 100 1000 --save-baseline benchmarks/baseline.json
+Сравнение с базовой линией (код возврата 1 при замедлении этапа больше порога):
+    python benchmarks/run_benchmarks.py --parts 5 100 1000 --compare benchmarks/baseline.json --threshold 0.25
+Большие каталоги без обучения модели:
+    python benchmarks/run_benchmarks.py --parts 10000 100000 --repeat 1 --skip training
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.aggregates import AggregateContext
+from src.analysis.anomalies import AnomalyDetector
+from src.analysis.business_analyzer import BusinessAnalyzer
+from src.analysis.metrics_calculator import MetricsCalculator
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+from src.models.trainer import ModelTrainer
+
+STAGES = ['generation', 'anomalies', 'create_features', 'prepare_training', 'training',
+          'business_analysis', 'recommendations', 'metrics']
+# Этапы, результаты которых не нужны другим этапам
+SKIPPABLE = ['anomalies', 'training', 'metrics']
+# Параметры запуска, от которых зависит объем работы этапов
+COMPARED_CONFIG = ['start', 'end', 'n_estimators']
+
+
+def run_stages(n_parts: int, start: str, end: str, n_estimators: int, measure_memory: bool,
+               skip: tuple = ()) -> dict:
+    """Один прогон всех этапов: время и (опционально) пик памяти каждого"""
+    state = {}
+    results = {}
+
+    def generation():
+        state['df'] = DataGenerator(n_parts=n_parts).generate_business_data(start, end)
+
+    def anomalies():
+        state['df']['is_anomaly'] = AnomalyDetector().detect(state['df'])
+
+    def create_features():
+        state['df_processed'] = FeatureEngineer().create_features(state['df'])
+
+    def prepare_training():
+        state['X'], state['y'] = FeatureEngineer().prepare_features_for_training(state['df_processed'])
+
+    def training():
+        trainer = ModelTrainer({'n_estimators': n_estimators, 'random_state': 42, 'n_jobs': -1}, n_splits=3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            trainer.train_demand_model(state['X'], state['y'])
+        state['trainer'] = trainer
+
+    def business_analysis():
+        state['context'] = AggregateContext(state['df'])
+        state['business'] = BusinessAnalyzer().analyze_business_metrics(state['df'], state['context'])
+
+    def recommendations():
+        state['recommendations'] = BusinessAnalyzer().generate_recommendations(
+            state['df'], state['business']['revenue_analysis'], state['context'])
+
+    def metrics():
+        calculator = MetricsCalculator()
+        if 'trainer' in state:
+            calculator.calculate_ml_metrics(state['y'], state['trainer'].predict(state['X']))
+        calculator.calculate_business_metrics(state['df'], state['recommendations'], state['context'])
+
+    for name, stage in zip(STAGES, [generation, anomalies, create_features, prepare_training, training,
+                                    business_analysis, recommendations, metrics]):
+        if name in skip:
+            continue
+        if measure_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        stage()
+        results[name] = {'seconds': time.perf_counter() - started}
+        if measure_memory:
+            results[name]['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            tracemalloc.stop()
+    results['_rows'] = len(state['df'])
+    return results
+
+
+def benchmark(parts: list, start: str, end: str, repeat: int, n_estimators: int, measure_memory: bool,
+              skip: tuple = ()) -> dict:
+    """Лучшее время из repeat прогонов для каждого размера каталога"""
+    report = {
+        'config': {'start': start, 'end': end, 'repeat': repeat, 'n_estimators': n_estimators, 'skip': list(skip)},
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'machine': platform.machine(), 'cpu_count': os.cpu_count()},
+        'results': []
+    }
+    names = [name for name in STAGES if name not in skip]
+    for n_parts in parts:
+        runs = [run_stages(n_parts, start, end, n_estimators, False, skip) for _ in range(repeat)]
+        n_rows = runs[0].pop('_rows')
+        stages = {name: {'seconds': min(run[name]['seconds'] for run in runs)} for name in names}
+        if measure_memory:
+            memory = run_stages(n_parts, start, end, n_estimators, True, skip)
+            for name in names:
+                stages[name]['peak_mb'] = memory[name]['peak_mb']
+        for name in names:
+            stages[name]['rows_per_second'] = n_rows / max(stages[name]['seconds'], 1e-9)
+        report['results'].append({'parts': n_parts, 'rows': n_rows, 'stages': stages})
+        print_result(report['results'][-1])
+    return report
+
+
+def print_result(result: dict):
+    print(f"\nЗапчастей: {result['parts']:,}, строк: {result['rows']:,}")
+    print(f"{'этап':<20} {'время, с':>10} {'строк/с':>14} {'пик, МБ':>10}")
+    for name, stats in result['stages'].items():
+        peak = f"{stats['peak_mb']:.1f}" if 'peak_mb' in stats else '—'
+        print(f"{name:<20} {stats['seconds']:>10.3f} {stats['rows_per_second']:>14,.0f} {peak:>10}")
+
+
+def compare(report: dict, baseline: dict, threshold: float, min_seconds: float) -> list:
+    """Этапы, замедлившиеся относительно базовой линии больше чем на threshold
+
+    Этапы короче min_seconds в базовой линии не проверяются: их время в основном шум.
+    """
+    baseline_results = {result['parts']: result['stages'] for result in baseline['results']}
+    regressions = []
+    print(f"\n{'запчастей':>10} {'этап':<20} {'база, с':>10} {'сейчас, с':>10} {'изменение':>10}")
+    for result in report['results']:
+        base_stages = baseline_results.get(result['parts'])
+        if base_stages is None:
+            continue
+        for name, stats in result['stages'].items():
+            if name not in base_stages:
+                continue
+            base = base_stages[name]['seconds']
+            ratio = stats['seconds'] / base if base > 0 else 1.0
+            regressed = base >= min_seconds and ratio > 1 + threshold
+            mark = '  РЕГРЕССИЯ' if regressed else ''
+            print(f"{result['parts']:>10} {name:<20} {base:>10.3f} {stats['seconds']:>10.3f} {ratio - 1:>+10.1%}{mark}")
+            if regressed:
+                regressions.append((result['parts'], name, ratio))
+    return regressions
+
+
+def comparison_problems(report: dict, baseline: dict) -> list:
+    """Причины, по которым замеры нельзя сравнить с базовой линией
+
+    Сравнение имеет смысл только при том же периоде данных и модели, тех же
+    строках для каждого размера каталога и полном наборе этапов базовой линии.
+    """
+    problems = []
+    for key in COMPARED_CONFIG:
+        current, base = report.get('config', {}).get(key), baseline.get('config', {}).get(key)
+        if current != base:
+            problems.append(f"параметр {key}: база {base}, сейчас {current}")
+    current_results = {result['parts']: result for result in report['results']}
+    common = [result for result in baseline['results'] if result['parts'] in current_results]
+    if not common:
+        problems.append("нет общих размеров каталога с базовой линией")
+    for base_result in common:
+        result = current_results[base_result['parts']]
+        if result['rows'] != base_result['rows']:
+            problems.append(f"{result['parts']} запчастей: строк в базе {base_result['rows']}, сейчас {result['rows']}")
+        missing = [name for name in base_result['stages'] if name not in result['stages']]
+        if missing:
+            problems.append(f"{result['parts']} запчастей: нет этапов базовой линии {', '.join(missing)}")
+    return problems
+
+
+def plot_curves(report: dict, path: str):
+    """Кривые масштабирования: время, пропускная способность и (если замерялся) пик памяти этапов"""
+    from matplotlib.figure import Figure
+    results = report['results']
+    stages = list(results[0]['stages'])
+    panels = [('seconds', 'Время этапа, с'), ('rows_per_second', 'Строк в секунду')]
+    if all('peak_mb' in stats for stats in results[0]['stages'].values()):
+        panels.append(('peak_mb', 'Пик памяти этапа, МБ'))
+
+    fig = Figure(figsize=(7 * len(panels), 5))
+    axes = fig.subplots(1, len(panels))
+    parts = [result['parts'] for result in results]
+    for ax, (metric, title) in zip(axes, panels):
+        for name in stages:
+            ax.plot(parts, [r['stages'][name][metric] for r in results], marker='o', label=name)
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Запчастей')
+        ax.set_title(title)
+    axes[0].legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path)
+    return fig
+
+
+def regression_gate(report: dict, baseline: dict, threshold: float, min_seconds: float) -> int:
+    """Код возврата проверки: 1, если замеры несравнимы с базой или какой-либо этап замедлился сильнее порога"""
+    problems = comparison_problems(report, baseline)
+    if problems:
+        print("\nЗамеры нельзя сравнить с базовой линией:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    regressions = compare(report, baseline, threshold, min_seconds)
+    if regressions:
+        print(f"\nЗамедлились этапы: {len(regressions)}")
+        return 1
+    print("\nРегрессий нет")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки этапов анализа')
+    parser.add_argument('--parts', type=int, nargs='+', default=[5, 100, 1000])
+    parser.add_argument('--start', default='2022-01-01')
+    parser.add_argument('--end', default='2024-01-01')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--n-estimators', type=int, default=20, help='деревьев в модели на этапе обучения')
+    parser.add_argument('--memory', action='store_true', help='дополнительный прогон с замером пика памяти')
+    parser.add_argument('--skip', nargs='*', default=[], choices=SKIPPABLE,
+                        help='пропускаемые этапы (например, training для больших каталогов)')
+    parser.add_argument('--output', help='JSON с результатами')
+    parser.add_argument('--plot', help='PNG с кривыми масштабирования')
+    parser.add_argument('--save-baseline', help='сохранить результаты как базовую линию')
+    parser.add_argument('--compare', help='базовая линия для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимое замедление этапа (доля)')
+    parser.add_argument('--min-seconds', type=float, default=0.05)
+    args = parser.parse_args()
+
+    report = benchmark(args.parts, args.start, args.end, args.repeat, args.n_estimators, args.memory, tuple(args.skip))
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+    if args.plot:
+        plot_curves(report, args.plot)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        sys.exit(regression_gate(report, baseline, args.threshold, args.min_seconds))
+
+
+if __name__ == '__main__':
+    main()
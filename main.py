@@ -1,54 +1,100 @@
+import argparse
+import sys
 import pandas as pd
+from typing import Dict, Iterator
 from src.data.generator import DataGenerator
+from src.data.dataset import DatasetStore
 from src.features.engineer import FeatureEngineer
+from src.features.store import IncrementalFeatureStore
+from src.features.matrix import FeatureMatrixWriter
 from src.models.trainer import ModelTrainer
+from src.models.search import HyperparameterSearch
+from src.models.artifact import ModelArtifact
+from src.models.registry import ModelRegistry
+from src.models.forecaster import DemandForecaster
+from src.analysis.aggregates import AggregateContext, StreamingAggregates
 from src.analysis.business_analyzer import BusinessAnalyzer
+from src.analysis.backtest import InventoryBacktester
+from src.analysis.anomalies import AnomalyDetector, IncrementalAnomalyDetector
+from src.analysis.sharding import ShardedAnalyzer
+from src.analysis.stock_policy import StockPolicy, ReorderPointPolicy
 from src.analysis.metrics_calculator import MetricsCalculator
 from src.visualization.dashboard import DashboardCreator
+from src.pipeline.dag import Pipeline, source_version
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def peak_rss_mb() -> float:
+    """Пиковый объем памяти процесса, МБ; NaN на платформах без модуля resource (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает килобайты, macOS — байты
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
 class AviationDataAnalyzer:
-    def __init__(self):
+    def __init__(self, stock_policy: StockPolicy = None, dataset_path: str = None,
+                 data_generator: DataGenerator = None, n_workers: int = 1,
+                 anomaly_detector: AnomalyDetector = None, report_dir: str = None,
+                 date_range: tuple = ('2022-01-01', '2024-01-01')):
+        self.dataset_path = dataset_path
+        # Период генерируемой истории (для хранилища не используется)
+        self.date_range = tuple(date_range)
+        self.anomaly_detector = anomaly_detector or AnomalyDetector()
+        self.n_workers = n_workers
+        self.data_generator = data_generator or DataGenerator()
         self.df = None
         self.model_trainer = None
+        self.model_params = None
+        self.forecaster = None
+        self._forecaster_key = None
         self.feature_engineer = FeatureEngineer()
-        self.business_analyzer = BusinessAnalyzer()
+        self.business_analyzer = BusinessAnalyzer(stock_policy)
         self.metrics_calculator = MetricsCalculator()
-        self.dashboard_creator = DashboardCreator()
+        # С report_dir дашборд сохраняется в файлы вместо показа в окне
+        self.dashboard_creator = DashboardCreator(report_dir, formats=('png', 'html'))
         
     def run_full_analysis(self):
         """Запуск полного анализа"""
         print("=== АНАЛИЗ ДАННЫХ АВИАЗАПЧАСТЕЙ ===\n")
         
-        # Генерация данных
-        print("1. Генерация бизнес-данных...")
-        data_generator = DataGenerator()
-        self.df = data_generator.generate_business_data()
-        print(f"   Создано записей: {len(self.df):,}")
+        # Генерация или загрузка данных
+        self.df = self.load_data()
+        # Флаг аномалий считается по самим данным, а не берется из генератора
+        self.df['is_anomaly'] = self.anomaly_detector.detect(self.df)
         
         # ML модель
         print("\n2. Обучение ML модели...")
-        df_processed = self.feature_engineer.create_features(self.df)
-        X, y = self.feature_engineer.prepare_features_for_training(df_processed)
+        if self.n_workers > 1:
+            # Признаки и агрегаты по запчастям считаются параллельно по шардам
+            df_processed, context = ShardedAnalyzer(self.feature_engineer, self.n_workers).run(self.df)
+        else:
+            df_processed = self.feature_engineer.create_features(self.df)
+            context = AggregateContext(self.df)
+        # Float32-матрица с фиксированной схемой колонок вместо таблицы get_dummies
+        X, y = self.feature_engineer.prepare_feature_matrix(df_processed)
         
-        self.model_trainer = ModelTrainer()
-        model_mae = self.model_trainer.train_demand_model(X, y)
+        # model_params задаются подбором гиперпараметров; без него — параметры по умолчанию
+        self.model_trainer = ModelTrainer(self.model_params)
+        model_mae = self.model_trainer.train_demand_model(X, y, self.feature_engineer.training_columns)
         
-        # Бизнес-анализ
+        # Бизнес-анализ: общие агрегаты считаются один раз для всех анализаторов
         print("\n3. Бизнес-анализ...")
-        business_metrics = self.business_analyzer.analyze_business_metrics(self.df)
+        business_metrics = self.business_analyzer.analyze_business_metrics(self.df, context)
         
         # Рекомендации
         print("\n4. Формирование рекомендаций...")
         recommendations = self.business_analyzer.generate_recommendations(
-            self.df, business_metrics['revenue_analysis']
+            self.df, business_metrics['revenue_analysis'], context
         )
         
         # Расчет метрик
         print("\n5. Расчет метрик...")
         ml_metrics = self.metrics_calculator.calculate_ml_metrics(y, self.model_trainer.predict(X))
-        business_metrics_detailed = self.metrics_calculator.calculate_business_metrics(self.df, recommendations)
+        business_metrics_detailed = self.metrics_calculator.calculate_business_metrics(self.df, recommendations, context)
         
         # Вывод метрик
         print("\n" + "="*50)
@@ -57,6 +103,8 @@ class AviationDataAnalyzer:
         print(f"MAE модели: {ml_metrics['MAE']}")
         print(f"Уровень сервиса: {business_metrics_detailed['service_level_percent']}%")
         print(f"Потенциальная экономия: {business_metrics_detailed['potential_annual_savings_millions']} млн руб./год")
+        print(f"Обнаружено аномалий: {business_metrics['anomalies_count']}")
+        print(f"Пиковая память процесса: {peak_rss_mb():.0f} МБ")
         
         # Визуализация
         print("\n6. Создание дашборда...")
@@ -70,7 +118,276 @@ class AviationDataAnalyzer:
             'recommendations': recommendations
         }
 
+    def build_pipeline(self, cache_dir: str = None) -> Pipeline:
+        """Этапы полного анализа в виде графа с кэшем результатов
+
+        Обучение модели запускает пул процессов, поэтому выполняется в главном
+        потоке, когда другие этапы не работают; остальные независимые этапы
+        выполняются одновременно.
+        """
+        fe = self.feature_engineer
+        policy = self.business_analyzer.stock_policy
+        pipeline = Pipeline(cache_dir)
+        # В настройках этапов — хэш кода модулей, которые они вызывают (см. source_version)
+        pipeline.add('data', self._load_data_stage, config={
+            'dataset_path': self.dataset_path,
+            'dataset_version': DatasetStore(self.dataset_path).version() if self.dataset_path else None,
+            'generator': {'seed': self.data_generator.seed, 'parts': self.data_generator.parts_config,
+                          'date_range': self.date_range},
+            'anomaly_detector': {'class': type(self.anomaly_detector).__name__, **vars(self.anomaly_detector)},
+            'code': source_version(DataGenerator, DatasetStore, AnomalyDetector)
+        })
+        pipeline.add('features', self._features_stage, ['data'], config={
+            'lags': fe.lags, 'windows': fe.windows, 'compact': fe.compact, 'causal': fe.causal,
+            'encoding': fe.encoding, 'code': source_version(FeatureEngineer)
+        })
+        pipeline.add('model', self._model_stage, ['features'], config={
+            'model_params': self.model_params, 'code': source_version(ModelTrainer)
+        }, in_main_thread=True)
+        pipeline.add('ml_metrics', lambda model, features: self.metrics_calculator.calculate_ml_metrics(
+            features[1], model[0].predict(features[0])), ['model', 'features'],
+            config={'code': source_version(MetricsCalculator)})
+        pipeline.add('business', lambda df: self.business_analyzer.analyze_business_metrics(df), ['data'],
+                     config={'code': source_version(BusinessAnalyzer, AggregateContext)})
+        pipeline.add('recommendations', lambda df, business: self.business_analyzer.generate_recommendations(
+            df, business['revenue_analysis']), ['data', 'business'],
+            config={'stock_policy': {'class': type(policy).__name__, **vars(policy)},
+                    'code': source_version(BusinessAnalyzer, AggregateContext, StockPolicy)})
+        pipeline.add('business_metrics', lambda df, recommendations: self.metrics_calculator.calculate_business_metrics(
+            df, recommendations), ['data', 'recommendations'],
+            config={'code': source_version(MetricsCalculator, AggregateContext)})
+        if self.dashboard_creator.output_dir is not None:
+            creator = self.dashboard_creator
+            pipeline.add('dashboard', lambda business, model: creator.create_dashboard(
+                business, model[0].get_feature_importance()), ['business', 'model'],
+                config={'output_dir': creator.output_dir, 'formats': creator.formats, 'top_n': creator.top_n,
+                        'dpi': creator.dpi, 'code': source_version(DashboardCreator)})
+        return pipeline
+
+    def run_pipeline(self, cache_dir: str = '.pipeline_cache') -> dict:
+        """Полный анализ с пропуском этапов, результаты которых уже есть в кэше"""
+        print("=== АНАЛИЗ ДАННЫХ АВИАЗАПЧАСТЕЙ (КОНВЕЙЕР) ===\n")
+        pipeline = self.build_pipeline(cache_dir)
+        results = pipeline.run()
+        skipped = [name for name in pipeline.stages if name not in pipeline.executed]
+        print(f"Выполнены этапы: {', '.join(pipeline.executed) or 'нет'}")
+        print(f"Взяты из кэша: {', '.join(skipped) or 'нет'}")
+        print(f"MAE модели: {results['ml_metrics']['MAE']}")
+        print(f"Уровень сервиса: {results['business_metrics']['service_level_percent']}%")
+        return {
+            'model_mae': results['model'][1],
+            'ml_metrics': results['ml_metrics'],
+            'business_metrics': results['business_metrics'],
+            'recommendations': results['recommendations']
+        }
+
+    def _load_data_stage(self) -> pd.DataFrame:
+        df = self.load_data()
+        df['is_anomaly'] = self.anomaly_detector.detect(df)
+        return df
+
+    def _features_stage(self, df: pd.DataFrame) -> tuple:
+        """Матрица признаков, спрос и названия колонок"""
+        X, y = self.feature_engineer.prepare_feature_matrix(self.feature_engineer.create_features(df))
+        return X, y, self.feature_engineer.training_columns
+
+    def _model_stage(self, features: tuple) -> tuple:
+        """Обученная модель и средний MAE кросс-валидации"""
+        model_trainer = ModelTrainer(self.model_params)
+        model_mae = model_trainer.train_demand_model(*features)
+        return model_trainer, model_mae
+
+    def load_data(self) -> pd.DataFrame:
+        """Загрузка истории из хранилища или генерация бизнес-данных"""
+        if self.dataset_path:
+            print("1. Загрузка данных из хранилища...")
+            df = DatasetStore(self.dataset_path).read()
+            print(f"   Загружено записей: {len(df):,}")
+        else:
+            print("1. Генерация бизнес-данных...")
+            df = self.data_generator.generate_business_data(*self.date_range)
+            print(f"   Создано записей: {len(df):,}")
+        return df
+
+    def run_streaming_analysis(self, chunk_rows: int = 500_000, features_path: str = None,
+                               max_shortage_rows: int = 1000) -> dict:
+        """Бизнес-анализ без загрузки всей истории в память
+
+        Данные читаются блоками по датам; по каждому блоку обновляются
+        частичные агрегаты и состояние признаков. Если задан features_path,
+        матрица признаков для обучения записывается туда на диск. Из строк с
+        дефицитом (supply_issues) сохраняются max_shortage_rows с наибольшей нехваткой.
+        """
+        print("=== ПОТОКОВЫЙ АНАЛИЗ ДАННЫХ АВИАЗАПЧАСТЕЙ ===\n")
+        print("1. Обработка данных блоками...")
+        aggregates = StreamingAggregates(max_shortage_rows)
+        feature_store = IncrementalFeatureStore(self.feature_engineer)
+        # То же правило, что и в полном анализе: окно медианы и MAD по каждой запчасти
+        anomaly_detector = IncrementalAnomalyDetector.from_detector(self.anomaly_detector)
+        columns = self.feature_engineer.training_columns
+        writer = FeatureMatrixWriter(features_path, columns) if features_path else None
+        n_rows = n_chunks = 0
+        for chunk in self.iter_data(chunk_rows):
+            chunk['is_anomaly'] = anomaly_detector.update(chunk)
+            aggregates.update(chunk)
+            df_processed = feature_store.update(chunk)
+            if writer:
+                X = self.feature_engineer.prepare_features_for_prediction(df_processed, columns)
+                writer.append(X, df_processed['demand'])
+            n_rows += len(chunk)
+            n_chunks += 1
+        if writer:
+            writer.close()
+        print(f"   Обработано записей: {n_rows:,} (блоков: {n_chunks})")
+
+        print("\n2. Бизнес-анализ...")
+        business_metrics = self.business_analyzer.analyze_business_metrics(None, aggregates)
+
+        print("\n3. Формирование рекомендаций...")
+        recommendations = self.business_analyzer.generate_recommendations(
+            None, business_metrics['revenue_analysis'], aggregates
+        )
+
+        print("\n4. Расчет метрик...")
+        business_metrics_detailed = self.metrics_calculator.calculate_business_metrics(None, recommendations, aggregates)
+        print(f"Уровень сервиса: {business_metrics_detailed['service_level_percent']}%")
+        print(f"Потенциальная экономия: {business_metrics_detailed['potential_annual_savings_millions']} млн руб./год")
+        print(f"Обнаружено аномалий: {business_metrics['anomalies_count']}")
+        print(f"Пиковая память процесса: {peak_rss_mb():.0f} МБ")
+
+        return {
+            'business_metrics': business_metrics_detailed,
+            'recommendations': recommendations,
+            'aggregates': aggregates
+        }
+
+    def iter_data(self, chunk_rows: int = 500_000) -> Iterator[pd.DataFrame]:
+        """Блоки истории по датам из хранилища или генератора"""
+        if self.dataset_path:
+            store = DatasetStore(self.dataset_path)
+            yield from store.iter_chunks(chunk_days=max(1, chunk_rows // max(len(store.parts), 1)))
+        else:
+            yield from self.data_generator.iter_business_data(*self.date_range, chunk_rows=chunk_rows)
+
+    def save_model(self, path: str) -> ModelArtifact:
+        """Сохранение обученной модели для сервиса прогноза"""
+        return ModelArtifact.save(path, self.model_trainer, self.feature_engineer)
+
+    def forecast_demand(self, horizon: int = 30) -> pd.DataFrame:
+        """Прогноз спроса по всем запчастям на horizon дней вперед
+
+        Модель для прогноза обучается на признаках без спроса текущего дня
+        (causal), с теми же лагами и окнами, что и основная. Обученная модель
+        запоминается и переобучается, только если изменились история,
+        настройки признаков или параметры модели.
+        """
+        if self.df is None:
+            self.df = self.load_data()
+        fe = FeatureEngineer(self.feature_engineer.lags, self.feature_engineer.windows,
+                             self.feature_engineer.compact, causal=True, encoding=self.feature_engineer.encoding)
+        key = (fe.lags, fe.windows, fe.encoding, repr(self.model_params),
+               self.df.shape, int(pd.util.hash_pandas_object(
+                   self.df[['date', 'part_name', 'demand', 'stock', 'price']], index=False).sum()))
+        if self.forecaster is None or self._forecaster_key != key:
+            X, y = fe.prepare_feature_matrix(fe.create_features(self.df))
+            trainer = ModelTrainer(self.model_params)
+            trainer.train_demand_model(X, y, fe.training_columns)
+            self.forecaster = DemandForecaster.from_trainer(trainer, fe)
+            self._forecaster_key = key
+        forecast = self.forecaster.forecast(self.df, horizon)
+        print(f"Прогноз на {horizon} дн.: {forecast['part_name'].nunique()} запчастей")
+        return forecast
+
+    def backtest_policies(self, policies: Dict[str, StockPolicy] = None) -> pd.DataFrame:
+        """Сравнение политик запасов на истории спроса
+
+        По умолчанию текущая политика сравнивается с (s, S) на уровнях сервиса 90–99%.
+        """
+        if self.df is None:
+            self.df = self.load_data()
+        if policies is None:
+            policies = {'current': self.business_analyzer.stock_policy}
+            policies.update({f'rop_{int(level * 100)}': ReorderPointPolicy(service_level=level)
+                             for level in (0.90, 0.95, 0.99)})
+        results = InventoryBacktester().run(self.df, policies)
+        print(results.to_string())
+        return results
+
+    def train_part_models(self, registry_path: str, by: str = 'part', n_workers: int = None) -> ModelRegistry:
+        """Обучение отдельных моделей по запчастям (by='part') или ABC-классам (by='abc')
+
+        Переобучаются только группы, данные которых изменились с прошлого запуска.
+        """
+        if self.df is None:
+            self.df = self.load_data()
+        df_processed = self.feature_engineer.create_features(self.df)
+        X, y = self.feature_engineer.prepare_features_for_training(df_processed)
+        groups = df_processed['part_name'].astype(str)
+        if by == 'abc':
+            revenue_df = self.business_analyzer.analyze_business_metrics(self.df)['revenue_analysis']
+            groups = groups.map(revenue_df.set_index('part_name')['abc_category'])
+        elif by != 'part':
+            raise ValueError(f"Неизвестная группировка моделей: {by}")
+
+        registry = ModelRegistry(registry_path, n_workers=n_workers)
+        trained = registry.train(X, y, groups)
+        print(f"Обучено моделей: {len(trained)} из {len(registry.entries)}")
+        return registry
+
+    def run_hyperparameter_search(self, n_trials: int = 20, log_path: str = None, param_space: Dict = None,
+                                  feature_space: Dict = None) -> dict:
+        """Подбор параметров модели и окон признаков
+
+        Лучшая конфигурация сохраняется в model_params и feature_engineer и
+        используется при следующем run_full_analysis() и run_pipeline().
+        """
+        print("=== ПОДБОР ГИПЕРПАРАМЕТРОВ ===\n")
+        if self.df is None:
+            self.df = self.load_data()
+
+        search = HyperparameterSearch(
+            param_space=param_space or {
+                'n_estimators': [50, 100, 200],
+                'max_depth': [None, 8, 12, 16],
+                'min_samples_leaf': [1, 2, 5],
+                'max_features': [1.0, 0.5, 'sqrt']
+            },
+            feature_space=feature_space or {'lags': [(7,), (1, 7), (7, 14)],
+                                            'windows': [(7,), (7, 14), (3, 7, 28)]},
+            n_trials=n_trials,
+            log_path=log_path
+        )
+        best_config = search.run(self.df)
+        fe = self.feature_engineer
+        self.feature_engineer = FeatureEngineer(lags=best_config['lags'], windows=best_config['windows'],
+                                                compact=fe.compact, causal=fe.causal, encoding=fe.encoding)
+        self.model_params = {**best_config['model_params'], 'n_jobs': -1}
+        return best_config
+
 # Запуск анализа
 if __name__ == "__main__":
-    analyzer = AviationDataAnalyzer()
-    results = analyzer.run_full_analysis()
+    parser = argparse.ArgumentParser(description='Анализ данных авиазапчастей')
+    parser.add_argument('command', nargs='?', default='full',
+                        choices=['full', 'streaming', 'pipeline', 'forecast', 'backtest'],
+                        help='streaming и backtest работают без обучения модели и не загружают sklearn')
+    parser.add_argument('--dataset', help='каталог хранилища DatasetStore вместо генерации данных')
+    parser.add_argument('--parts', type=int, default=None, help='число запчастей в генерируемом каталоге')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--report-dir', help='каталог отчетов дашборда вместо показа в окне')
+    parser.add_argument('--cache-dir', default='.pipeline_cache')
+    parser.add_argument('--chunk-rows', type=int, default=500_000)
+    parser.add_argument('--horizon', type=int, default=30)
+    args = parser.parse_args()
+
+    analyzer = AviationDataAnalyzer(dataset_path=args.dataset, data_generator=DataGenerator(n_parts=args.parts),
+                                    n_workers=args.workers, report_dir=args.report_dir)
+    if args.command == 'full':
+        results = analyzer.run_full_analysis()
+    elif args.command == 'streaming':
+        results = analyzer.run_streaming_analysis(args.chunk_rows)
+    elif args.command == 'pipeline':
+        results = analyzer.run_pipeline(args.cache_dir)
+    elif args.command == 'forecast':
+        results = analyzer.forecast_demand(args.horizon)
+    else:
+        results = analyzer.backtest_policies()
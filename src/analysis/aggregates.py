@@ -0,0 +1,238 @@
+import weakref
+import zlib
+import pandas as pd
+import numpy as np
+from typing import Callable, Dict
+
+# Колонки, от значений которых зависят агрегаты
+FINGERPRINT_COLUMNS = ('date', 'part_name', 'demand', 'stock', 'price', 'is_anomaly')
+
+
+class AggregateContext:
+    """Общие агрегаты таблицы для BusinessAnalyzer и MetricsCalculator
+
+    Каждый агрегат считается лениво при первом обращении и запоминается.
+    Кэш сбрасывается, если у таблицы изменились размер, колонки или значения
+    колонок, по которым считаются агрегаты (в том числе при изменении на месте).
+    Средние и разбросы выводятся из сумм, поэтому совпадают с результатом
+    объединения частичных агрегатов по блокам данных.
+    Контексты из for_frame держат таблицу по слабой ссылке и удаляются вместе с ней.
+    """
+
+    _registry: Dict[int, tuple] = {}
+
+    def __init__(self, df: pd.DataFrame, weak: bool = False):
+        self._df_ref = weakref.ref(df) if weak else (lambda: df)
+        # Отпечаток считается при первом обращении к агрегатам
+        self._fingerprint = None
+        self._cache = {}
+        self._computing = 0
+
+    @classmethod
+    def for_frame(cls, df: pd.DataFrame) -> 'AggregateContext':
+        """Общий контекст для таблицы: все анализаторы получают один и тот же объект"""
+        key = id(df)
+        entry = cls._registry.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        context = cls(df, weak=True)
+        cls._registry[key] = (weakref.ref(df, lambda _: cls._registry.pop(key, None)), context)
+        return context
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._df_ref()
+
+    def invalidate(self):
+        """Сброс всех запомненных агрегатов"""
+        self._cache.clear()
+        self._fingerprint = None
+
+    @property
+    def part_sums(self) -> pd.DataFrame:
+        """Суммы по запчастям, последний запас и дата последней записи"""
+        return self._memo('part_sums', self._compute_part_sums)
+
+    @property
+    def per_part(self) -> pd.DataFrame:
+        """Агрегаты по запчастям: суммы, средние, разброс спроса и последний запас"""
+        return self._memo('per_part', lambda: finalize_part_aggregates(self.part_sums))
+
+    @property
+    def shortage_mask(self) -> np.ndarray:
+        """Строки, где спрос превышает запас"""
+        return self._memo('shortage_mask', lambda: self.df['demand'].to_numpy() > self.df['stock'].to_numpy())
+
+    @property
+    def shortage_rows(self) -> pd.DataFrame:
+        """Строки с дефицитом"""
+        return self.df[self.shortage_mask]
+
+    @property
+    def totals(self) -> Dict:
+        """Итоги по всей таблице за один проход по колонкам"""
+        return self._memo('totals', self._compute_totals)
+
+    def _memo(self, name: str, compute: Callable):
+        # Во время расчета одного агрегата вложенные обращения таблицу не перепроверяют
+        if not self._computing:
+            fingerprint = self._make_fingerprint(self.df)
+            if fingerprint != self._fingerprint:
+                self._cache.clear()
+                self._fingerprint = fingerprint
+        if name not in self._cache:
+            self._computing += 1
+            try:
+                self._cache[name] = compute()
+            finally:
+                self._computing -= 1
+        return self._cache[name]
+
+    def _compute_part_sums(self) -> pd.DataFrame:
+        df = self.df
+        demand = _as_int64(df['demand'])
+        grouped = pd.DataFrame({
+            'demand_sum': demand,
+            'demand_sq_sum': demand * demand,
+            'price_sum': _as_int64(df['price']),
+            'stock_last': df['stock'].to_numpy(),
+            'last_date': pd.to_datetime(df['date']).to_numpy()
+        }).groupby(df['part_name'].array, observed=True)
+        sums = grouped[['demand_sum', 'demand_sq_sum', 'price_sum']].sum()
+        sums['count'] = grouped.size()
+        sums[['stock_last', 'last_date']] = grouped[['stock_last', 'last_date']].last()
+        sums.index = pd.Index(sums.index.to_numpy(), name='part_name')
+        return sums
+
+    def _compute_totals(self) -> Dict:
+        df = self.df
+        demand = _as_int64(df['demand'])
+        stock = _as_int64(df['stock'])
+        price = _as_int64(df['price'])
+        shortage = self.shortage_mask
+        return {
+            'n_rows': len(df),
+            'demand_sum': demand.sum(),
+            'stock_sum': stock.sum(),
+            'price_sum': price.sum(),
+            'revenue': (demand * price).sum(),
+            'shortage_count': int(shortage.sum()),
+            'shortage_units': (demand[shortage] - stock[shortage]).sum(),
+            'anomalies_count': int(df['is_anomaly'].sum()) if 'is_anomaly' in df else 0
+        }
+
+    @staticmethod
+    def _make_fingerprint(df: pd.DataFrame) -> tuple:
+        """Размер, колонки и контрольные суммы значений колонок агрегатов"""
+        checksums = []
+        for name in FINGERPRINT_COLUMNS:
+            if name in df:
+                column = df[name]
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    checksums.append((_checksum(column.cat.codes.to_numpy()), tuple(column.cat.categories)))
+                else:
+                    checksums.append(_checksum(np.asarray(column.array)))
+        return df.shape, tuple(df.columns), tuple(checksums)
+
+
+class StreamingAggregates:
+    """Частичные агрегаты по блокам данных с тем же интерфейсом, что у AggregateContext
+
+    Блоки добавляются через update() в порядке дат, частичные агрегаты разных
+    процессов или шардов объединяются через merge(). Итоговые метрики
+    совпадают с расчетом по всей таблице в памяти.
+    Из строк с дефицитом хранятся только max_shortage_rows с наибольшей
+    нехваткой (спрос минус запас), чтобы память не росла с объемом истории;
+    None — хранить все строки, 0 — не хранить.
+    """
+
+    def __init__(self, max_shortage_rows: int = 1000):
+        self.max_shortage_rows = max_shortage_rows
+        self.part_sums = None
+        self.totals = {}
+        self._shortage_rows = None
+
+    @property
+    def per_part(self) -> pd.DataFrame:
+        return finalize_part_aggregates(self.part_sums)
+
+    @property
+    def shortage_rows(self) -> pd.DataFrame:
+        return self._shortage_rows
+
+    def update(self, chunk: pd.DataFrame) -> 'StreamingAggregates':
+        """Добавление блока строк"""
+        context = AggregateContext(chunk)
+        partial = StreamingAggregates(self.max_shortage_rows)
+        partial.part_sums = context.part_sums
+        partial.totals = dict(context.totals)
+        if self.max_shortage_rows != 0:
+            partial._shortage_rows = partial._worst(context.shortage_rows)
+        return self.merge(partial)
+
+    def merge(self, other: 'StreamingAggregates') -> 'StreamingAggregates':
+        """Объединение с другими частичными агрегатами (более поздние данные — в other)"""
+        if other.part_sums is None:
+            return self
+        if self.part_sums is None:
+            self.part_sums = other.part_sums
+        else:
+            combined = pd.concat([self.part_sums, other.part_sums]).sort_values('last_date', kind='stable')
+            grouped = combined.groupby(level=0, sort=True)
+            sums = grouped[['demand_sum', 'demand_sq_sum', 'price_sum', 'count']].sum()
+            sums[['stock_last', 'last_date']] = grouped[['stock_last', 'last_date']].last()
+            self.part_sums = sums
+        for name, value in other.totals.items():
+            self.totals[name] = self.totals.get(name, 0) + value
+        if self.max_shortage_rows != 0 and other._shortage_rows is not None:
+            rows = [r for r in (self._shortage_rows, other._shortage_rows) if r is not None]
+            self._shortage_rows = self._worst(pd.concat(rows) if len(rows) > 1 else rows[0])
+        return self
+
+    def restore_row_order(self, index: pd.Index) -> 'StreamingAggregates':
+        """Строки с дефицитом, проиндексированные позициями в исходной таблице, — в ее порядке и с ее индексом"""
+        if self._shortage_rows is not None:
+            rows = self._shortage_rows.sort_index(kind='stable')
+            self._shortage_rows = rows.set_axis(index[rows.index.to_numpy()])
+        return self
+
+    def _worst(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Не больше max_shortage_rows строк с наибольшей нехваткой в исходном порядке"""
+        if self.max_shortage_rows is None or len(rows) <= self.max_shortage_rows:
+            return rows
+        shortage = _as_int64(rows['demand']) - _as_int64(rows['stock'])
+        keep = np.sort(np.argsort(-shortage, kind='stable')[:self.max_shortage_rows])
+        return rows.iloc[keep]
+
+
+def _checksum(values: np.ndarray) -> int:
+    """CRC32 содержимого массива
+
+    У массивов объектов (строк) суммируются указатели: замена значения
+    создает новый объект, а сами строки неизменяемы.
+    """
+    values = np.ascontiguousarray(values)
+    if values.dtype == object:
+        return zlib.crc32(memoryview(values).cast('B'))
+    return zlib.crc32(values.view(np.uint8))
+
+
+def _as_int64(values: pd.Series) -> np.ndarray:
+    """Целые колонки в int64, чтобы суммы и произведения компактных типов не переполнялись"""
+    values = values.to_numpy()
+    return values.astype(np.int64) if np.issubdtype(values.dtype, np.integer) else values
+
+
+def finalize_part_aggregates(sums: pd.DataFrame) -> pd.DataFrame:
+    """Средние и разброс спроса из сумм по запчастям"""
+    count = sums['count'].to_numpy()
+    demand_sum = sums['demand_sum'].to_numpy()
+    # n·Σx² − (Σx)² в целых числах точен, деление — одна операция
+    spread = (count * sums['demand_sq_sum'].to_numpy() - demand_sum * demand_sum).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        demand_std = np.sqrt(np.maximum(spread, 0) / (count * (count - 1.0)))
+    result = sums.copy()
+    result['avg_demand'] = demand_sum / count
+    result['demand_std'] = np.where(count > 1, demand_std, np.nan)
+    result['price_mean'] = sums['price_sum'].to_numpy() / count
+    return result
@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.features.engineer import FeatureEngineer
+
+# Множитель, приводящий MAD к стандартному отклонению нормального распределения
+MAD_SCALE = 1.4826
+
+
+class AnomalyDetector:
+    """Поиск всплесков спроса по истории каждой запчасти
+
+    method='mad' — робастная z-оценка относительно медианы и MAD спроса
+    за предыдущие window дней; первые window дней запчасти не оцениваются.
+    method='seasonal' — z-оценка остатка после вычета среднего спроса
+    запчасти по дню недели.
+    Все запчасти обрабатываются одним проходом по отсортированному массиву.
+    """
+
+    def __init__(self, method: str = 'mad', window: int = 28, threshold: float = 3.5,
+                 block_rows: int = 1_000_000):
+        if method not in ('mad', 'seasonal'):
+            raise ValueError(f"Неизвестный метод поиска аномалий: {method}")
+        self.method = method
+        self.window = window
+        self.threshold = threshold
+        self.block_rows = block_rows
+
+    def detect(self, df: pd.DataFrame) -> np.ndarray:
+        """Флаг аномалии для каждой строки в порядке строк таблицы"""
+        return self.score(df) > self.threshold
+
+    def score(self, df: pd.DataFrame) -> np.ndarray:
+        """z-оценка спроса каждой строки (NaN, если истории недостаточно)"""
+        date = pd.to_datetime(df['date'])
+        part_codes, _ = pd.factorize(df['part_name'], sort=True)
+        demand = df['demand'].to_numpy(dtype=np.float64)
+        if self.method == 'seasonal':
+            return self._seasonal_scores(demand, part_codes, date.dt.dayofweek.to_numpy())
+
+        order = np.lexsort((date.to_numpy().astype(np.int64), part_codes))
+        scores = np.full(len(df), np.nan)
+        scores[order] = self._mad_scores(demand[order], FeatureEngineer.group_positions(part_codes[order]))
+        return scores
+
+    def _mad_scores(self, demand: np.ndarray, group_pos: np.ndarray) -> np.ndarray:
+        """Оценки по окну предыдущих дней; массив отсортирован по (запчасть, дата)"""
+        scores = np.full(len(demand), np.nan)
+        # Окно строки t — значения t-window … t-1 той же запчасти
+        rows = np.flatnonzero(group_pos >= self.window)
+        if not len(rows):
+            return scores
+        windows = sliding_window_view(demand, self.window)
+        for start in range(0, len(rows), self.block_rows):
+            block = rows[start:start + self.block_rows]
+            values = windows[block - self.window]
+            median = np.median(values, axis=1)
+            mad = np.median(np.abs(values - median[:, None]), axis=1)
+            # Спрос целочисленный: разброс не меньше одной единицы
+            scores[block] = (demand[block] - median) / (MAD_SCALE * np.maximum(mad, 1.0))
+        return scores
+
+    def _seasonal_scores(self, demand: np.ndarray, part_codes: np.ndarray, day_of_week: np.ndarray) -> np.ndarray:
+        """Оценки остатка после недельной сезонности запчасти
+
+        Профиль и разброс пересчитываются второй раз без найденных выбросов,
+        чтобы сами всплески не завышали ожидаемый уровень.
+        """
+        n_parts = part_codes.max() + 1 if len(part_codes) else 0
+        cell = part_codes * 7 + day_of_week
+        weights = np.ones(len(demand))
+        for _ in range(2):
+            profile = np.bincount(cell, demand * weights, n_parts * 7) / np.maximum(
+                np.bincount(cell, weights, n_parts * 7), 1)
+            residual = demand - profile[cell]
+            counts = np.bincount(part_codes, weights, n_parts)
+            variance = np.bincount(part_codes, weights * residual ** 2, n_parts) / np.maximum(counts - 1, 1)
+            scores = residual / np.maximum(np.sqrt(variance), 1.0)[part_codes]
+            weights = (np.abs(scores) <= self.threshold).astype(np.float64)
+        return scores
+
+
+class IncrementalAnomalyDetector:
+    """Потоковый вариант AnomalyDetector(method='mad') с тем же правилом
+
+    Для каждой запчасти хранятся последние window значений спроса в
+    кольцевом буфере. Каждая партия дописывается к этой истории, и оценки
+    считаются тем же окном медианы и MAD, что и в пакетном детекторе,
+    поэтому при подаче данных в порядке дат флаги совпадают с расчетом по
+    всей таблице. Память — window значений на запчасть.
+    """
+
+    def __init__(self, window: int = 28, threshold: float = 3.5):
+        self.window = window
+        self.threshold = threshold
+        self.part_index = {}
+        self.buffer = np.zeros((0, window))
+        self.n_seen = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_detector(cls, detector: AnomalyDetector) -> 'IncrementalAnomalyDetector':
+        """Потоковый детектор с настройками пакетного"""
+        if detector.method != 'mad':
+            raise ValueError("Потоковый поиск аномалий поддерживает только method='mad'")
+        return cls(detector.window, detector.threshold)
+
+    def update(self, batch: pd.DataFrame) -> np.ndarray:
+        """Флаги аномалий для строк партии; партия может содержать несколько дней"""
+        return self.score(batch) > self.threshold
+
+    def score(self, batch: pd.DataFrame) -> np.ndarray:
+        """z-оценки строк партии с обновлением истории запчастей"""
+        parts = self._register_parts(batch['part_name'])
+        demand = batch['demand'].to_numpy(dtype=np.float64)
+        date = pd.to_datetime(batch['date']).to_numpy().astype(np.int64)
+        order = np.lexsort((date, parts))
+        sorted_parts = parts[order]
+        uniq, counts = np.unique(sorted_parts, return_counts=True)
+
+        # История запчасти (до window значений по порядку дат) и новые строки — одной группой
+        n_seen = self.n_seen[uniq]
+        history = np.minimum(n_seen, self.window)
+        sizes = history + counts
+        starts = np.cumsum(sizes) - sizes
+        combined = np.empty(sizes.sum())
+        group_pos = np.empty(sizes.sum(), dtype=np.int64)
+
+        history_rows = np.repeat(starts, history) + _ragged_arange(history)
+        t = np.repeat(n_seen - history, history) + _ragged_arange(history)
+        combined[history_rows] = self.buffer[np.repeat(uniq, history), t % self.window]
+        group_pos[history_rows] = t
+
+        local = _ragged_arange(counts)
+        new_rows = np.repeat(starts + history, counts) + local
+        combined[new_rows] = demand[order]
+        group_pos[new_rows] = np.repeat(n_seen, counts) + local
+
+        detector = AnomalyDetector(window=self.window, threshold=self.threshold)
+        scores = np.full(len(batch), np.nan)
+        scores[order] = detector._mad_scores(combined, group_pos)[new_rows]
+
+        # В буфер попадают только последние window значений каждой запчасти
+        keep = local >= np.repeat(counts, counts) - self.window
+        absolute = np.repeat(n_seen, counts) + local
+        self.buffer[sorted_parts[keep], absolute[keep] % self.window] = demand[order][keep]
+        self.n_seen[uniq] += counts
+        return scores
+
+    def _register_parts(self, part_names: pd.Series) -> np.ndarray:
+        for name in pd.unique(part_names):
+            if name not in self.part_index:
+                self.part_index[name] = len(self.part_index)
+        n_new = len(self.part_index) - len(self.n_seen)
+        if n_new:
+            self.buffer = np.concatenate([self.buffer, np.zeros((n_new, self.window))])
+            self.n_seen = np.concatenate([self.n_seen, np.zeros(n_new, dtype=np.int64)])
+        return part_names.map(self.part_index).to_numpy(dtype=np.int64)
+
+
+def _ragged_arange(lengths: np.ndarray) -> np.ndarray:
+    """Склеенные arange(n) для каждой длины n"""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.arange(lengths.sum()) - offsets
@@ -0,0 +1,106 @@
+import pandas as pd
+import numpy as np
+from typing import Dict
+from src.analysis.aggregates import AggregateContext
+from src.analysis.stock_policy import StockPolicy
+
+
+class InventoryBacktester:
+    """Воспроизведение истории спроса под политиками запасов
+
+    Для каждой политики по статистикам спроса считаются точка заказа s и
+    целевой уровень S. Дальше история проигрывается по дням: поставки
+    приходят через срок поставки запчасти, спрос списывается с запаса
+    (неудовлетворенный спрос теряется), при позиции запаса (на складе + в
+    пути) не выше s заказывается S − позиция. Все запчасти и все политики
+    обрабатываются одним векторным шагом на день.
+    """
+
+    def __init__(self, holding_cost_rate: float = 0.25, shortage_cost_rate: float = 0.1):
+        # Годовая стоимость хранения как доля цены и стоимость дефицита как доля цены единицы
+        self.holding_cost_rate = holding_cost_rate
+        self.shortage_cost_rate = shortage_cost_rate
+
+    def run(self, df: pd.DataFrame, policies: Dict[str, StockPolicy], context: AggregateContext = None) -> pd.DataFrame:
+        """Итоги симуляции по каждой политике"""
+        context = context or AggregateContext.for_frame(df)
+        part_stats = context.per_part
+        demand = self.demand_matrix(df, part_stats.index)
+
+        levels = [policy.compute(part_stats) for policy in policies.values()]
+        reorder_point = np.stack([level['reorder_point'].to_numpy(dtype=np.float64) for level in levels])
+        order_up_to = np.stack([level['order_up_to'].to_numpy(dtype=np.float64) for level in levels])
+        lead_time = np.stack([policy.part_lead_times(part_stats.index) for policy in policies.values()])
+        result = self.simulate(demand, reorder_point, order_up_to, lead_time, order_up_to)
+
+        price = part_stats['price_mean'].to_numpy(dtype=np.float64)
+        n_days = demand.shape[0]
+        total_demand = demand.sum(dtype=np.int64)
+        holding_cost = (result['stock_days'] * price).sum(axis=1) * self.holding_cost_rate / 365
+        shortage_cost = (result['shortage_units'] * price).sum(axis=1) * self.shortage_cost_rate
+        return pd.DataFrame({
+            'policy': list(policies),
+            'service_level_percent': np.round((1 - result['shortage_days'].sum(axis=1) / demand.size) * 100, 1),
+            'fill_rate_percent': np.round((1 - result['shortage_units'].sum(axis=1) / total_demand) * 100, 1),
+            'avg_stock_units': np.round(result['stock_days'].sum(axis=1) / n_days, 1),
+            'orders_count': result['orders'].sum(axis=1).astype(np.int64),
+            'holding_cost_millions': np.round(holding_cost / 1e6, 2),
+            'shortage_cost_millions': np.round(shortage_cost / 1e6, 2),
+            'total_cost_millions': np.round((holding_cost + shortage_cost) / 1e6, 2)
+        }).set_index('policy')
+
+    def simulate(self, demand: np.ndarray, reorder_point: np.ndarray, order_up_to: np.ndarray,
+                 lead_time: np.ndarray, initial_stock: np.ndarray) -> Dict[str, np.ndarray]:
+        """Дневная симуляция (s, S) для матрицы спроса (дни × запчасти)
+
+        Уровни, сроки поставки и начальный запас — массивы (политики × запчасти).
+        Возвращает суммы за период по каждой паре (политика, запчасть).
+        """
+        shape = np.broadcast_shapes(reorder_point.shape, order_up_to.shape, lead_time.shape)
+        n_rows = int(np.prod(shape))
+        reorder_point = np.broadcast_to(reorder_point, shape).ravel()
+        order_up_to = np.broadcast_to(order_up_to, shape).ravel()
+        # Заказ, сделанный в день t, приходит в начале дня t + lead_time
+        lead_days = np.maximum(np.rint(np.broadcast_to(lead_time, shape).ravel()), 1).astype(np.int64)
+        n_slots = int(lead_days.max()) + 1
+        rows = np.arange(n_rows)
+
+        on_hand = np.broadcast_to(initial_stock, shape).astype(np.float64).ravel()
+        on_order = np.zeros(n_rows)
+        pipeline = np.zeros(n_slots * n_rows)
+        totals = {name: np.zeros(n_rows) for name in ('stock_days', 'shortage_units', 'shortage_days', 'orders')}
+
+        for t, day_demand in enumerate(np.asarray(demand, dtype=np.float64)):
+            slot = (t % n_slots) * n_rows
+            arrivals = pipeline[slot:slot + n_rows]
+            on_hand += arrivals
+            on_order -= arrivals
+            arrivals[:] = 0
+
+            day_demand = np.broadcast_to(day_demand, shape).ravel()
+            shortage = np.maximum(day_demand - on_hand, 0)
+            on_hand -= day_demand - shortage
+            totals['shortage_units'] += shortage
+            totals['shortage_days'] += shortage > 0
+            totals['stock_days'] += on_hand
+
+            position = on_hand + on_order
+            order = np.where(position <= reorder_point, np.maximum(order_up_to - position, 0), 0)
+            pipeline[((t + lead_days) % n_slots) * n_rows + rows] += order
+            on_order += order
+            totals['orders'] += order > 0
+
+        return {name: values.reshape(shape) for name, values in totals.items()}
+
+    @staticmethod
+    def demand_matrix(df: pd.DataFrame, part_names: pd.Index) -> np.ndarray:
+        """Спрос в виде матрицы дни × запчасти; дни без записей считаются днями без спроса
+
+        Повторяющиеся записи одной запчасти за день суммируются.
+        """
+        days = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+        first_day = days.min()
+        columns = part_names.get_indexer(np.asarray(df['part_name']))
+        matrix = np.zeros((days.max() - first_day + 1, len(part_names)), dtype=np.int64)
+        np.add.at(matrix, (days - first_day, columns), df['demand'].to_numpy())
+        return matrix
@@ -1,21 +1,25 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, Tuple
+from src.analysis.aggregates import AggregateContext
+from src.analysis.stock_policy import StockPolicy, BufferStockPolicy, ReorderPointPolicy
 
 class BusinessAnalyzer:
-    def __init__(self):
-        pass
+    def __init__(self, stock_policy: StockPolicy = None):
+        self.stock_policy = stock_policy or BufferStockPolicy()
     
-    def analyze_business_metrics(self, df: pd.DataFrame) -> Dict:
+    def analyze_business_metrics(self, df: pd.DataFrame, context: AggregateContext = None) -> Dict:
         """Анализ бизнес-метрик"""
+        context = context or AggregateContext.for_frame(df)
+
         # ABC анализ
-        revenue_analysis = self._perform_abc_analysis(df)
+        revenue_analysis = self._perform_abc_analysis(context)
         
         # Анализ проблем с поставками
-        supply_issues, service_level = self._analyze_supply_issues(df)
+        supply_issues, service_level = self._analyze_supply_issues(context)
         
         # Анализ аномалий
-        anomalies_count = self._count_anomalies(df)
+        anomalies_count = self._count_anomalies(context)
         
         return {
             'revenue_analysis': revenue_analysis,
@@ -24,12 +28,11 @@ class BusinessAnalyzer:
             'anomalies_count': anomalies_count
         }
     
-    def _perform_abc_analysis(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _perform_abc_analysis(self, context: AggregateContext) -> pd.DataFrame:
         """Проведение ABC анализа"""
-        revenue_analysis = df.groupby('part_name').agg({
-            'demand': 'sum',
-            'price': 'mean'
-        }).reset_index()
+        revenue_analysis = context.per_part[['demand_sum', 'price_mean']].rename(
+            columns={'demand_sum': 'demand', 'price_mean': 'price'}
+        ).reset_index()
         
         revenue_analysis['revenue'] = revenue_analysis['demand'] * revenue_analysis['price']
         revenue_analysis['revenue_share'] = revenue_analysis['revenue'] / revenue_analysis['revenue'].sum()
@@ -43,64 +46,81 @@ class BusinessAnalyzer:
         
         return revenue_analysis
     
-    def _analyze_supply_issues(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
+    def _analyze_supply_issues(self, context: AggregateContext) -> Tuple[pd.DataFrame, float]:
         """Анализ проблем с поставками"""
-        supply_issues = df[df['demand'] > df['stock']]
-        service_level = 1 - (len(supply_issues) / len(df))
+        supply_issues = context.shortage_rows
+        totals = context.totals
+        service_level = 1 - (totals['shortage_count'] / totals['n_rows'])
         return supply_issues, service_level
     
-    def _count_anomalies(self, df: pd.DataFrame) -> int:
+    def _count_anomalies(self, context: AggregateContext) -> int:
         """Подсчет аномалий"""
-        anomalies = df[df['is_anomaly'] == True]
-        return len(anomalies)
-    
-    def generate_recommendations(self, df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
-        """Генерация рекомендаций для бизнеса"""
-        recommendations = []
-        
-        for _, part in revenue_df.iterrows():
-            part_data = df[df['part_name'] == part['part_name']]
-            avg_demand = part_data['demand'].mean()
-            current_stock = part_data['stock'].iloc[-1]
-            
-            # Рассчет оптимального запаса
-            optimal_stock = self._calculate_optimal_stock(avg_demand)
-            stock_status = self._evaluate_stock_status(current_stock, optimal_stock)
-            
-            priority, action = self._get_priority_and_action(part['abc_category'], stock_status)
-            
-            recommendations.append({
-                'Запчасть': part['part_name'],
-                'ABC Категория': part['abc_category'],
-                'Приоритет': priority,
-                'Текущий запас': current_stock,
-                'Рекомендуемый запас': int(optimal_stock),
-                'Статус': stock_status,
-                'Действие': action
-            })
-        
-        return pd.DataFrame(recommendations)
+        return context.totals['anomalies_count']
     
-    def _calculate_optimal_stock(self, avg_demand: float) -> float:
-        """Рассчет оптимального запаса"""
-        lead_time_demand = avg_demand * 7  # недельный спрос
-        safety_stock = avg_demand * 1.5    # буферный запас
-        return lead_time_demand + safety_stock
+    def generate_recommendations(self, df: pd.DataFrame, revenue_df: pd.DataFrame,
+                                 context: AggregateContext = None, forecast: pd.DataFrame = None) -> pd.DataFrame:
+        """Генерация рекомендаций для бизнеса
+
+        Если передан прогноз (date, part_name, demand_forecast), запас
+        рассчитывается по прогнозному среднему спросу вместо исторического.
+        """
+        context = context or AggregateContext.for_frame(df)
+        part_stats = self._part_demand_stats(context, forecast).reindex(revenue_df['part_name'])
+        current_stock = part_stats['stock_last'].to_numpy()
+        abc_category = revenue_df['abc_category'].to_numpy()
+
+        # Рассчет оптимального запаса по политике запасов
+        levels = self.stock_policy.compute(part_stats)
+        optimal_stock = levels['order_up_to'].to_numpy()
+        stock_status = self._evaluate_stock_status(current_stock, levels['reorder_point'].to_numpy())
+
+        priority, action = self._get_priority_and_action(abc_category, stock_status)
+
+        recommendations = pd.DataFrame({
+            'Запчасть': revenue_df['part_name'].to_numpy(),
+            'ABC Категория': abc_category,
+            'Приоритет': priority,
+            'Текущий запас': current_stock,
+            'Рекомендуемый запас': optimal_stock.astype(np.int64),
+            'Статус': stock_status,
+            'Действие': action
+        })
+        # Отдельная точка заказа есть только у политики (s, S), у остальных она выводится из целевого запаса
+        if isinstance(self.stock_policy, ReorderPointPolicy):
+            recommendations['Точка заказа'] = levels['reorder_point'].to_numpy()
+        return recommendations
+
+    def evaluate_stock_scenarios(self, df: pd.DataFrame, service_levels: list = None,
+                                 lead_times: list = None) -> pd.DataFrame:
+        """Сценарии what-if: целевые уровни запаса для всех сочетаний уровня сервиса и срока поставки"""
+        context = AggregateContext.for_frame(df)
+        scenarios = self.stock_policy.evaluate_scenarios(self._part_demand_stats(context), service_levels, lead_times)
+        return scenarios.groupby(['service_level', 'lead_time'], dropna=False).agg(
+            total_reorder_point=('reorder_point', 'sum'),
+            total_order_up_to=('order_up_to', 'sum')
+        ).reset_index()
+
+    def _part_demand_stats(self, context: AggregateContext, forecast: pd.DataFrame = None) -> pd.DataFrame:
+        """Средний спрос, его разброс и последний запас по запчастям"""
+        part_stats = context.per_part[['avg_demand', 'demand_std', 'stock_last']]
+        if forecast is None:
+            return part_stats
+        forecast_mean = forecast.groupby('part_name')['demand_forecast'].mean().reindex(part_stats.index)
+        return part_stats.assign(avg_demand=forecast_mean.fillna(part_stats['avg_demand']))
     
-    def _evaluate_stock_status(self, current_stock: int, optimal_stock: float) -> str:
+    def _evaluate_stock_status(self, current_stock: np.ndarray, reorder_point: np.ndarray) -> np.ndarray:
         """Оценка статуса запаса"""
-        return 'Оптимальный' if current_stock >= optimal_stock * 0.8 else 'Недостаточный'
+        return np.where(current_stock >= reorder_point, 'Оптимальный', 'Недостаточный')
     
-    def _get_priority_and_action(self, abc_category: str, stock_status: str) -> Tuple[str, str]:
+    def _get_priority_and_action(self, abc_category: np.ndarray, stock_status: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """Определение приоритета и действия"""
-        if abc_category == 'A':
-            priority = 'Высокий'
-            action = 'Увеличить страховой запас' if stock_status == 'Недостаточный' else 'Поддерживать текущий уровень'
-        elif abc_category == 'B':
-            priority = 'Средний'
-            action = 'Оптимизировать запас' if stock_status == 'Недостаточный' else 'Мониторить'
-        else:
-            priority = 'Низкий'
-            action = 'Минимизировать запас'
+        is_a, is_b = abc_category == 'A', abc_category == 'B'
+        deficit = stock_status == 'Недостаточный'
+        priority = np.select([is_a, is_b], ['Высокий', 'Средний'], 'Низкий')
+        action = np.select(
+            [is_a & deficit, is_a, is_b & deficit, is_b],
+            ['Увеличить страховой запас', 'Поддерживать текущий уровень', 'Оптимизировать запас', 'Мониторить'],
+            'Минимизировать запас'
+        )
         
         return priority, action
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, Tuple
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from src.analysis.aggregates import AggregateContext, StreamingAggregates
 
 class MetricsCalculator:
     def __init__(self):
@@ -10,34 +10,21 @@ class MetricsCalculator:
     def calculate_ml_metrics(self, y_true: np.ndarray, y_pred: np.ndarray, 
                            baseline_mae: float = None) -> Dict:
         """Расчет метрик ML модели"""
-        mae = mean_absolute_error(y_true, y_pred)
-        mse = mean_squared_error(y_true, y_pred)
-        rmse = np.sqrt(mse)
-        mape = np.mean(np.abs((y_true - y_pred) / (y_true + 1e-8))) * 100
-        
-        # Процент улучшения относительно baseline
-        improvement = None
-        if baseline_mae:
-            improvement = ((baseline_mae - mae) / baseline_mae) * 100
-        
-        return {
-            'MAE': round(mae, 3),
-            'RMSE': round(rmse, 3),
-            'MAPE': round(mape, 1),
-            'R2_score': round(r2_score(y_true, y_pred), 3),
-            'Improvement_vs_baseline': round(improvement, 1) if improvement else None
-        }
+        return RegressionMetricsAccumulator().update(y_true, y_pred).finalize(baseline_mae)
     
-    def calculate_business_metrics(self, df: pd.DataFrame, recommendations: pd.DataFrame) -> Dict:
+    def calculate_business_metrics(self, df: pd.DataFrame, recommendations: pd.DataFrame,
+                                   context: AggregateContext = None) -> Dict:
         """Расчет бизнес-метрик"""
+        context = context or AggregateContext.for_frame(df)
+
         # Метрики запасов
-        inventory_metrics = self._calculate_inventory_metrics(df, recommendations)
+        inventory_metrics = self._calculate_inventory_metrics(context, recommendations)
         
         # Финансовые метрики
-        financial_metrics = self._calculate_financial_metrics(df, recommendations)
+        financial_metrics = self._calculate_financial_metrics(context, recommendations)
         
         # Метрики сервиса
-        service_metrics = self._calculate_service_metrics(df)
+        service_metrics = self._calculate_service_metrics(context)
         
         return {
             **inventory_metrics,
@@ -45,9 +32,10 @@ class MetricsCalculator:
             **service_metrics
         }
     
-    def _calculate_inventory_metrics(self, df: pd.DataFrame, recommendations: pd.DataFrame) -> Dict:
+    def _calculate_inventory_metrics(self, context: AggregateContext, recommendations: pd.DataFrame) -> Dict:
         """Метрики управления запасами"""
-        total_current_stock = df.groupby('part_name')['stock'].last().sum()
+        totals = context.totals
+        total_current_stock = context.per_part['stock_last'].sum()
         total_recommended_stock = recommendations['Рекомендуемый запас'].sum()
         
         # Дефицитные и избыточные позиции
@@ -56,8 +44,8 @@ class MetricsCalculator:
                                          recommendations['Текущий запас'] * 0.7])
         
         # Оборачиваемость запасов (примерная)
-        avg_daily_demand = df['demand'].mean()
-        avg_stock = df['stock'].mean()
+        avg_daily_demand = totals['demand_sum'] / totals['n_rows']
+        avg_stock = totals['stock_sum'] / totals['n_rows']
         turnover_ratio = avg_daily_demand / avg_stock if avg_stock > 0 else 0
         
         return {
@@ -70,19 +58,19 @@ class MetricsCalculator:
             'avg_days_of_supply': round(avg_stock / avg_daily_demand, 1) if avg_daily_demand > 0 else 0
         }
     
-    def _calculate_financial_metrics(self, df: pd.DataFrame, recommendations: pd.DataFrame) -> Dict:
+    def _calculate_financial_metrics(self, context: AggregateContext, recommendations: pd.DataFrame) -> Dict:
         """Финансовые метрики"""
-        total_revenue = (df['demand'] * df['price']).sum()
-        avg_price = df['price'].mean()
+        totals = context.totals
+        total_revenue = totals['revenue']
+        avg_price = totals['price_sum'] / totals['n_rows']
         
         # Оценка экономии (примерная)
-        current_stock_value = df.groupby('part_name')['stock'].last().sum() * avg_price
+        current_stock_value = context.per_part['stock_last'].sum() * avg_price
         recommended_stock_value = recommendations['Рекомендуемый запас'].sum() * avg_price
         potential_savings = current_stock_value - recommended_stock_value
         
         # Стоимость дефицита
-        shortage_events = df[df['demand'] > df['stock']]
-        shortage_cost = (shortage_events['demand'] - shortage_events['stock']).sum() * avg_price * 0.1
+        shortage_cost = totals['shortage_units'] * avg_price * 0.1
         
         return {
             'total_revenue_millions': round(total_revenue / 1e6, 2),
@@ -93,16 +81,16 @@ class MetricsCalculator:
             'shortage_cost_millions': round(shortage_cost / 1e6, 2)
         }
     
-    def _calculate_service_metrics(self, df: pd.DataFrame) -> Dict:
+    def _calculate_service_metrics(self, context: AggregateContext) -> Dict:
         """Метрики уровня сервиса"""
-        total_orders = len(df)
-        shortage_events = len(df[df['demand'] > df['stock']])
+        totals = context.totals
+        total_orders = totals['n_rows']
+        shortage_events = totals['shortage_count']
         service_level = (1 - shortage_events / total_orders) * 100
         
-        # Fill Rate (более точная метрика)
-        total_demand = df['demand'].sum()
-        fulfilled_demand = df[df['demand'] <= df['stock']]['demand'].sum() + \
-                          df[df['demand'] > df['stock']]['stock'].sum()
+        # Fill Rate (более точная метрика): при дефиците выдается весь запас
+        total_demand = totals['demand_sum']
+        fulfilled_demand = total_demand - totals['shortage_units']
         fill_rate = (fulfilled_demand / total_demand) * 100
         
         return {
@@ -111,3 +99,95 @@ class MetricsCalculator:
             'shortage_events_count': shortage_events,
             'total_orders_count': total_orders
         }
+
+
+class RegressionMetricsAccumulator:
+    """Накопитель MAE, RMSE, MAPE и R² по блокам прогнозов
+
+    Хранит только суммы ошибок и моменты y_true, поэтому память не зависит
+    от числа строк. Накопители разных процессов объединяются через merge().
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.abs_error_sum = 0.0
+        self.sq_error_sum = 0.0
+        self.ape_sum = 0.0
+        # Среднее и сумма квадратов отклонений y_true (для R²)
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> 'RegressionMetricsAccumulator':
+        """Добавление блока фактических значений и прогнозов"""
+        y_true = np.asarray(y_true, dtype=np.float64)
+        error = y_true - np.asarray(y_pred, dtype=np.float64)
+        partial = RegressionMetricsAccumulator()
+        partial.n = len(y_true)
+        if partial.n:
+            partial.abs_error_sum = np.abs(error).sum()
+            partial.sq_error_sum = (error * error).sum()
+            partial.ape_sum = np.abs(error / (y_true + 1e-8)).sum()
+            partial.y_mean = y_true.mean()
+            partial.y_m2 = ((y_true - partial.y_mean) ** 2).sum()
+        return self.merge(partial)
+
+    def merge(self, other: 'RegressionMetricsAccumulator') -> 'RegressionMetricsAccumulator':
+        """Объединение с накопителем другого блока"""
+        n = self.n + other.n
+        if other.n:
+            delta = other.y_mean - self.y_mean
+            self.y_m2 += other.y_m2 + delta * delta * self.n * other.n / n
+            self.y_mean += delta * other.n / n
+        self.n = n
+        self.abs_error_sum += other.abs_error_sum
+        self.sq_error_sum += other.sq_error_sum
+        self.ape_sum += other.ape_sum
+        return self
+
+    def finalize(self, baseline_mae: float = None) -> Dict:
+        """Метрики в формате calculate_ml_metrics"""
+        mae = self.abs_error_sum / self.n
+        rmse = np.sqrt(self.sq_error_sum / self.n)
+        mape = self.ape_sum / self.n * 100
+        if self.y_m2 > 0:
+            r2 = 1 - self.sq_error_sum / self.y_m2
+        else:
+            r2 = 1.0 if self.sq_error_sum == 0 else 0.0
+
+        # Процент улучшения относительно baseline
+        improvement = None
+        if baseline_mae:
+            improvement = ((baseline_mae - mae) / baseline_mae) * 100
+
+        return {
+            'MAE': round(mae, 3),
+            'RMSE': round(rmse, 3),
+            'MAPE': round(mape, 1),
+            'R2_score': round(r2, 3),
+            'Improvement_vs_baseline': round(improvement, 1) if improvement else None
+        }
+
+
+class BusinessMetricsAccumulator:
+    """Накопитель бизнес-метрик (запасы, финансы, сервис) по блокам таблицы
+
+    Строится на частичных агрегатах StreamingAggregates: суммы, счетчики и
+    последние значения по запчастям. Строки с дефицитом не сохраняются.
+    """
+
+    def __init__(self):
+        self.aggregates = StreamingAggregates(max_shortage_rows=0)
+
+    def update(self, chunk: pd.DataFrame) -> 'BusinessMetricsAccumulator':
+        """Добавление блока строк (блоки одной запчасти — в порядке дат)"""
+        self.aggregates.update(chunk)
+        return self
+
+    def merge(self, other: 'BusinessMetricsAccumulator') -> 'BusinessMetricsAccumulator':
+        """Объединение с накопителем другого шарда или более позднего периода"""
+        self.aggregates.merge(other.aggregates)
+        return self
+
+    def finalize(self, recommendations: pd.DataFrame) -> Dict:
+        """Метрики в формате calculate_business_metrics"""
+        return MetricsCalculator().calculate_business_metrics(None, recommendations, self.aggregates)
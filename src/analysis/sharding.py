@@ -0,0 +1,57 @@
+import os
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+from src.analysis.aggregates import StreamingAggregates
+from src.features.engineer import FeatureEngineer
+
+
+class ShardedAnalyzer:
+    """Параллельный расчет признаков и агрегатов по запчастям
+
+    Таблица делится на шарды по part_name, каждый шард обрабатывается в
+    отдельном процессе: признаки и частичные агрегаты запчастей независимы
+    между шардами. Результаты объединяются в те же глобальные выходы, что и
+    при расчете в одном процессе; ABC-анализ и рекомендации затем считаются
+    по объединенным агрегатам с общей сортировкой по выручке.
+    """
+
+    def __init__(self, feature_engineer: FeatureEngineer = None, n_workers: int = None, n_shards: int = None):
+        self.feature_engineer = feature_engineer or FeatureEngineer()
+        self.n_workers = n_workers or os.cpu_count() or 1
+        # Шардов больше, чем процессов, чтобы выровнять нагрузку при разном числе строк у запчастей
+        self.n_shards = n_shards or self.n_workers * 4
+
+    def run(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, StreamingAggregates]:
+        """Признаки в порядке строк исходной таблицы и объединенные агрегаты"""
+        # В шардах строки индексируются позициями в исходной таблице: по ним восстанавливается порядок
+        shards = self.split(df.set_axis(pd.RangeIndex(len(df))))
+        if self.n_workers > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_workers, len(shards))) as pool:
+                results = list(pool.map(_analyze_shard, shards, [self.feature_engineer] * len(shards)))
+        else:
+            results = [_analyze_shard(shard, self.feature_engineer) for shard in shards]
+
+        aggregates = StreamingAggregates(max_shortage_rows=None)
+        for _, partial in results:
+            aggregates.merge(partial)
+        aggregates.restore_row_order(df.index)
+        df_processed = pd.concat([features for features, _ in results]).sort_index(kind='stable')
+        df_processed.index = df.index[df_processed.index.to_numpy()]
+        if self.feature_engineer.compact:
+            df_processed['part_name'] = df_processed['part_name'].astype(df['part_name'].astype('category').dtype)
+        return df_processed, aggregates
+
+    def split(self, df: pd.DataFrame) -> List[pd.DataFrame]:
+        """Разбиение строк на шарды по запчастям с сохранением порядка строк"""
+        part_codes, _ = pd.factorize(df['part_name'], sort=True)
+        shard_ids = part_codes % self.n_shards
+        order = np.argsort(shard_ids, kind='stable')
+        bounds = np.flatnonzero(np.r_[True, np.diff(shard_ids[order]) != 0, True])
+        return [df.iloc[order[start:end]] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _analyze_shard(shard: pd.DataFrame, feature_engineer: FeatureEngineer) -> Tuple[pd.DataFrame, StreamingAggregates]:
+    """Признаки и частичные агрегаты одного шарда"""
+    return feature_engineer.create_features(shard), StreamingAggregates(max_shortage_rows=None).update(shard)
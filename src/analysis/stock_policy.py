@@ -0,0 +1,138 @@
+import pandas as pd
+import numpy as np
+from abc import ABC, abstractmethod
+from statistics import NormalDist
+from typing import Dict, Iterable, Tuple
+
+
+class StockPolicy(ABC):
+    """Базовая политика запасов
+
+    По статистикам спроса запчастей (avg_demand, demand_std) считает точку
+    заказа и целевой уровень запаса. Срок поставки задается общим значением
+    lead_time или по запчастям через lead_times.
+    """
+
+    # Зависят ли уровни запаса от уровня сервиса
+    uses_service_level = True
+
+    def __init__(self, lead_time: float = 7, lead_times: Dict[str, float] = None, service_level: float = 0.95):
+        _check_service_levels([service_level])
+        self.lead_time = lead_time
+        self.lead_times = lead_times or {}
+        self.service_level = service_level
+
+    def compute(self, part_stats: pd.DataFrame) -> pd.DataFrame:
+        """Точка заказа и целевой запас по каждой запчасти (индекс — part_name)"""
+        reorder_point, order_up_to = self._levels(
+            part_stats['avg_demand'].to_numpy(dtype=np.float64),
+            part_stats['demand_std'].fillna(0).to_numpy(dtype=np.float64),
+            self.part_lead_times(part_stats.index),
+            _z_scores([self.service_level])[0]
+        )
+        return pd.DataFrame({'reorder_point': reorder_point, 'order_up_to': order_up_to}, index=part_stats.index)
+
+    def evaluate_scenarios(self, part_stats: pd.DataFrame, service_levels: Iterable[float] = None,
+                           lead_times: Iterable[float] = None) -> pd.DataFrame:
+        """Расчет уровней для всех сценариев (уровень сервиса × срок поставки) одним векторным проходом
+
+        Если lead_times не заданы, используются сроки поставки запчастей. Для политик,
+        не зависящих от уровня сервиса, сценарии по нему схлопываются в один с service_level = NaN.
+        """
+        if service_levels is None:
+            service_levels = [self.service_level]
+        service_levels = np.asarray(list(service_levels), dtype=np.float64)
+        if not self.uses_service_level:
+            service_levels = np.full(1, np.nan)
+        avg_demand = part_stats['avg_demand'].to_numpy(dtype=np.float64)
+        demand_std = part_stats['demand_std'].fillna(0).to_numpy(dtype=np.float64)
+        n_parts = len(part_stats)
+
+        if lead_times is None:
+            lead_time_grid = self.part_lead_times(part_stats.index)[None, None, :]
+            lead_time_labels = np.full(1, np.nan)
+        else:
+            lead_time_labels = np.asarray(list(lead_times), dtype=np.float64)
+            lead_time_grid = lead_time_labels[None, :, None]
+
+        # Оси: (уровень сервиса, срок поставки, запчасть)
+        z = _z_scores(service_levels)[:, None, None] if self.uses_service_level else np.zeros((1, 1, 1))
+        reorder_point, order_up_to = self._levels(avg_demand[None, None, :], demand_std[None, None, :],
+                                                  lead_time_grid, z)
+        shape = (len(service_levels), len(lead_time_labels), n_parts)
+        reorder_point = np.broadcast_to(reorder_point, shape)
+        order_up_to = np.broadcast_to(order_up_to, shape)
+
+        return pd.DataFrame({
+            'service_level': np.repeat(service_levels, len(lead_time_labels) * n_parts),
+            'lead_time': np.tile(np.repeat(lead_time_labels, n_parts), len(service_levels)),
+            'part_name': np.tile(part_stats.index.to_numpy(), len(service_levels) * len(lead_time_labels)),
+            'reorder_point': reorder_point.ravel(),
+            'order_up_to': order_up_to.ravel()
+        })
+
+    def part_lead_times(self, part_names: Iterable[str]) -> np.ndarray:
+        """Срок поставки каждой запчасти, дней"""
+        return np.array([self.lead_times.get(name, self.lead_time) for name in part_names], dtype=np.float64)
+
+    @abstractmethod
+    def _levels(self, avg_demand: np.ndarray, demand_std: np.ndarray, lead_time: np.ndarray,
+                z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Точка заказа и целевой запас; z — z-оценка уровня сервиса"""
+
+
+class BufferStockPolicy(StockPolicy):
+    """Спрос за срок поставки плюс буфер в днях среднего спроса (исходная логика)
+
+    Запас считается недостаточным ниже status_threshold от целевого уровня.
+    Уровень сервиса не используется: буфер задается в днях, а не через z·σ.
+    """
+
+    uses_service_level = False
+
+    def __init__(self, lead_time: float = 7, lead_times: Dict[str, float] = None,
+                 buffer_days: float = 1.5, status_threshold: float = 0.8):
+        super().__init__(lead_time, lead_times)
+        self.buffer_days = buffer_days
+        self.status_threshold = status_threshold
+
+    def _levels(self, avg_demand, demand_std, lead_time, z):
+        lead_time_demand = avg_demand * lead_time
+        safety_stock = avg_demand * self.buffer_days
+        order_up_to = lead_time_demand + safety_stock
+        return order_up_to * self.status_threshold, order_up_to
+
+
+class ServiceLevelPolicy(StockPolicy):
+    """Базовый запас под целевой уровень сервиса: μ·L + z·σ·√L"""
+
+    def _levels(self, avg_demand, demand_std, lead_time, z):
+        base_stock = avg_demand * lead_time + z * demand_std * np.sqrt(lead_time)
+        return base_stock, base_stock
+
+
+class ReorderPointPolicy(StockPolicy):
+    """Политика (s, S): заказ при падении ниже s = μ·L + z·σ·√L до уровня S = s + μ·review_period"""
+
+    def __init__(self, lead_time: float = 7, lead_times: Dict[str, float] = None, service_level: float = 0.95,
+                 review_period: float = 7):
+        super().__init__(lead_time, lead_times, service_level)
+        self.review_period = review_period
+
+    def _levels(self, avg_demand, demand_std, lead_time, z):
+        reorder_point = avg_demand * lead_time + z * demand_std * np.sqrt(lead_time)
+        return reorder_point, reorder_point + avg_demand * self.review_period
+
+
+def _z_scores(service_levels: Iterable[float]) -> np.ndarray:
+    """z-оценки нормального распределения для уровней сервиса"""
+    _check_service_levels(service_levels)
+    normal = NormalDist()
+    return np.array([normal.inv_cdf(level) for level in service_levels], dtype=np.float64)
+
+
+def _check_service_levels(service_levels: Iterable[float]):
+    """Уровень сервиса — вероятность строго между 0 и 1, иначе z-оценка бесконечна"""
+    for level in service_levels:
+        if not 0 < level < 1:
+            raise ValueError(f"Уровень сервиса должен быть в интервале (0, 1): {level}")
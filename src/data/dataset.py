@@ -0,0 +1,224 @@
+import argparse
+import hashlib
+import json
+import os
+import uuid
+import zlib
+import pandas as pd
+import numpy as np
+from typing import Iterable, Iterator, List
+
+META_FILE = 'meta.json'
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+# Колонки и их типы на диске: дата — дни от 1970-01-01, запчасть — код в каталоге
+COLUMN_DTYPES = {
+    'date': np.int32,
+    'part': np.int32,
+    'demand': np.int32,
+    'stock': np.int32,
+    'price': np.int32,
+    'is_anomaly': np.bool_
+}
+
+# Необязательные колонки и значение для сегментов, где их нет (в реальной истории нет флага генератора)
+OPTIONAL_COLUMNS = {'is_anomaly': False}
+
+
+class DatasetStore:
+    """Колоночное хранилище истории спроса, запасов и цен
+
+    Данные разбиты на партиции bucket=<NN>/year=<YYYY> (корзина по хэшу
+    названия запчасти и год), каждая запись добавляет в партицию новый
+    сегмент из .npy-файлов по колонкам. Чтение открывает файлы через mmap и
+    затрагивает только партиции и колонки, нужные запросу.
+    """
+
+    def __init__(self, root: str, n_buckets: int = 16):
+        self.root = root
+        meta_path = os.path.join(root, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.n_buckets = meta['n_buckets']
+            self.parts = meta['parts']
+            self.date_range = meta.get('date_range')
+        else:
+            self.n_buckets = n_buckets
+            self.parts = []
+            self.date_range = None
+        self.part_codes = {name: code for code, name in enumerate(self.parts)}
+
+    def write(self, df: pd.DataFrame):
+        """Добавление записей (date, part_name, demand, stock, price[, is_anomaly])"""
+        self._register_parts(pd.unique(df['part_name']))
+        days = (pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]') - EPOCH).astype(np.int32)
+        codes = df['part_name'].map(self.part_codes).to_numpy(dtype=np.int32)
+        columns = {'date': days, 'part': codes}
+        if len(days):
+            bounds = [int(days.min()), int(days.max())]
+            if self.date_range:
+                bounds = [min(bounds[0], self.date_range[0]), max(bounds[1], self.date_range[1])]
+            self.date_range = bounds
+        for name in ('demand', 'stock', 'price', 'is_anomaly'):
+            if name in df:
+                columns[name] = df[name].to_numpy().astype(COLUMN_DTYPES[name])
+
+        buckets = self._buckets()[codes]
+        years = days.astype('datetime64[D]').astype('datetime64[Y]').astype(int) + 1970
+        partition_keys = buckets.astype(np.int64) * 10000 + years
+        order = np.lexsort((codes, days, partition_keys))
+        sorted_keys = partition_keys[order]
+        bounds = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1], True])
+
+        segment = uuid.uuid4().hex[:12]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            key = sorted_keys[start]
+            path = os.path.join(self.root, self._partition_name(key // 10000, key % 10000), segment)
+            os.makedirs(path)
+            rows = order[start:end]
+            for name, values in columns.items():
+                np.save(os.path.join(path, f'{name}.npy'), values[rows])
+        self._save_meta()
+
+    def read(self, columns: Iterable[str] = None, start_date: str = None, end_date: str = None,
+             parts: Iterable[str] = None) -> pd.DataFrame:
+        """Чтение с проекцией колонок и фильтрами по датам и запчастям
+
+        Строки упорядочены по дате, а внутри даты — по порядку запчастей в каталоге.
+        Необязательные колонки, которых нет в сегменте, заполняются значением по умолчанию.
+        """
+        columns = list(columns) if columns is not None else ['demand', 'stock', 'price', 'is_anomaly']
+        start = self._to_days(start_date) if start_date is not None else None
+        end = self._to_days(end_date) if end_date is not None else None
+        part_filter = None
+        if parts is not None:
+            part_filter = np.array([self.part_codes[p] for p in parts if p in self.part_codes], dtype=np.int32)
+
+        pieces = {name: [] for name in ['date', 'part'] + columns}
+        for segment_path in self._segments(start, end, part_filter):
+            dates = np.load(os.path.join(segment_path, 'date.npy'), mmap_mode='r')
+            lo = 0 if start is None else np.searchsorted(dates, start, side='left')
+            hi = len(dates) if end is None else np.searchsorted(dates, end, side='right')
+            if lo >= hi:
+                continue
+            codes = np.load(os.path.join(segment_path, 'part.npy'), mmap_mode='r')[lo:hi]
+            mask = np.isin(codes, part_filter) if part_filter is not None else slice(None)
+            pieces['date'].append(np.asarray(dates[lo:hi])[mask])
+            pieces['part'].append(np.asarray(codes)[mask])
+            for name in columns:
+                file_path = os.path.join(segment_path, f'{name}.npy')
+                if name in OPTIONAL_COLUMNS and not os.path.exists(file_path):
+                    values = np.full(hi - lo, OPTIONAL_COLUMNS[name], dtype=COLUMN_DTYPES[name])
+                else:
+                    values = np.load(file_path, mmap_mode='r')[lo:hi]
+                pieces[name].append(np.asarray(values)[mask])
+
+        data = {name: (np.concatenate(values) if values else np.array([], dtype=COLUMN_DTYPES[name]))
+                for name, values in pieces.items()}
+        order = np.lexsort((data['part'], data['date']))
+
+        # Категории отсортированы по названию, как при группировке строковой колонки
+        sorted_names = sorted(self.parts)
+        remap = pd.Index(sorted_names).get_indexer(self.parts).astype(np.int32)
+        result = {
+            'date': (data['date'][order] + EPOCH).astype('datetime64[ns]'),
+            'part_name': pd.Categorical.from_codes(remap[data['part'][order]], categories=sorted_names)
+        }
+        for name in columns:
+            result[name] = data[name][order]
+        return pd.DataFrame(result)
+
+    def iter_chunks(self, chunk_days: int = 31, columns: Iterable[str] = None,
+                    parts: Iterable[str] = None) -> Iterator[pd.DataFrame]:
+        """Последовательное чтение истории блоками по chunk_days дней"""
+        if not self.date_range:
+            return
+        for start in range(self.date_range[0], self.date_range[1] + 1, chunk_days):
+            end = min(start + chunk_days - 1, self.date_range[1])
+            chunk = self.read(columns, EPOCH + start, EPOCH + end, parts)
+            if len(chunk):
+                yield chunk
+
+    def version(self) -> str:
+        """Хэш содержимого хранилища: каталог, диапазон дат, сегменты и их размеры
+
+        Сегменты только добавляются, поэтому любая запись меняет версию.
+        """
+        digest = hashlib.sha1()
+        digest.update(json.dumps([self.n_buckets, self.parts, self.date_range], ensure_ascii=False).encode())
+        for path in self._segments(None, None, None):
+            size = os.path.getsize(os.path.join(path, 'date.npy'))
+            digest.update(f'{os.path.relpath(path, self.root)}:{size}'.encode())
+        return digest.hexdigest()
+
+    def _segments(self, start: int, end: int, part_filter: np.ndarray) -> List[str]:
+        """Сегменты партиций, пересекающихся с фильтрами"""
+        if not os.path.isdir(self.root):
+            return []
+        buckets = None
+        if part_filter is not None:
+            buckets = set(self._buckets()[part_filter].tolist())
+        first_year = None if start is None else self._year(start)
+        last_year = None if end is None else self._year(end)
+
+        paths = []
+        for bucket_dir in sorted(os.listdir(self.root)):
+            if not bucket_dir.startswith('bucket='):
+                continue
+            if buckets is not None and int(bucket_dir.split('=')[1]) not in buckets:
+                continue
+            for year_dir in sorted(os.listdir(os.path.join(self.root, bucket_dir))):
+                year = int(year_dir.split('=')[1])
+                if (first_year is not None and year < first_year) or (last_year is not None and year > last_year):
+                    continue
+                partition = os.path.join(self.root, bucket_dir, year_dir)
+                paths += [os.path.join(partition, segment) for segment in sorted(os.listdir(partition))]
+        return paths
+
+    def _register_parts(self, names: Iterable[str]):
+        for name in names:
+            if name not in self.part_codes:
+                self.part_codes[name] = len(self.parts)
+                self.parts.append(name)
+
+    def _buckets(self) -> np.ndarray:
+        """Корзина каждой запчасти по коду"""
+        return np.array([zlib.crc32(name.encode('utf-8')) % self.n_buckets for name in self.parts], dtype=np.int32)
+
+    def _save_meta(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, META_FILE), 'w') as f:
+            json.dump({'n_buckets': self.n_buckets, 'parts': self.parts, 'date_range': self.date_range}, f,
+                      ensure_ascii=False)
+
+    @staticmethod
+    def _partition_name(bucket: int, year: int) -> str:
+        return os.path.join(f'bucket={bucket:02d}', f'year={year}')
+
+    @staticmethod
+    def _to_days(value) -> int:
+        return int((np.datetime64(pd.Timestamp(value).date(), 'D') - EPOCH).astype(int))
+
+    @staticmethod
+    def _year(days: int) -> int:
+        return int(np.datetime64(days, 'D').astype('datetime64[Y]').astype(int)) + 1970
+
+
+if __name__ == '__main__':
+    from src.data.generator import DataGenerator
+
+    parser = argparse.ArgumentParser(description='Запись сгенерированной истории в хранилище')
+    parser.add_argument('root', help='каталог хранилища')
+    parser.add_argument('--parts', type=int, default=None, help='число запчастей в каталоге')
+    parser.add_argument('--start', default='2022-01-01')
+    parser.add_argument('--end', default='2024-01-01')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    store = DatasetStore(args.root)
+    n_rows = 0
+    for chunk in DataGenerator(n_parts=args.parts).iter_business_data(args.start, args.end, args.chunk_rows):
+        store.write(chunk)
+        n_rows += len(chunk)
+    print(f"Записано строк: {n_rows:,}")
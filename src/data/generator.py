@@ -1,30 +1,163 @@
+import zlib
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Iterator
+
+# Число равномерных случайных величин на одну строку (запчасть × день):
+# шум Пуассона, факт отказа, кратность всплеска, вариация запаса, цена
+_UNIFORMS_PER_ROW = 5
+_POISSON_LAM = 2
+_POISSON_MAX_K = 40
+
 
 class DataGenerator:
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, parts_config: Dict = None, n_parts: int = None):
         self.seed = seed
-        np.random.seed(seed)
-        self.parts_config = {
+        self.parts_config = parts_config or {
             'Двигатель': {'base_demand': 8, 'price_range': (50000, 100000), 'failure_rate': 0.05},
             'Шасси': {'base_demand': 15, 'price_range': (30000, 60000), 'failure_rate': 0.15},
             'Авионика': {'base_demand': 10, 'price_range': (40000, 80000), 'failure_rate': 0.08},
             'Электрика': {'base_demand': 12, 'price_range': (20000, 50000), 'failure_rate': 0.12},
             'Гидравлика': {'base_demand': 11, 'price_range': (25000, 60000), 'failure_rate': 0.10}
         }
-    
-    def generate_business_data(self, start_date: str = '2022-01-01', end_date: str = '2024-01-01') -> pd.DataFrame:
+        if n_parts is not None:
+            self.parts_config = self.build_parts_config(n_parts, self.parts_config, seed)
+
+    @staticmethod
+    def build_parts_config(n_parts: int, templates: Dict, seed: int = 42) -> Dict:
+        """Синтетический каталог из n_parts позиций на основе базовых категорий"""
+        rng = np.random.default_rng(seed)
+        names = list(templates)
+        config = {}
+        for i in range(n_parts):
+            template = templates[names[i % len(names)]]
+            scale = rng.uniform(0.5, 1.5)
+            low, high = template['price_range']
+            config[f"{names[i % len(names)]}-{i:05d}"] = {
+                'base_demand': max(2, template['base_demand'] + int(rng.integers(-3, 4))),
+                'price_range': (int(low * scale), int(high * scale)),
+                'failure_rate': template['failure_rate']
+            }
+        return config
+
+    def generate_business_data(self, start_date: str = '2022-01-01', end_date: str = '2024-01-01',
+                               chunk_rows: int = 1_000_000) -> pd.DataFrame:
         """Генерация реалистичных бизнес-данных"""
+        chunks = list(self.iter_business_data(start_date, end_date, chunk_rows))
+        if not chunks:
+            # Пустой период: таблица без строк с теми же колонками и типами
+            empty = np.zeros((0, len(self.parts_config)), dtype=np.int64)
+            frame = self._block_frame(pd.date_range(start_date, end_date, freq='D')[:0],
+                                      np.array(list(self.parts_config), dtype=object),
+                                      empty, empty, empty, empty.astype(bool), 0)
+            # Тип строк у пустой колонки не выводится из значений
+            return frame.astype({'part_name': str})
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+    def iter_business_data(self, start_date: str = '2022-01-01', end_date: str = '2024-01-01',
+                           chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+        """Потоковая генерация данных блоками не более chunk_rows строк
+
+        Каждая запчасть имеет собственный генератор случайных чисел, поэтому
+        результат зависит только от seed и не зависит от размера блока.
+        Если запчастей больше chunk_rows, день генерируется целиком и отдается
+        частями по chunk_rows строк.
+        """
         dates = pd.date_range(start_date, end_date, freq='D')
-        
+        names = np.array(list(self.parts_config), dtype=object)
+        configs = [self.parts_config[name] for name in names]
+        base_demand = np.array([c['base_demand'] for c in configs], dtype=np.int64)
+        failure_rate = np.array([c['failure_rate'] for c in configs], dtype=np.float64)
+        price_low = np.array([c['price_range'][0] for c in configs], dtype=np.int64)
+        price_high = np.array([c['price_range'][1] for c in configs], dtype=np.int64)
+        rngs = [self._part_rng(name) for name in names]
+        poisson_cdf = self._poisson_cdf()
+
+        n_parts = len(names)
+        days_per_chunk = max(1, chunk_rows // max(n_parts, 1))
+        offset = 0
+        for start in range(0, len(dates), days_per_chunk):
+            chunk_dates = dates[start:start + days_per_chunk]
+            n_days = len(chunk_dates)
+
+            # Равномерные величины: (дни, запчасти, потоки)
+            uniforms = np.stack([rng.random((n_days, _UNIFORMS_PER_ROW)) for rng in rngs], axis=1)
+
+            demand = self._generate_demand_block(chunk_dates, dates[0], base_demand, failure_rate,
+                                                 uniforms, poisson_cdf)
+            stock = self._generate_stock_block(demand, uniforms[:, :, 3])
+            price = price_low + np.floor(uniforms[:, :, 4] * (price_high - price_low)).astype(np.int64)
+
+            n_rows = n_days * n_parts
+            block = self._block_frame(chunk_dates, names, demand, stock, price,
+                                      demand > base_demand * 2.5, offset)
+            for piece_start in range(0, n_rows, chunk_rows):
+                yield block.iloc[piece_start:piece_start + chunk_rows] if n_rows > chunk_rows else block
+            offset += n_rows
+
+    @staticmethod
+    def _block_frame(chunk_dates: pd.DatetimeIndex, names: np.ndarray, demand: np.ndarray, stock: np.ndarray,
+                     price: np.ndarray, is_anomaly: np.ndarray, offset: int) -> pd.DataFrame:
+        """Таблица блока из массивов (дни, запчасти)"""
+        n_days, n_parts = demand.shape
+        return pd.DataFrame({
+            'date': np.repeat(chunk_dates.values, n_parts),
+            'part_name': np.tile(names, n_days),
+            'demand': demand.ravel(),
+            'stock': stock.ravel(),
+            'price': price.ravel(),
+            'is_anomaly': is_anomaly.ravel()
+        }, index=pd.RangeIndex(offset, offset + n_days * n_parts))
+
+    def _part_rng(self, part_name: str) -> np.random.Generator:
+        """Генератор случайных чисел запчасти, зависящий только от seed и названия"""
+        return np.random.default_rng([self.seed, zlib.crc32(part_name.encode('utf-8'))])
+
+    @staticmethod
+    def _poisson_cdf() -> np.ndarray:
+        """Функция распределения Пуассона для обратного преобразования"""
+        k = np.arange(_POISSON_MAX_K + 1)
+        log_pmf = k * np.log(_POISSON_LAM) - _POISSON_LAM - np.cumsum(np.log(np.maximum(k, 1)))
+        return np.cumsum(np.exp(log_pmf))
+
+    @staticmethod
+    def _generate_demand_block(chunk_dates: pd.DatetimeIndex, start_date: pd.Timestamp,
+                               base_demand: np.ndarray, failure_rate: np.ndarray,
+                               uniforms: np.ndarray, poisson_cdf: np.ndarray) -> np.ndarray:
+        """Векторная генерация спроса с трендом и сезонностью для блока дней"""
+        trend = 0.001 * (chunk_dates - start_date).days.values
+        seasonal = 3 * np.sin(2 * np.pi * chunk_dates.dayofyear.values / 365)
+        weekly = 1.5 * np.sin(2 * np.pi * chunk_dates.dayofweek.values / 7)
+        calendar = (trend + seasonal + weekly)[:, None]
+
+        noise = np.minimum(np.searchsorted(poisson_cdf, uniforms[:, :, 0], side='right'), _POISSON_MAX_K)
+        demand = np.maximum(2, np.trunc(base_demand + calendar + noise)).astype(np.int64)
+
+        # Всплески спроса на основе failure_rate
+        failures = uniforms[:, :, 1] < failure_rate
+        multiplier = 3 + np.floor(uniforms[:, :, 2] * 3).astype(np.int64)
+        return np.where(failures, demand * multiplier, demand)
+
+    @staticmethod
+    def _generate_stock_block(demand: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+        """Векторная генерация остатков"""
+        optimal_stock = np.maximum(demand * 2, 20)
+        stock_variation = -15 + np.floor(uniforms * 45).astype(np.int64)
+        return np.maximum(5, optimal_stock + stock_variation)
+
+    def _generate_business_data_loop(self, start_date: str = '2022-01-01',
+                                     end_date: str = '2024-01-01') -> pd.DataFrame:
+        """Построчная генерация (исходная реализация, используется для сравнения скорости)"""
+        np.random.seed(self.seed)
+        dates = pd.date_range(start_date, end_date, freq='D')
+
         data = []
         for date in dates:
             for part, config in self.parts_config.items():
                 demand = self._generate_demand(date, config, dates[0])
                 stock = self._generate_stock(demand, config)
                 price = np.random.randint(config['price_range'][0], config['price_range'][1])
-                
+
                 data.append({
                     'date': date,
                     'part_name': part,
@@ -33,24 +166,24 @@ class DataGenerator:
                     'price': price,
                     'is_anomaly': demand > config['base_demand'] * 2.5
                 })
-        
+
         return pd.DataFrame(data)
-    
+
     def _generate_demand(self, date: pd.Timestamp, config: Dict, start_date: pd.Timestamp) -> int:
         """Генерация спроса с трендом и сезонностью"""
         trend = 0.001 * (date - start_date).days
         seasonal = 3 * np.sin(2 * np.pi * date.dayofyear / 365)
         weekly = 1.5 * np.sin(2 * np.pi * date.dayofweek / 7)
-        
+
         base_demand = config['base_demand']
         demand = max(2, int(base_demand + seasonal + weekly + trend + np.random.poisson(2)))
-        
+
         # Генерация аномалий на основе failure_rate
         if np.random.random() < config['failure_rate']:
             demand = demand * np.random.choice([3, 4, 5])
-        
+
         return demand
-    
+
     def _generate_stock(self, demand: int, config: Dict) -> int:
         """Умная генерация остатков"""
         optimal_stock = max(demand * 2, 20)
@@ -1,42 +1,182 @@
 import pandas as pd
 import numpy as np
+from typing import Dict, Iterable
+
+# Календарные признаки: первое значение и число значений
+CALENDAR_FEATURES = (('day_of_week', 0, 7), ('month', 1, 12), ('quarter', 1, 4))
+ENCODINGS = ('onehot', 'cyclical')
+
 
 class FeatureEngineer:
-    def __init__(self):
-        pass
-    
+    def __init__(self, lags: Iterable[int] = (7,), windows: Iterable[int] = (7,), compact: bool = True,
+                 causal: bool = False, encoding: str = 'onehot'):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Неизвестное кодирование календарных признаков: {encoding}")
+        self.lags = tuple(lags)
+        self.windows = tuple(windows)
+        self.compact = compact
+        # causal=True: признаки строки не используют спрос того же дня, как при прогнозе вперед
+        self.causal = causal
+        # cyclical: день недели и месяц как sin/cos, квартал — порядковый номер (5 колонок вместо 23)
+        self.encoding = encoding
+
+    @property
+    def window_feature_columns(self) -> list:
+        """Названия лаговых признаков и признаков скользящего окна"""
+        columns = [f'demand_lag_{lag}' for lag in self.lags]
+        for window in self.windows:
+            columns += [f'demand_rolling_mean_{window}', f'demand_rolling_std_{window}']
+        return columns
+
+    @property
+    def feature_columns(self) -> list:
+        """Признаки, подаваемые в модель"""
+        return (['day_of_week', 'month', 'quarter', 'day_of_year', 'is_weekend', 'stock', 'price']
+                + self.window_feature_columns + ['stock_demand_ratio'])
+
+    @property
+    def numeric_columns(self) -> list:
+        """Признаки, которые попадают в модель без кодирования"""
+        calendar = [name for name, _, _ in CALENDAR_FEATURES]
+        return [c for c in self.feature_columns if c not in calendar]
+
+    @property
+    def training_columns(self) -> list:
+        """Полный набор колонок модели, не зависящий от того, какие даты есть в блоке"""
+        columns = self.numeric_columns
+        if self.encoding == 'cyclical':
+            return columns + ['day_of_week_sin', 'day_of_week_cos', 'month_sin', 'month_cos', 'quarter']
+        for name, first, size in CALENDAR_FEATURES:
+            columns += [f'{name}_{value}' for value in range(first, first + size)]
+        return columns
+
     def create_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Feature engineering для временных рядов"""
-        df = df.copy()
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Временные признаки
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['month'] = df['date'].dt.month
-        df['quarter'] = df['date'].dt.quarter
-        df['day_of_year'] = df['date'].dt.dayofyear
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
-        
-        # Лаги и скользящие средние
-        for part in df['part_name'].unique():
-            part_mask = df['part_name'] == part
-            df.loc[part_mask, 'demand_lag_7'] = df.loc[part_mask, 'demand'].shift(7)
-            df.loc[part_mask, 'demand_rolling_mean_7'] = df.loc[part_mask, 'demand'].rolling(7).mean()
-            df.loc[part_mask, 'demand_rolling_std_7'] = df.loc[part_mask, 'demand'].rolling(7).std()
-        
+        date = pd.to_datetime(df['date'])
+
+        # Лаги и скользящие средние: одна сортировка по (запчасть, дата)
+        part_codes, _ = pd.factorize(df['part_name'], sort=True)
+        order = np.lexsort((date.to_numpy().astype(np.int64), part_codes))
+        group_pos = self.group_positions(part_codes[order])
+        features = {}
+        for name, values in self.window_features(df['demand'].to_numpy()[order], group_pos).items():
+            features[name] = np.empty_like(values)
+            features[name][order] = values
+
+        return self.assemble_features(df, features)
+
+    def assemble_features(self, df: pd.DataFrame, window_features: Dict) -> pd.DataFrame:
+        """Добавление временных признаков и взаимодействий к готовым оконным признакам"""
+        date = pd.to_datetime(df['date'])
+        features = self._time_features(date)
+        features.update(window_features)
+
         # Взаимодействие признаков
-        df['stock_demand_ratio'] = df['stock'] / (df['demand'] + 1)
-        df['price_category'] = pd.cut(df['price'], bins=3, labels=['low', 'medium', 'high'])
-        
-        return df.dropna()
-    
+        features['stock_demand_ratio'] = df['stock'].to_numpy() / (self._reference_demand(df, window_features) + 1)
+
+        if self.compact:
+            features = {name: self._compact(values) for name, values in features.items()}
+            features['part_name'] = df['part_name'].astype('category')
+
+        return df.assign(date=date, **features).dropna()
+
     def prepare_features_for_training(self, df_processed: pd.DataFrame) -> tuple:
         """Подготовка признаков для обучения модели"""
-        feature_columns = ['day_of_week', 'month', 'quarter', 'day_of_year', 'is_weekend',
-                          'stock', 'price', 'demand_lag_7', 'demand_rolling_mean_7', 
-                          'demand_rolling_std_7', 'stock_demand_ratio']
-        
-        X = pd.get_dummies(df_processed[feature_columns], columns=['day_of_week', 'month', 'quarter'])
+        X = pd.DataFrame(self.feature_matrix(df_processed), columns=self.training_columns,
+                         index=df_processed.index, copy=False)
         y = df_processed['demand']
-        
+
         return X, y
+
+    def prepare_feature_matrix(self, df_processed: pd.DataFrame) -> tuple:
+        """Признаки для обучения без таблицы: float32-матрица в порядке training_columns и спрос"""
+        return self.feature_matrix(df_processed), df_processed['demand'].to_numpy()
+
+    def prepare_features_for_prediction(self, df_processed: pd.DataFrame, columns: list) -> pd.DataFrame:
+        """Признаки для прогноза с набором колонок обучающей выборки"""
+        X, _ = self.prepare_features_for_training(df_processed)
+        return X.reindex(columns=columns, fill_value=0)
+
+    def feature_matrix(self, df_processed: pd.DataFrame) -> np.ndarray:
+        """Непрерывная float32-матрица признаков в порядке training_columns
+
+        Матрица заполняется по колонкам без промежуточной таблицы get_dummies;
+        RandomForest обучается на float32, поэтому передается в модель без копии.
+        """
+        numeric = self.numeric_columns
+        X = np.zeros((len(df_processed), len(self.training_columns)), dtype=np.float32)
+        for j, name in enumerate(numeric):
+            X[:, j] = df_processed[name].to_numpy()
+
+        offset = len(numeric)
+        rows = np.arange(len(df_processed))
+        for name, first, size in CALENDAR_FEATURES:
+            values = df_processed[name].to_numpy().astype(np.int64) - first
+            if self.encoding == 'onehot':
+                X[rows, offset + values] = 1
+                offset += size
+            elif name == 'quarter':
+                X[:, offset] = values + first
+            else:
+                angle = 2 * np.pi * values / size
+                X[:, offset] = np.sin(angle)
+                X[:, offset + 1] = np.cos(angle)
+                offset += 2
+        return X
+
+    def _time_features(self, date: pd.Series) -> Dict:
+        """Временные признаки"""
+        day_of_week = date.dt.dayofweek
+        return {
+            'day_of_week': day_of_week,
+            'month': date.dt.month,
+            'quarter': date.dt.quarter,
+            'day_of_year': date.dt.dayofyear,
+            'is_weekend': day_of_week.isin([5, 6]).astype(int)
+        }
+
+    def window_features(self, demand: np.ndarray, group_pos: np.ndarray) -> Dict:
+        """Лаги и скользящие статистики по отсортированному по (запчасть, дата) спросу
+
+        Окна считаются по всему массиву сразу; строки, окно которых захватывает
+        предыдущую запчасть, заменяются на NaN.
+        """
+        demand = pd.Series(demand, dtype=np.float64)
+        offset = 1 if self.causal else 0
+        features = {}
+        for lag in self.lags:
+            features[f'demand_lag_{lag}'] = np.where(group_pos < lag, np.nan, demand.shift(lag).to_numpy())
+        for window in self.windows:
+            rolling = demand.shift(offset).rolling(window)
+            invalid = group_pos < window - 1 + offset
+            for stat in ('mean', 'std'):
+                values = getattr(rolling, stat)().to_numpy()
+                features[f'demand_rolling_{stat}_{window}'] = np.where(invalid, np.nan, values)
+        return features
+
+    def _reference_demand(self, df: pd.DataFrame, window_features: Dict) -> np.ndarray:
+        """Спрос в знаменателе stock_demand_ratio: текущий или, при causal, среднее за прошлые дни"""
+        if not self.causal:
+            return df['demand'].to_numpy()
+        if self.windows:
+            return np.asarray(window_features[f'demand_rolling_mean_{self.windows[0]}'])
+        return np.asarray(window_features[f'demand_lag_{self.lags[0]}'])
+
+    @staticmethod
+    def group_positions(sorted_codes: np.ndarray) -> np.ndarray:
+        """Порядковый номер строки внутри своей группы"""
+        n = len(sorted_codes)
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        return np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+    @staticmethod
+    def _compact(values):
+        """Приведение к компактным типам: int32 для целых, float32 для дробных"""
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            return values
+        values = np.asarray(values)
+        if np.issubdtype(values.dtype, np.integer):
+            return values.astype(np.int32)
+        if np.issubdtype(values.dtype, np.floating):
+            return values.astype(np.float32)
+        return values
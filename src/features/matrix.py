@@ -0,0 +1,53 @@
+import json
+import os
+import pandas as pd
+import numpy as np
+from typing import Tuple
+
+FEATURES_FILE = 'features.f32'
+TARGET_FILE = 'target.f32'
+SCHEMA_FILE = 'schema.json'
+
+
+class FeatureMatrixWriter:
+    """Запись матрицы признаков на диск по блокам строк
+
+    Признаки хранятся построчно в float32, поэтому готовый файл открывается
+    через mmap как массив (n_rows, n_columns) без загрузки в память.
+    """
+
+    def __init__(self, path: str, columns: list):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.columns = list(columns)
+        self.n_rows = 0
+        self._features = open(os.path.join(path, FEATURES_FILE), 'wb')
+        self._target = open(os.path.join(path, TARGET_FILE), 'wb')
+
+    def append(self, X: pd.DataFrame, y: pd.Series):
+        """Добавление блока строк в порядке колонок схемы"""
+        self._features.write(X[self.columns].to_numpy(dtype=np.float32).tobytes())
+        self._target.write(np.asarray(y, dtype=np.float32).tobytes())
+        self.n_rows += len(X)
+
+    def close(self):
+        self._features.close()
+        self._target.close()
+        with open(os.path.join(self.path, SCHEMA_FILE), 'w') as f:
+            json.dump({'columns': self.columns, 'n_rows': self.n_rows}, f, ensure_ascii=False, indent=2)
+
+    def __enter__(self) -> 'FeatureMatrixWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_feature_matrix(path: str) -> Tuple[np.ndarray, np.ndarray, list]:
+    """Матрица признаков, целевая переменная и колонки, отображенные в память"""
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+    shape = (schema['n_rows'], len(schema['columns']))
+    X = np.memmap(os.path.join(path, FEATURES_FILE), dtype=np.float32, mode='r', shape=shape)
+    y = np.memmap(os.path.join(path, TARGET_FILE), dtype=np.float32, mode='r', shape=(schema['n_rows'],))
+    return X, y, schema['columns']
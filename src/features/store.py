@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+from src.features.engineer import FeatureEngineer
+
+class IncrementalFeatureStore:
+    """Состояние признаков для ежедневного дообновления
+
+    Для каждой запчасти хранится кольцевой буфер последних значений спроса
+    длиной в максимальный лаг/окно, поэтому признаки новой партии строк
+    считаются за O(размер партии) без пересчета всей истории.
+    """
+
+    def __init__(self, feature_engineer: FeatureEngineer = None):
+        self.feature_engineer = feature_engineer or FeatureEngineer()
+        self.capacity = max(self.feature_engineer.lags + self.feature_engineer.windows)
+        self.part_index = {}
+        self.buffer = np.zeros((0, self.capacity), dtype=np.float64)
+        self.n_seen = np.zeros(0, dtype=np.int64)
+        self.last_date = np.zeros(0, dtype='datetime64[ns]')
+
+    def update(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Добавление новых записей и расчет признаков для них"""
+        date = pd.to_datetime(batch['date']).to_numpy().astype('datetime64[ns]')
+        parts = self._register_parts(batch['part_name'])
+
+        order = np.lexsort((date.astype(np.int64), parts))
+        parts_sorted, demand_sorted, date_sorted = parts[order], batch['demand'].to_numpy()[order], date[order]
+        if np.any(date_sorted <= self.last_date[parts_sorted]):
+            raise ValueError("Новые записи должны быть позже уже загруженных для каждой запчасти")
+
+        uniq, counts = np.unique(parts_sorted, return_counts=True)
+        n_seen = self.n_seen[uniq]
+        hist_len = np.minimum(n_seen, self.capacity)
+
+        # История из буфера + новые значения, сгруппированные по запчастям
+        combined_pos = FeatureEngineer.group_positions(np.repeat(uniq, hist_len + counts))
+        is_hist = combined_pos < np.repeat(hist_len, hist_len + counts)
+        combined = np.empty(len(combined_pos), dtype=np.float64)
+        hist_parts = np.repeat(uniq, hist_len)
+        hist_t = np.repeat(n_seen - hist_len, hist_len) + combined_pos[is_hist]
+        combined[is_hist] = self.buffer[hist_parts, hist_t % self.capacity]
+        combined[~is_hist] = demand_sorted
+
+        # Позиция в полном ряду запчасти, а не во фрагменте
+        series_pos = combined_pos + np.repeat(n_seen - hist_len, hist_len + counts)
+        features = {}
+        for name, values in self.feature_engineer.window_features(combined, series_pos).items():
+            features[name] = np.empty(len(order), dtype=values.dtype)
+            features[name][order] = values[~is_hist]
+
+        self._append(parts_sorted, demand_sorted, date_sorted, uniq, counts)
+        return self.feature_engineer.assemble_features(batch, features)
+
+    def _register_parts(self, part_names: pd.Series) -> np.ndarray:
+        """Номера запчастей в буфере, новые запчасти добавляются"""
+        for name in pd.unique(part_names):
+            if name not in self.part_index:
+                self.part_index[name] = len(self.part_index)
+        n_new = len(self.part_index) - len(self.n_seen)
+        if n_new:
+            self.buffer = np.vstack([self.buffer, np.zeros((n_new, self.capacity))])
+            self.n_seen = np.concatenate([self.n_seen, np.zeros(n_new, dtype=np.int64)])
+            self.last_date = np.concatenate([self.last_date, np.full(n_new, np.datetime64('NaT', 'ns'))])
+        return part_names.map(self.part_index).to_numpy(dtype=np.int64)
+
+    def _append(self, parts_sorted: np.ndarray, demand_sorted: np.ndarray, date_sorted: np.ndarray,
+                uniq: np.ndarray, counts: np.ndarray):
+        """Запись новых значений в кольцевой буфер"""
+        batch_pos = FeatureEngineer.group_positions(parts_sorted)
+        t = self.n_seen[parts_sorted] + batch_pos
+        # В буфер попадают только последние capacity значений каждой запчасти
+        keep = batch_pos >= np.repeat(counts, counts) - self.capacity
+        self.buffer[parts_sorted[keep], t[keep] % self.capacity] = demand_sorted[keep]
+        self.n_seen[uniq] += counts
+        self.last_date[uniq] = date_sorted[np.cumsum(counts) - 1]
+
+    def save(self, path: str):
+        """Сохранение состояния на диск"""
+        fe = self.feature_engineer
+        np.savez(path, buffer=self.buffer, n_seen=self.n_seen, last_date=self.last_date,
+                 parts=np.array(list(self.part_index), dtype=str),
+                 lags=np.array(fe.lags), windows=np.array(fe.windows), compact=np.array(fe.compact),
+                 causal=np.array(fe.causal), encoding=np.array(fe.encoding))
+
+    @classmethod
+    def load(cls, path: str) -> 'IncrementalFeatureStore':
+        """Загрузка состояния с диска"""
+        with np.load(path) as state:
+            store = cls(FeatureEngineer(lags=state['lags'].tolist(), windows=state['windows'].tolist(),
+                                        compact=bool(state['compact']),
+                                        causal=bool(state['causal']) if 'causal' in state else False,
+                                        encoding=str(state['encoding']) if 'encoding' in state else 'onehot'))
+            store.part_index = {name: i for i, name in enumerate(state['parts'].tolist())}
+            store.buffer = state['buffer']
+            store.n_seen = state['n_seen']
+            store.last_date = state['last_date']
+        return store
@@ -0,0 +1,91 @@
+import json
+import os
+import pandas as pd
+import numpy as np
+from typing import Dict
+from src.features.engineer import FeatureEngineer
+from src.models.trainer import model_input
+
+MODEL_FILE = 'model.joblib'
+SCHEMA_FILE = 'schema.json'
+
+
+class ModelArtifact:
+    """Сохраненная модель спроса: модель, схема колонок one-hot и настройки признаков
+
+    Схема читается сразу, а сама модель — при первом обращении. sklearn при
+    распаковке копирует массивы узлов деревьев в собственные буферы, поэтому
+    модель целиком занимает память процесса; ленивая загрузка только
+    откладывает это до первого прогноза.
+    """
+
+    def __init__(self, path: str, columns: list, feature_config: Dict, model=None):
+        self.path = path
+        self.columns = columns
+        self.feature_config = feature_config
+        self.feature_engineer = FeatureEngineer(**feature_config)
+        self._model = model
+
+    @classmethod
+    def save(cls, path: str, model_trainer, feature_engineer: FeatureEngineer) -> 'ModelArtifact':
+        """Сохранение обученной модели вместе со схемой признаков"""
+        if model_trainer.model is None:
+            raise ValueError("Модель не обучена. Сначала вызовите train_demand_model()")
+        os.makedirs(path, exist_ok=True)
+        feature_config = {
+            'lags': list(feature_engineer.lags),
+            'windows': list(feature_engineer.windows),
+            'compact': feature_engineer.compact,
+            'causal': feature_engineer.causal,
+            'encoding': feature_engineer.encoding
+        }
+        import joblib
+        # Без сжатия: загрузка быстрее, а размер файла для сервиса не важен
+        joblib.dump(model_trainer.model, os.path.join(path, MODEL_FILE), compress=0)
+        with open(os.path.join(path, SCHEMA_FILE), 'w') as f:
+            json.dump({'columns': model_trainer.feature_columns, 'feature_config': feature_config}, f,
+                      ensure_ascii=False, indent=2)
+        return cls(path, model_trainer.feature_columns, feature_config, model_trainer.model)
+
+    @classmethod
+    def load(cls, path: str) -> 'ModelArtifact':
+        """Загрузка схемы; модель подгружается лениво"""
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        return cls(path, schema['columns'], schema['feature_config'])
+
+    @property
+    def model(self):
+        if self._model is None:
+            import joblib
+            self._model = joblib.load(os.path.join(self.path, MODEL_FILE))
+        return self._model
+
+    @property
+    def record_columns(self) -> list:
+        """Колонки записей, из которых строятся признаки модели"""
+        return ['date', 'part_name', 'stock', 'price', 'demand'] + self.feature_engineer.window_feature_columns
+
+    def select_records(self, records: pd.DataFrame) -> pd.DataFrame:
+        """Проверка записей и отбор колонок модели; лишние колонки отбрасываются"""
+        missing = [name for name in self.record_columns if name not in records]
+        if missing:
+            raise ValueError(f"В записях нет колонок: {', '.join(missing)}")
+        selected = records[self.record_columns]
+        if selected.isna().to_numpy().any():
+            raise ValueError("В записях есть пропуски в признаках модели")
+        return selected
+
+    def prepare_records(self, records: pd.DataFrame) -> pd.DataFrame:
+        """Матрица признаков по записям с уже посчитанными лагами и окнами"""
+        records = self.select_records(records)
+        window_features = {name: records[name].to_numpy(dtype=np.float64)
+                           for name in self.feature_engineer.window_feature_columns}
+        processed = self.feature_engineer.assemble_features(records, window_features)
+        if len(processed) != len(records):
+            raise ValueError("В записях есть пропуски в признаках модели")
+        return self.feature_engineer.prepare_features_for_prediction(processed, self.columns)
+
+    def predict(self, records: pd.DataFrame) -> np.ndarray:
+        """Прогноз спроса по записям (дата, запчасть, запас, цена, спрос, лаги и окна)"""
+        return self.model.predict(model_input(self.model, self.prepare_records(records), self.columns))
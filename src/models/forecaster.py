@@ -0,0 +1,109 @@
+import pandas as pd
+import numpy as np
+from typing import Dict
+from src.features.engineer import CALENDAR_FEATURES, FeatureEngineer
+from src.features.store import IncrementalFeatureStore
+from src.models.trainer import model_input
+
+
+class DemandForecaster:
+    """Рекурсивный прогноз спроса на несколько дней вперед для всех запчастей
+
+    На каждом шаге признаки всех запчастей собираются одной матрицей из
+    последних значений спроса, модель прогнозирует следующий день, и прогноз
+    дописывается в историю как известный спрос. Запас и цена запчасти
+    считаются равными последним известным значениям.
+    Модель должна быть обучена на признаках FeatureEngineer(causal=True):
+    спрос прогнозируемого дня в признаки не входит.
+    """
+
+    def __init__(self, model, columns: list, feature_engineer: FeatureEngineer):
+        if not feature_engineer.causal:
+            raise ValueError("Для прогноза вперед нужны признаки FeatureEngineer(causal=True)")
+        self.model = model
+        self.columns = list(columns)
+        self.feature_engineer = feature_engineer
+        missing = self._missing_columns()
+        if missing:
+            raise ValueError(f"Признаки модели не строятся при прогнозе: {', '.join(missing)}")
+
+    @classmethod
+    def from_trainer(cls, model_trainer, feature_engineer: FeatureEngineer) -> 'DemandForecaster':
+        if model_trainer.model is None:
+            raise ValueError("Модель не обучена. Сначала вызовите train_demand_model()")
+        return cls(model_trainer.model, model_trainer.feature_columns, feature_engineer)
+
+    def forecast(self, history: pd.DataFrame, horizon: int = 30) -> pd.DataFrame:
+        """Прогноз на horizon дней после последней даты истории каждой запчасти
+
+        Возвращает таблицу (date, part_name, demand_forecast) по дням, внутри дня — по запчастям.
+        """
+        store = IncrementalFeatureStore(self.feature_engineer)
+        store.update(history)
+        if np.any(store.n_seen < store.capacity):
+            raise ValueError(f"Для прогноза нужно не меньше {store.capacity} дней истории по каждой запчасти")
+
+        # Последние capacity значений спроса в хронологическом порядке, по строке на запчасть
+        t = store.n_seen[:, None] - store.capacity + np.arange(store.capacity)
+        demand_history = store.buffer[np.arange(len(t))[:, None], t % store.capacity]
+        part_names = np.array(list(store.part_index), dtype=object)
+        last_values = history.groupby(history['part_name'].astype(str), observed=True)[['stock', 'price']].last()
+        last_values = last_values.reindex(part_names)
+        stock = last_values['stock'].to_numpy(dtype=np.float64)
+        price = last_values['price'].to_numpy(dtype=np.float64)
+
+        n_parts = len(part_names)
+        last_date = store.last_date.astype('datetime64[D]')
+        forecasts = np.empty((horizon, n_parts), dtype=np.float64)
+        for step in range(horizon):
+            dates = pd.DatetimeIndex(last_date + step + 1)
+            features = self._step_features(dates, demand_history, stock, price)
+            X = np.column_stack([features[column] for column in self.columns])
+            forecasts[step] = self.model.predict(model_input(self.model, X.astype(np.float32), self.columns))
+            demand_history = np.column_stack([demand_history[:, 1:], forecasts[step]])
+
+        steps = np.arange(1, horizon + 1)
+        return pd.DataFrame({
+            'date': (last_date[None, :] + steps[:, None]).ravel().astype('datetime64[ns]'),
+            'part_name': np.tile(part_names, horizon),
+            'demand_forecast': forecasts.ravel()
+        })
+
+    def _missing_columns(self) -> list:
+        """Колонки модели, которых нет среди признаков шага прогноза"""
+        n_history = max(self.feature_engineer.lags + self.feature_engineer.windows)
+        features = self._step_features(pd.DatetimeIndex(['2022-01-01']), np.zeros((1, n_history)),
+                                       np.zeros(1), np.zeros(1))
+        return [column for column in self.columns if column not in features]
+
+    def _step_features(self, dates: pd.DatetimeIndex, demand_history: np.ndarray,
+                       stock: np.ndarray, price: np.ndarray) -> Dict[str, np.ndarray]:
+        """Признаки одного дня для всех запчастей, включая one-hot и циклические колонки"""
+        fe = self.feature_engineer
+        day_of_week = dates.dayofweek.to_numpy()
+        features = {
+            'day_of_year': dates.dayofyear.to_numpy(),
+            'is_weekend': (day_of_week >= 5).astype(np.float64),
+            'stock': stock,
+            'price': price
+        }
+        calendar = {'day_of_week': day_of_week, 'month': dates.month.to_numpy(), 'quarter': dates.quarter.to_numpy()}
+        for name, first, size in CALENDAR_FEATURES:
+            values = calendar[name]
+            for value in range(first, first + size):
+                features[f'{name}_{value}'] = (values == value).astype(np.float64)
+            angle = 2 * np.pi * (values - first) / size
+            features[f'{name}_sin'] = np.sin(angle)
+            features[f'{name}_cos'] = np.cos(angle)
+        features['quarter'] = calendar['quarter'].astype(np.float64)
+
+        for lag in fe.lags:
+            features[f'demand_lag_{lag}'] = demand_history[:, -lag]
+        for window in fe.windows:
+            recent = demand_history[:, -window:]
+            features[f'demand_rolling_mean_{window}'] = recent.mean(axis=1)
+            features[f'demand_rolling_std_{window}'] = recent.std(axis=1, ddof=1)
+        reference = (features[f'demand_rolling_mean_{fe.windows[0]}'] if fe.windows
+                     else features[f'demand_lag_{fe.lags[0]}'])
+        features['stock_demand_ratio'] = stock / (reference + 1)
+        return features
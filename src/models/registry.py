@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+INDEX_FILE = 'index.json'
+
+
+class ModelRegistry:
+    """Реестр моделей спроса по группам: запчастям или ABC-классам
+
+    Для каждой группы хранится модель и версия данных — хэш ее строк
+    признаков, целевой переменной и параметров модели. При повторном
+    обучении переобучаются только группы, у которых изменилась версия.
+    Прогноз направляет строки к модели их группы векторными партиями.
+    """
+
+    def __init__(self, root: str, model_params: Dict = None, n_workers: int = None):
+        self.root = root
+        self.model_params = model_params or {
+            'n_estimators': 30,
+            'max_depth': 10,
+            'random_state': 42,
+            'n_jobs': 1
+        }
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.columns = None
+        self.entries = {}
+        index_path = os.path.join(root, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            self.columns = index['columns']
+            self.entries = index['models']
+        self._models = {}
+
+    def train(self, X: pd.DataFrame, y: pd.Series, groups: pd.Series, prune: bool = True) -> List[str]:
+        """Обучение моделей групп с изменившимися данными, возвращает обученные группы
+
+        prune=True удаляет из реестра модели групп, которых нет в новых данных.
+        """
+        columns = list(X.columns)
+        if self.columns is not None and columns != self.columns:
+            # Новый набор признаков делает недействительными все модели
+            for entry in self.entries.values():
+                self._remove_file(entry['file'])
+            self.entries = {}
+            self._models = {}
+        self.columns = columns
+
+        X_arr = np.ascontiguousarray(X, dtype=np.float32)
+        y_arr = np.ascontiguousarray(y, dtype=np.float64)
+        group_rows = self._group_rows(groups)
+        if prune:
+            for name in [name for name in self.entries if name not in group_rows]:
+                self._remove_file(self.entries.pop(name)['file'])
+                self._models.pop(name, None)
+        tasks = []
+        for name, rows in group_rows.items():
+            version = self._data_version(X_arr[rows], y_arr[rows])
+            entry = self.entries.get(name)
+            if entry is not None and entry['version'] == version:
+                continue
+            file_name = f"{hashlib.sha1(name.encode()).hexdigest()[:16]}-{version[:16]}.joblib"
+            tasks.append((name, version, file_name, X_arr[rows], y_arr[rows]))
+
+        os.makedirs(self.root, exist_ok=True)
+        paths = [os.path.join(self.root, file_name) for _, _, file_name, _, _ in tasks]
+        if self.n_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_workers, len(tasks))) as pool:
+                list(pool.map(_fit_group, [t[3] for t in tasks], [t[4] for t in tasks],
+                              [self.model_params] * len(tasks), paths))
+        else:
+            for (_, _, _, X_group, y_group), path in zip(tasks, paths):
+                _fit_group(X_group, y_group, self.model_params, path)
+
+        for name, version, file_name, X_group, _ in tasks:
+            old = self.entries.get(name)
+            if old is not None and old['file'] != file_name:
+                self._remove_file(old['file'])
+            self.entries[name] = {'version': version, 'file': file_name, 'n_rows': len(X_group)}
+            self._models.pop(name, None)
+        self._save_index()
+        return [task[0] for task in tasks]
+
+    def predict(self, X: pd.DataFrame, groups: pd.Series) -> np.ndarray:
+        """Прогноз: строки каждой группы передаются ее модели одной партией"""
+        if self.columns is not None:
+            missing = [column for column in self.columns if column not in X.columns]
+            if missing:
+                raise ValueError(f"Нет признаков моделей реестра: {', '.join(missing[:10])}")
+            X = X[self.columns]
+        X_arr = np.ascontiguousarray(X, dtype=np.float32)
+        group_rows = self._group_rows(groups)
+        missing = [name for name in group_rows if name not in self.entries]
+        if missing:
+            raise ValueError(f"Нет моделей для групп: {', '.join(missing[:5])}")
+
+        predictions = np.empty(len(X_arr), dtype=np.float64)
+        for name, rows in group_rows.items():
+            predictions[rows] = self.model(name).predict(X_arr[rows])
+        return predictions
+
+    def model(self, name: str):
+        """Модель группы; загружается с диска при первом обращении"""
+        if name not in self._models:
+            import joblib
+            self._models[name] = joblib.load(os.path.join(self.root, self.entries[name]['file']))
+        return self._models[name]
+
+    def _group_rows(self, groups: pd.Series) -> Dict[str, np.ndarray]:
+        """Номера строк каждой группы за одну сортировку"""
+        codes, names = pd.factorize(np.asarray(groups), sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0, True])
+        return {str(names[codes[order[start]]]): order[start:end] for start, end in zip(bounds[:-1], bounds[1:])}
+
+    def _data_version(self, X_group: np.ndarray, y_group: np.ndarray) -> str:
+        """Хэш строк группы, колонок и параметров модели (без n_jobs)"""
+        params = {k: v for k, v in self.model_params.items() if k != 'n_jobs'}
+        digest = hashlib.sha1()
+        digest.update(json.dumps([self.columns, params], sort_keys=True, default=str).encode())
+        digest.update(X_group.tobytes())
+        digest.update(y_group.tobytes())
+        return digest.hexdigest()
+
+    def _remove_file(self, file_name: str):
+        path = os.path.join(self.root, file_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _save_index(self):
+        with open(os.path.join(self.root, INDEX_FILE), 'w') as f:
+            json.dump({'columns': self.columns, 'models': self.entries}, f, ensure_ascii=False, indent=2)
+
+
+def _fit_group(X_group: np.ndarray, y_group: np.ndarray, params: Dict, path: str):
+    """Обучение модели одной группы и сохранение на диск"""
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+    model = RandomForestRegressor(**params)
+    model.fit(X_group, y_group)
+    joblib.dump(model, path, compress=0)
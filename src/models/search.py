@@ -0,0 +1,237 @@
+import hashlib
+import json
+import math
+import os
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+from src.features.engineer import FeatureEngineer
+from src.models.trainer import ModelTrainer, _fit_fold
+
+# Состояние процесса-исполнителя: исходные данные и кэш признаков по настройкам окон
+_WORKER_STATE = {}
+
+
+class HyperparameterSearch:
+    """Поиск гиперпараметров RandomForest и настроек окон признаков
+
+    strategy='halving' — successive halving по фолдам TimeSeriesSplit: все
+    конфигурации оцениваются на первых фолдах, дальше проходит лучшая 1/eta.
+    strategy='random' — случайный поиск с оценкой на всех фолдах.
+    Результаты каждого фолда дописываются в журнал, и прерванный поиск
+    продолжается с того же места; журнал другого поиска (другие данные,
+    число фолдов, пространство параметров или seed) не принимается. Все конфигурации оцениваются на одних и
+    тех же строках: длинные лаги и окна отбрасывают больше первых дней
+    запчасти, поэтому берутся строки, допустимые для всех конфигураций.
+    """
+
+    def __init__(self, param_space: Dict[str, list], feature_space: Dict[str, list] = None,
+                 n_trials: int = 20, strategy: str = 'halving', eta: int = 3, min_folds: int = 1,
+                 n_splits: int = 5, n_workers: int = None, log_path: str = None, seed: int = 42,
+                 base_params: Dict = None):
+        if strategy not in ('halving', 'random'):
+            raise ValueError(f"Неизвестная стратегия поиска: {strategy}")
+        self.param_space = param_space
+        self.feature_space = feature_space or {}
+        self.n_trials = n_trials
+        self.strategy = strategy
+        self.eta = eta
+        self.min_folds = min_folds
+        self.n_splits = n_splits
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.log_path = log_path
+        self.seed = seed
+        self.base_params = base_params or {'n_estimators': 100, 'random_state': 42}
+        self.results = None
+
+    def run(self, df: pd.DataFrame) -> Dict:
+        """Запуск поиска, возвращает лучшую конфигурацию"""
+        configs = self._sample_configs()
+        scores = self._read_log(self._fingerprint(df))
+        alive = list(configs)
+        pruned_at = {}
+
+        budgets = self._fold_budgets()
+        index = self.common_index(df, configs.values())
+        with _TrialExecutor(df, index, self.n_splits, self.n_workers) as submit:
+            for rung, budget in enumerate(budgets):
+                tasks = [(trial, fold) for trial in alive for fold in range(budget)
+                         if (trial, fold) not in scores]
+                for (trial, fold), mae in zip(tasks, submit([(configs[t], f) for t, f in tasks])):
+                    scores[(trial, fold)] = mae
+                    self._log(trial, configs[trial], fold, mae)
+
+                print(f"Ступень {rung + 1}: {len(alive)} конфигураций, фолдов: {budget}")
+                if rung == len(budgets) - 1:
+                    break
+                ranked = sorted(alive, key=lambda t: self._mean_score(scores, t, budget))
+                keep = max(1, math.ceil(len(alive) / self.eta))
+                for trial in ranked[keep:]:
+                    pruned_at[trial] = budget
+                alive = ranked[:keep]
+
+        self.results = self._collect_results(configs, scores, pruned_at)
+        best = self.results.iloc[0]
+        print(f"Лучший MAE: {best['mean_mae']:.3f} ({best['trial']})")
+        return configs[best['trial']]
+
+    @staticmethod
+    def common_index(df: pd.DataFrame, configs: Iterable[Dict]) -> pd.Index:
+        """Строки, для которых признаки есть у всех конфигураций
+
+        Строка допустима, если ее истории хватает на самый длинный лаг и
+        самое длинное окно, поэтому достаточно одного расчета с объединением
+        лагов и окон всех конфигураций.
+        """
+        configs = list(configs)
+        lags = sorted({lag for config in configs for lag in config['lags']})
+        windows = sorted({window for config in configs for window in config['windows']})
+        return FeatureEngineer(lags=lags, windows=windows).create_features(df).index
+
+    def _fold_budgets(self) -> List[int]:
+        """Число фолдов на каждой ступени"""
+        if self.strategy == 'random':
+            return [self.n_splits]
+        budgets = []
+        budget = self.min_folds
+        while budget < self.n_splits:
+            budgets.append(budget)
+            budget *= self.eta
+        return budgets + [self.n_splits]
+
+    def _sample_configs(self) -> Dict[str, Dict]:
+        """Случайные конфигурации без повторов, ключ — хэш конфигурации"""
+        rng = np.random.default_rng(self.seed)
+        n_configs = math.prod(len(values) for values in [*self.param_space.values(), *self.feature_space.values()])
+        configs = {}
+        while len(configs) < min(self.n_trials, n_configs):
+            model_params = dict(self.base_params)
+            for name, values in self.param_space.items():
+                model_params[name] = _to_builtin(values[rng.integers(len(values))])
+            config = {'model_params': model_params, 'lags': [7], 'windows': [7]}
+            for name, values in self.feature_space.items():
+                config[name] = [int(v) for v in values[rng.integers(len(values))]]
+            configs[_trial_id(config)] = config
+        return configs
+
+    @staticmethod
+    def _mean_score(scores: Dict, trial: str, budget: int) -> float:
+        return float(np.mean([scores[(trial, fold)] for fold in range(budget)]))
+
+    def _collect_results(self, configs: Dict, scores: Dict, pruned_at: Dict) -> pd.DataFrame:
+        """Таблица испытаний, отсортированная по MAE (сначала прошедшие все фолды)"""
+        rows = []
+        for trial, config in configs.items():
+            folds = [scores[(trial, f)] for f in range(self.n_splits) if (trial, f) in scores]
+            rows.append({
+                'trial': trial,
+                **config['model_params'],
+                'lags': tuple(config['lags']),
+                'windows': tuple(config['windows']),
+                'folds_evaluated': len(folds),
+                'mean_mae': float(np.mean(folds)),
+                'pruned_after_folds': pruned_at.get(trial)
+            })
+        results = pd.DataFrame(rows)
+        results['complete'] = results['folds_evaluated'] == self.n_splits
+        return results.sort_values(['complete', 'mean_mae'], ascending=[False, True]).reset_index(drop=True)
+
+    def _fingerprint(self, df: pd.DataFrame) -> str:
+        """Хэш всего, от чего зависят оценки фолдов: данные, число фолдов, пространства поиска и seed"""
+        return hashlib.sha1(json.dumps({
+            'data': [list(df.shape), int(pd.util.hash_pandas_object(df).sum())],
+            'n_splits': self.n_splits,
+            'param_space': self.param_space,
+            'feature_space': self.feature_space,
+            'base_params': self.base_params,
+            'seed': self.seed
+        }, sort_keys=True, default=_to_builtin).encode()).hexdigest()
+
+    def _read_log(self, fingerprint: str) -> Dict:
+        """Уже посчитанные фолды из журнала испытаний; новый журнал начинается с отпечатка поиска"""
+        scores = {}
+        if not self.log_path:
+            return scores
+        if not os.path.exists(self.log_path) or not os.path.getsize(self.log_path):
+            with open(self.log_path, 'w') as f:
+                f.write(json.dumps({'fingerprint': fingerprint}) + '\n')
+            return scores
+        with open(self.log_path) as f:
+            header = json.loads(f.readline())
+            if header.get('fingerprint') != fingerprint:
+                raise ValueError(f"Журнал {self.log_path} записан другим поиском "
+                                 "(данные, фолды, пространство параметров или seed); укажите другой log_path")
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    scores[(record['trial'], record['fold'])] = record['mae']
+        return scores
+
+    def _log(self, trial: str, config: Dict, fold: int, mae: float):
+        if not self.log_path:
+            return
+        with open(self.log_path, 'a') as f:
+            f.write(json.dumps({'trial': trial, 'config': config, 'fold': fold, 'mae': mae}) + '\n')
+
+
+class _TrialExecutor:
+    """Выполнение пар (конфигурация, фолд) в пуле процессов или в текущем процессе"""
+
+    def __init__(self, df: pd.DataFrame, index: pd.Index, n_splits: int, n_workers: int):
+        self.df = df
+        self.index = index
+        self.n_splits = n_splits
+        self.n_workers = n_workers
+        self.pool = None
+
+    def __enter__(self):
+        if self.n_workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                            initargs=(self.df, self.index, self.n_splits, 1))
+        else:
+            _init_worker(self.df, self.index, self.n_splits, os.cpu_count() or 1)
+        return self.submit
+
+    def __exit__(self, *exc_info):
+        if self.pool is not None:
+            self.pool.shutdown()
+        _WORKER_STATE.clear()
+
+    def submit(self, tasks: list) -> Iterator[float]:
+        """MAE по задачам в исходном порядке, по мере готовности"""
+        if self.pool is None:
+            for config, fold in tasks:
+                yield _evaluate_trial(config, fold)
+            return
+        futures = [self.pool.submit(_evaluate_trial, config, fold) for config, fold in tasks]
+        for future in futures:
+            yield future.result()
+
+
+def _init_worker(df: pd.DataFrame, index: pd.Index, n_splits: int, n_jobs: int):
+    _WORKER_STATE.update(df=df, index=index, n_splits=n_splits, n_jobs=n_jobs, features={})
+
+
+def _evaluate_trial(config: Dict, fold: int) -> float:
+    """MAE одной конфигурации на одном фолде"""
+    key = (tuple(config['lags']), tuple(config['windows']))
+    if key not in _WORKER_STATE['features']:
+        engineer = FeatureEngineer(lags=key[0], windows=key[1])
+        df_processed = engineer.create_features(_WORKER_STATE['df']).loc[_WORKER_STATE['index']]
+        X, y = engineer.prepare_feature_matrix(df_processed)
+        bounds = ModelTrainer(n_splits=_WORKER_STATE['n_splits']).fold_bounds(len(X))
+        _WORKER_STATE['features'][key] = (np.ascontiguousarray(X, dtype=np.float32),
+                                          np.ascontiguousarray(y, dtype=np.float64), bounds)
+    X_arr, y_arr, bounds = _WORKER_STATE['features'][key]
+    params = {**config['model_params'], 'n_jobs': _WORKER_STATE['n_jobs']}
+    return _fit_fold(X_arr, y_arr, bounds[fold], params)
+
+
+def _trial_id(config: Dict) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _to_builtin(value):
+    """numpy-скаляры в обычные типы для JSON"""
+    return value.item() if isinstance(value, np.generic) else value
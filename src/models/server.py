@@ -0,0 +1,171 @@
+import argparse
+import json
+import queue
+import threading
+import time
+import pandas as pd
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from src.models.artifact import ModelArtifact
+
+
+class PredictionServer:
+    """Локальный HTTP-сервис прогноза спроса
+
+    POST /predict с телом {"records": [...]} возвращает {"predictions": [...]},
+    GET /stats — задержки p50/p99. Одновременные запросы объединяются в одну
+    партию и прогнозируются одним векторным вызовом predict.
+    """
+
+    def __init__(self, artifact: ModelArtifact, host: str = '127.0.0.1', port: int = 8000,
+                 max_batch_rows: int = 10000, max_wait_ms: float = 2.0, latency_window: int = 10000):
+        self.artifact = artifact
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_ms = max_wait_ms
+        self.latencies_ms = deque(maxlen=latency_window)
+        self.batch_sizes = deque(maxlen=latency_window)
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._threads = []
+
+    @property
+    def address(self) -> tuple:
+        return self._httpd.server_address
+
+    def start(self):
+        """Запуск сервера и обработчика партий в фоновых потоках"""
+        # Модель загружается до первого запроса, чтобы не увеличивать его задержку
+        self.artifact.model
+        self._threads = [threading.Thread(target=self._batch_loop, daemon=True),
+                         threading.Thread(target=self._httpd.serve_forever, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._queue.put(None)
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def predict_records(self, records: List[Dict]) -> np.ndarray:
+        """Постановка записей в очередь и ожидание прогноза"""
+        future = Future()
+        # Записи проверяются до постановки в партию, чтобы ошибка одного клиента не доставалась другим
+        frame = self.artifact.select_records(pd.DataFrame.from_records(records))
+        self._queue.put((frame, future))
+        return future.result()
+
+    def latency_stats(self) -> Dict:
+        """Перцентили задержки запросов, мс"""
+        latencies = np.array(self.latencies_ms)
+        if not len(latencies):
+            return {'requests': 0, 'p50_ms': None, 'p99_ms': None, 'avg_batch_records': None}
+        return {
+            'requests': len(latencies),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+            'avg_batch_records': round(float(np.mean(self.batch_sizes)), 1)
+        }
+
+    def _batch_loop(self):
+        """Сбор запросов в партии и один вызов predict на партию"""
+        while not self._stopped.is_set():
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            n_rows = len(item[0])
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._stopped.set()
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+            self._predict_batch(batch)
+
+    def _predict_batch(self, batch: list):
+        frames = [frame for frame, _ in batch]
+        try:
+            predictions = self.artifact.predict(pd.concat(frames, ignore_index=True))
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0][1].set_exception(error)
+                return
+            # Партия не прошла — прогноз по каждому запросу отдельно, ошибку получит только виновный
+            for item in batch:
+                self._predict_batch([item])
+            return
+        self.batch_sizes.append(len(predictions))
+        offsets = np.cumsum([0] + [len(frame) for frame in frames])
+        for (_, future), start, end in zip(batch, offsets[:-1], offsets[1:]):
+            future.set_result(predictions[start:end])
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != '/predict':
+                    return self._send(404, {'error': 'not found'})
+                started = time.perf_counter()
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    records = body.get('records') if isinstance(body, dict) else None
+                    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                        raise ValueError("Ожидается объект с полем records — списком записей")
+                    predictions = server.predict_records(records)
+                except (ValueError, KeyError, TypeError, AttributeError) as error:
+                    # Неверный JSON, схема запроса или типы полей записей
+                    return self._send(400, {'error': str(error)})
+                except Exception as error:
+                    return self._send(500, {'error': f'{type(error).__name__}: {error}'})
+                server.latencies_ms.append((time.perf_counter() - started) * 1000)
+                self._send(200, {'predictions': predictions.tolist()})
+
+            def do_GET(self):
+                if self.path != '/stats':
+                    return self._send(404, {'error': 'not found'})
+                self._send(200, server.latency_stats())
+
+            def _send(self, status: int, payload: Dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сервис прогноза спроса')
+    parser.add_argument('artifact', help='каталог сохраненной модели')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    prediction_server = PredictionServer(ModelArtifact.load(args.artifact), args.host, args.port)
+    prediction_server.start()
+    print(f"Сервис прогноза запущен на http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        prediction_server.stop()
@@ -1,61 +1,178 @@
+import hashlib
+import json
+import os
+import tempfile
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error
-from sklearn.model_selection import TimeSeriesSplit
-from typing import Tuple, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Dict, List
+
+# sklearn импортируется при первом обучении: его загрузка дольше всего остального запуска
 
 class ModelTrainer:
-    def __init__(self, model_params: Dict = None):
+    def __init__(self, model_params: Dict = None, n_splits: int = 5, n_workers: int = None,
+                 cache_dir: str = None):
         self.model = None
         self.feature_importance = None
+        self.feature_columns = None
         self.model_params = model_params or {
             'n_estimators': 100,
             'random_state': 42,
             'n_jobs': -1
         }
-    
-    def train_demand_model(self, X: pd.DataFrame, y: pd.Series) -> float:
-        """Обучение ML модели для прогнозирования спроса"""
+        self.n_splits = n_splits
+        self.n_workers = n_workers or min(n_splits, os.cpu_count() or 1)
+        self.cache_dir = cache_dir
+
+    def train_demand_model(self, X, y, columns: list = None) -> float:
+        """Обучение ML модели для прогнозирования спроса
+
+        X — таблица признаков или float32-матрица с названиями колонок в columns;
+        непрерывная float32-матрица передается в модель без копирования.
+        """
+        from sklearn.ensemble import RandomForestRegressor
+        columns = list(X.columns) if isinstance(X, pd.DataFrame) else list(columns)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+
         # Time Series Cross-Validation
-        tscv = TimeSeriesSplit(n_splits=5)
-        cv_scores = []
-        
+        cv_scores = self.cross_validate(X, y, columns=columns)
+
         print("Cross-Validation результаты:")
-        for fold, (train_idx, test_idx) in enumerate(tscv.split(X)):
-            X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-            y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
-            
-            model = RandomForestRegressor(**self.model_params)
-            model.fit(X_train, y_train)
-            
-            y_pred = model.predict(X_test)
-            mae = mean_absolute_error(y_test, y_pred)
-            cv_scores.append(mae)
+        for fold, mae in enumerate(cv_scores):
             print(f"Fold {fold + 1}: MAE = {mae:.3f}")
-        
+
         # Финальная модель
         self.model = RandomForestRegressor(**self.model_params)
         self.model.fit(X, y)
-        
+        self.feature_columns = columns
+
         # Feature importance
         self.feature_importance = pd.DataFrame({
-            'feature': X.columns,
+            'feature': columns,
             'importance': self.model.feature_importances_
         }).sort_values('importance', ascending=False)
-        
+
         mean_mae = np.mean(cv_scores)
         std_mae = np.std(cv_scores)
         print(f"\nСредний MAE: {mean_mae:.3f} (+/- {std_mae:.3f})")
-        
+
         return mean_mae
-    
-    def predict(self, X: pd.DataFrame) -> np.ndarray:
+
+    def cross_validate(self, X, y, folds: List[int] = None, columns: list = None) -> List[float]:
+        """MAE по фолдам TimeSeriesSplit: параллельно по процессам и с кэшем результатов"""
+        if columns is None:
+            columns = list(X.columns) if isinstance(X, pd.DataFrame) else []
+        # RandomForest все равно приводит признаки к float32
+        X_arr = np.ascontiguousarray(X, dtype=np.float32)
+        y_arr = np.ascontiguousarray(y, dtype=np.float64)
+        bounds = self.fold_bounds(len(X_arr))
+        folds = range(len(bounds)) if folds is None else folds
+
+        keys = {}
+        scores = {}
+        if self.cache_dir:
+            data_hash = self._data_hash(X_arr, y_arr, columns)
+            for fold in folds:
+                keys[fold] = self._fold_key(data_hash, bounds[fold])
+                cached = self._read_cache(keys[fold])
+                if cached is not None:
+                    scores[fold] = cached
+
+        pending = [fold for fold in folds if fold not in scores]
+        n_workers = min(self.n_workers, len(pending))
+        # Бюджет потоков деревьев на один фолд, чтобы процессы не конкурировали за ядра
+        params = {**self.model_params, 'n_jobs': max(1, (os.cpu_count() or 1) // max(n_workers, 1))}
+        if n_workers > 1:
+            scores.update(zip(pending, self._run_in_pool(X_arr, y_arr, [bounds[f] for f in pending],
+                                                         params, n_workers)))
+        else:
+            for fold in pending:
+                scores[fold] = _fit_fold(X_arr, y_arr, bounds[fold], params)
+
+        for fold in pending:
+            if fold in keys:
+                self._write_cache(keys[fold], scores[fold])
+        return [scores[fold] for fold in folds]
+
+    def fold_bounds(self, n_samples: int) -> List[Tuple[int, int, int]]:
+        """Границы фолдов TimeSeriesSplit: (конец train, начало test, конец test)"""
+        from sklearn.model_selection import TimeSeriesSplit
+        tscv = TimeSeriesSplit(n_splits=self.n_splits)
+        return [(int(train_idx[-1]) + 1, int(test_idx[0]), int(test_idx[-1]) + 1)
+                for train_idx, test_idx in tscv.split(np.empty((n_samples, 1)))]
+
+    def _run_in_pool(self, X_arr: np.ndarray, y_arr: np.ndarray, bounds: list, params: Dict,
+                     n_workers: int) -> List[float]:
+        """Обучение фолдов в пуле процессов; признаки передаются через memmap-файл"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            x_path, y_path = os.path.join(tmp_dir, 'X.npy'), os.path.join(tmp_dir, 'y.npy')
+            np.save(x_path, X_arr)
+            np.save(y_path, y_arr)
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                futures = [pool.submit(_fit_fold_memmap, x_path, y_path, b, params) for b in bounds]
+                return [future.result() for future in futures]
+
+    def _data_hash(self, X_arr: np.ndarray, y_arr: np.ndarray, columns: list) -> str:
+        """Хэш данных для ключа кэша"""
+        digest = hashlib.sha1()
+        digest.update(json.dumps(columns).encode())
+        digest.update(X_arr.tobytes())
+        digest.update(y_arr.tobytes())
+        return digest.hexdigest()
+
+    def _fold_key(self, data_hash: str, bounds: Tuple[int, int, int]) -> str:
+        """Ключ кэша фолда: данные, параметры модели (без n_jobs) и границы"""
+        params = {k: v for k, v in self.model_params.items() if k != 'n_jobs'}
+        payload = json.dumps([data_hash, params, list(bounds)], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _read_cache(self, key: str):
+        path = os.path.join(self.cache_dir, f'{key}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)['mae']
+
+    def _write_cache(self, key: str, mae: float):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, f'{key}.json'), 'w') as f:
+            json.dump({'mae': mae}, f)
+
+    def predict(self, X) -> np.ndarray:
         """Прогнозирование спроса"""
         if self.model is None:
             raise ValueError("Модель не обучена. Сначала вызовите train_demand_model()")
-        return self.model.predict(X)
-    
+        return self.model.predict(model_input(self.model, X, self.feature_columns))
+
     def get_feature_importance(self) -> pd.DataFrame:
         """Получение важности признаков"""
         return self.feature_importance
+
+
+def model_input(model, X, columns: list):
+    """Признаки в том виде, в котором обучалась модель
+
+    Модели, обученные на таблице, получают таблицу с теми же колонками,
+    остальные — float32-матрицу в порядке columns.
+    """
+    if hasattr(model, 'feature_names_in_'):
+        return X if isinstance(X, pd.DataFrame) else pd.DataFrame(X, columns=columns)
+    if isinstance(X, pd.DataFrame):
+        X = X[columns]
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def _fit_fold(X: np.ndarray, y: np.ndarray, bounds: Tuple[int, int, int], params: Dict) -> float:
+    """Обучение и оценка модели на одном фолде"""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error
+    train_end, test_start, test_end = bounds
+    model = RandomForestRegressor(**params)
+    model.fit(X[:train_end], y[:train_end])
+    y_pred = model.predict(X[test_start:test_end])
+    return float(mean_absolute_error(y[test_start:test_end], y_pred))
+
+
+def _fit_fold_memmap(x_path: str, y_path: str, bounds: Tuple[int, int, int], params: Dict) -> float:
+    """Фолд в дочернем процессе: данные читаются из общего memmap-файла"""
+    return _fit_fold(np.load(x_path, mmap_mode='r'), np.load(y_path, mmap_mode='r'), bounds, params)
@@ -0,0 +1,155 @@
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable
+
+
+class Stage:
+    """Этап конвейера: функция от результатов входных этапов и настройки
+
+    Функция вызывается с результатами inputs в том же порядке. Ключ кэша не
+    учитывает код функции: при его изменении нужно увеличить version или
+    добавить в config source_version() модулей, которые этап вызывает.
+    Этапы, запускающие пул процессов, отмечаются in_main_thread: они
+    выполняются в главном потоке без работающих потоков конвейера.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Iterable[str] = (), config: Dict = None,
+                 version: str = '1', in_main_thread: bool = False):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.config = config or {}
+        self.version = version
+        self.in_main_thread = in_main_thread
+
+
+def source_version(*objects) -> str:
+    """Хэш исходного кода модулей, в которых определены объекты
+
+    Добавляется в настройку этапа, чтобы правка кода этих модулей сбрасывала кэш.
+    """
+    digest = hashlib.sha1()
+    for path in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """Граф этапов с кэшем результатов по хэшу входов
+
+    Ключ этапа — хэш его названия, версии, настройки и ключей входных
+    этапов, поэтому изменение настройки сбрасывает кэш только у этого этапа
+    и зависящих от него. Этапы с готовым результатом в кэше не выполняются,
+    а их результат загружается с диска, только если он нужен дальше.
+    Независимые этапы выполняются одновременно в пуле потоков, этапы
+    in_main_thread — в главном потоке, когда потоки пула остановлены.
+    """
+
+    def __init__(self, cache_dir: str = None, max_workers: int = None):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or 4
+        self.stages = {}
+        self.executed = []
+        self.timings = {}
+
+    def add(self, name: str, func: Callable, inputs: Iterable[str] = (), config: Dict = None,
+            version: str = '1', in_main_thread: bool = False) -> 'Pipeline':
+        """Добавление этапа; входные этапы должны быть добавлены раньше"""
+        for dependency in inputs:
+            if dependency not in self.stages:
+                raise ValueError(f"Этап {name} зависит от неизвестного этапа {dependency}")
+        self.stages[name] = Stage(name, func, inputs, config, version, in_main_thread)
+        return self
+
+    def keys(self) -> Dict[str, str]:
+        """Ключи кэша всех этапов (в порядке добавления, входы раньше зависимых)"""
+        keys = {}
+        for name, stage in self.stages.items():
+            payload = json.dumps([name, stage.version, stage.config, [keys[i] for i in stage.inputs]],
+                                 sort_keys=True, default=str)
+            keys[name] = hashlib.sha1(payload.encode()).hexdigest()
+        return keys
+
+    def run(self, targets: Iterable[str] = None) -> Dict:
+        """Выполнение этапов, нужных для targets (по умолчанию — всех)"""
+        keys = self.keys()
+        targets = list(targets) if targets is not None else list(self.stages)
+        self.executed = []
+        self.timings = {}
+
+        # Выполняются этапы без кэша; загружаются кэшированные входы выполняемых этапов и сами цели
+        to_run, to_load = set(), set(targets)
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name in to_run or self._cached(name, keys[name]):
+                continue
+            to_run.add(name)
+            to_load.discard(name)
+            for dependency in self.stages[name].inputs:
+                to_load.add(dependency)
+                pending.append(dependency)
+        to_load -= to_run
+
+        results = {name: self._load(name, keys[name]) for name in to_load}
+        self._execute(to_run, keys, results)
+        return {name: results[name] for name in targets}
+
+    def _execute(self, to_run: set, keys: Dict[str, str], results: Dict):
+        """Запуск этапов по готовности входов"""
+        remaining = [name for name in self.stages if name in to_run]
+        running = {}
+        pool = None
+        try:
+            while remaining or running:
+                ready = [n for n in remaining if all(i in results for i in self.stages[n].inputs)]
+                for name in [n for n in ready if not self.stages[n].in_main_thread]:
+                    pool = pool or ThreadPoolExecutor(max_workers=self.max_workers)
+                    remaining.remove(name)
+                    running[pool.submit(self._run_stage, name, keys[name], results)] = name
+                if not running:
+                    # Остались только этапы главного потока: потоки пула завершаются до запуска процессов
+                    if pool is not None:
+                        pool.shutdown()
+                        pool = None
+                    name = next(n for n in ready if self.stages[n].in_main_thread)
+                    remaining.remove(name)
+                    results[name] = self._run_stage(name, keys[name], results)
+                    self.executed.append(name)
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    self.executed.append(name)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def _run_stage(self, name: str, key: str, results: Dict):
+        stage = self.stages[name]
+        started = time.perf_counter()
+        result = stage.func(*[results[i] for i in stage.inputs])
+        self.timings[name] = time.perf_counter() - started
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            import joblib
+            path = self._path(name, key)
+            joblib.dump(result, path + '.tmp')
+            os.replace(path + '.tmp', path)
+        return result
+
+    def _cached(self, name: str, key: str) -> bool:
+        return self.cache_dir is not None and os.path.exists(self._path(name, key))
+
+    def _load(self, name: str, key: str):
+        import joblib
+        return joblib.load(self._path(name, key))
+
+    def _path(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{name}-{key[:16]}.joblib')
@@ -1,56 +1,183 @@
-import matplotlib.pyplot as plt
+import base64
+import hashlib
+import html
+import io
+import json
+import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+COLORS = ['#2E8B57', '#3CB371', '#20B2AA']
+OTHERS_COLOR = '#B0B0B0'
+OTHERS_LABEL = 'Прочие'
+
 
 class DashboardCreator:
-    def __init__(self):
-        self.colors = ['#2E8B57', '#3CB371', '#20B2AA']
-    
-    def create_dashboard(self, business_metrics: dict, feature_importance: pd.DataFrame = None):
+    """Дашборд бизнес-метрик
+
+    Без output_dir дашборд показывается в окне через pyplot. С output_dir
+    отчеты (png, svg, html) записываются на диск без интерактивного бэкенда,
+    и дашборд перерисовывается, только если изменились его входные данные.
+    matplotlib импортируется при первой отрисовке.
+    """
+
+    def __init__(self, output_dir: str = None, formats: tuple = ('png',), top_n: int = 20, dpi: int = 100):
+        self.colors = COLORS
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.top_n = top_n
+        self.dpi = dpi
+
+    def create_dashboard(self, business_metrics: dict, feature_importance: pd.DataFrame = None,
+                         name: str = 'dashboard'):
         """Создание визуализаций"""
-        revenue_df = business_metrics['revenue_analysis']
-        
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
-        
-        # График 1: Выручка по категориям
-        self._plot_revenue_by_category(ax1, revenue_df)
-        
-        # График 2: Распределение ABC
-        self._plot_abc_distribution(ax2, revenue_df)
-        
-        # График 3: Важность признаков (топ-10)
-        if feature_importance is not None:
-            self._plot_feature_importance(ax3, feature_importance)
-        
-        # График 4: Уровень сервиса
-        self._plot_service_level(ax4, business_metrics['service_level'])
-        
-        plt.tight_layout()
+        if self.output_dir is not None:
+            return self.render(business_metrics, feature_importance, name)
+
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(15, 10))
+        _draw(fig, self.dashboard_data(business_metrics, feature_importance))
         plt.show()
-    
-    def _plot_revenue_by_category(self, ax, revenue_df: pd.DataFrame):
-        """График выручки по категориям"""
-        abc_colors = revenue_df['abc_category'].map({'A': self.colors[0], 'B': self.colors[1], 'C': self.colors[2]})
-        ax.bar(revenue_df['part_name'], revenue_df['revenue'] / 1e6, color=abc_colors)
-        ax.set_title('Выручка по запчастям (млн руб)')
-        ax.set_ylabel('Млн рублей')
-        ax.tick_params(axis='x', rotation=45)
-    
-    def _plot_abc_distribution(self, ax, revenue_df: pd.DataFrame):
-        """График распределения ABC категорий"""
+
+    def render(self, business_metrics: dict, feature_importance: pd.DataFrame = None,
+               name: str = 'dashboard') -> List[str]:
+        """Запись отчетов дашборда на диск, возвращает пути к файлам"""
+        data = self.dashboard_data(business_metrics, feature_importance)
+        return _render_report(data, self.output_dir, name, self.formats, self.dpi)
+
+    def render_many(self, dashboards: Dict[str, tuple], n_workers: int = None) -> Dict[str, List[str]]:
+        """Отчеты по группам запчастей или складам в пуле процессов
+
+        dashboards: название → (business_metrics, feature_importance).
+        """
+        names = list(dashboards)
+        data = [self.dashboard_data(*dashboards[name]) for name in names]
+        n_workers = min(n_workers or os.cpu_count() or 1, len(names))
+        args = ([self.output_dir] * len(names), names, [self.formats] * len(names), [self.dpi] * len(names))
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                paths = list(pool.map(_render_report, data, *args))
+        else:
+            paths = list(map(_render_report, data, *args))
+        return dict(zip(names, paths))
+
+    def dashboard_data(self, business_metrics: dict, feature_importance: pd.DataFrame = None) -> Dict:
+        """Данные для графиков: только то, что рисуется, в виде простых списков"""
+        revenue_df = business_metrics['revenue_analysis']
+        top_revenue = self._top_revenue(revenue_df)
         abc_counts = revenue_df['abc_category'].value_counts()
-        ax.pie(abc_counts.values, labels=abc_counts.index, autopct='%1.1f%%', colors=self.colors)
-        ax.set_title('Распределение по ABC категориям')
-    
-    def _plot_feature_importance(self, ax, feature_importance: pd.DataFrame):
-        """График важности признаков"""
-        top_features = feature_importance.head(10)
-        ax.barh(top_features['feature'], top_features['importance'])
-        ax.set_title('Топ-10 важных признаков для прогноза')
-        ax.set_xlabel('Важность')
-    
-    def _plot_service_level(self, ax, service_level: float):
-        """График уровня сервиса"""
-        ax.bar(['Уровень сервиса'], [service_level * 100], color='skyblue')
-        ax.set_ylim(0, 100)
-        ax.set_ylabel('Процент')
-        ax.set_title(f'Уровень сервиса: {service_level:.1%}')
+        data = {
+            'revenue': {
+                'labels': top_revenue['part_name'].astype(str).tolist(),
+                'values': (top_revenue['revenue'] / 1e6).astype(float).tolist(),
+                'colors': top_revenue['color'].tolist()
+            },
+            'abc': {'labels': abc_counts.index.tolist(), 'values': abc_counts.astype(int).tolist()},
+            'features': None,
+            'service_level': float(business_metrics['service_level']),
+            'anomalies_count': business_metrics.get('anomalies_count'),
+            'colors': self.colors
+        }
+        if data['anomalies_count'] is not None:
+            data['anomalies_count'] = int(data['anomalies_count'])
+        if feature_importance is not None:
+            top_features = feature_importance.head(10)
+            data['features'] = {'labels': top_features['feature'].astype(str).tolist(),
+                                'values': top_features['importance'].astype(float).tolist()}
+        return data
+
+    def _top_revenue(self, revenue_df: pd.DataFrame) -> pd.DataFrame:
+        """Топ-N запчастей по выручке, остальные — одним столбцом «Прочие»"""
+        abc_colors = {'A': self.colors[0], 'B': self.colors[1], 'C': self.colors[2]}
+        ranked = revenue_df.sort_values('revenue', ascending=False)
+        top = ranked.head(self.top_n)
+        result = pd.DataFrame({'part_name': top['part_name'], 'revenue': top['revenue'],
+                               'color': top['abc_category'].map(abc_colors)})
+        if len(ranked) > self.top_n:
+            others = pd.DataFrame({'part_name': [OTHERS_LABEL], 'revenue': [ranked['revenue'].iloc[self.top_n:].sum()],
+                                   'color': [OTHERS_COLOR]})
+            result = pd.concat([result, others], ignore_index=True)
+        return result
+
+
+def _render_report(data: Dict, output_dir: str, name: str, formats: tuple, dpi: int) -> List[str]:
+    """Отрисовка одного дашборда, если его данные изменились с прошлого раза"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [os.path.join(output_dir, f'{name}.{fmt}') for fmt in formats]
+    digest = hashlib.sha1(json.dumps([data, list(formats), dpi], sort_keys=True).encode()).hexdigest()
+    hash_path = os.path.join(output_dir, f'{name}.hash')
+    if os.path.exists(hash_path) and all(os.path.exists(path) for path in paths):
+        with open(hash_path) as f:
+            if f.read() == digest:
+                return paths
+
+    # Figure без pyplot: не создается окно и не выбирается интерактивный бэкенд
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(15, 10))
+    _draw(fig, data)
+    png = None
+    for fmt, path in zip(formats, paths):
+        if fmt == 'html':
+            if png is None:
+                png = _to_png(fig, dpi)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(_html_report(name, data, png))
+        else:
+            fig.savefig(path, format=fmt, dpi=dpi)
+    with open(hash_path, 'w') as f:
+        f.write(digest)
+    return paths
+
+
+def _to_png(fig, dpi: int) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
+
+
+def _html_report(name: str, data: Dict, png: bytes) -> str:
+    """HTML-отчет: ключевые показатели и встроенное изображение дашборда"""
+    rows = [('Уровень сервиса', f"{data['service_level']:.1%}")]
+    if data['anomalies_count'] is not None:
+        rows.append(('Обнаружено аномалий', str(data['anomalies_count'])))
+    rows += [(f'Категория {label}', str(value)) for label, value in zip(data['abc']['labels'], data['abc']['values'])]
+    table = ''.join(f'<tr><td>{html.escape(k)}</td><td>{html.escape(v)}</td></tr>' for k, v in rows)
+    image = base64.b64encode(png).decode()
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(name)}</title></head>'
+            f'<body><h1>{html.escape(name)}</h1><table>{table}</table>'
+            f'<img src="data:image/png;base64,{image}" alt="{html.escape(name)}"></body></html>')
+
+
+def _draw(fig, data: Dict):
+    """Четыре графика дашборда на фигуре"""
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+
+    # График 1: Выручка по категориям
+    revenue = data['revenue']
+    ax1.bar(revenue['labels'], revenue['values'], color=revenue['colors'])
+    ax1.set_title('Выручка по запчастям (млн руб)')
+    ax1.set_ylabel('Млн рублей')
+    ax1.tick_params(axis='x', rotation=45)
+
+    # График 2: Распределение ABC
+    ax2.pie(data['abc']['values'], labels=data['abc']['labels'], autopct='%1.1f%%', colors=data['colors'])
+    ax2.set_title('Распределение по ABC категориям')
+
+    # График 3: Важность признаков (топ-10)
+    if data['features'] is not None:
+        ax3.barh(data['features']['labels'], data['features']['values'])
+        ax3.set_title('Топ-10 важных признаков для прогноза')
+        ax3.set_xlabel('Важность')
+
+    # График 4: Уровень сервиса
+    service_level = data['service_level']
+    ax4.bar(['Уровень сервиса'], [service_level * 100], color='skyblue')
+    ax4.set_ylim(0, 100)
+    ax4.set_ylabel('Процент')
+    title = f'Уровень сервиса: {service_level:.1%}'
+    if data['anomalies_count'] is not None:
+        title += f'\nОбнаружено аномалий: {data["anomalies_count"]}'
+    ax4.set_title(title)
+
+    fig.tight_layout()
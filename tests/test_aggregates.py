@@ -0,0 +1,60 @@
+import gc
+import weakref
+import numpy as np
+from src.analysis.aggregates import AggregateContext
+from src.data.generator import DataGenerator
+
+
+def test_context_is_shared_and_memoized():
+    """Анализаторы получают общий контекст, агрегаты считаются один раз"""
+    df = DataGenerator().generate_business_data('2022-01-01', '2022-03-01')
+    context = AggregateContext.for_frame(df)
+    assert AggregateContext.for_frame(df) is context
+    assert AggregateContext.for_frame(df.copy()) is not context
+    assert context.per_part is context.per_part
+
+    expected = df.groupby('part_name')['demand'].agg(['mean', 'std', 'sum'])
+    np.testing.assert_allclose(context.per_part['avg_demand'], expected['mean'])
+    np.testing.assert_allclose(context.per_part['demand_std'], expected['std'])
+    assert (context.per_part['demand_sum'] == expected['sum']).all()
+
+
+def test_context_invalidates_on_change():
+    """Изменение таблицы сбрасывает запомненные агрегаты"""
+    df = DataGenerator().generate_business_data('2022-01-01', '2022-03-01')
+    context = AggregateContext(df)
+    n_rows = context.totals['n_rows']
+    df.drop(df.index[:5], inplace=True)
+    assert context.totals['n_rows'] == n_rows - 5
+
+    df.loc[df.index, 'stock'] = 0
+    assert context.totals['shortage_count'] == len(df)
+
+
+def test_context_recomputes_after_in_place_update():
+    """Изменение значений на месте без смены размера и колонок пересчитывает агрегаты"""
+    df = DataGenerator().generate_business_data('2022-01-01', '2022-03-01')
+    context = AggregateContext.for_frame(df)
+    demand_sum = context.per_part['demand_sum'].sum()
+    anomalies = context.totals['anomalies_count']
+
+    df.loc[df.index[0], 'demand'] += 100
+    assert context.per_part['demand_sum'].sum() == demand_sum + 100
+
+    df['is_anomaly'] = True
+    assert AggregateContext.for_frame(df).totals['anomalies_count'] == len(df) != anomalies
+
+    df.loc[df.index[0], 'part_name'] = 'Новая запчасть'
+    assert 'Новая запчасть' in context.per_part.index
+
+
+def test_shared_context_does_not_keep_frame_alive():
+    """Общий контекст не удерживает таблицу: после удаления она собирается сборщиком мусора"""
+    df = DataGenerator(n_parts=5).generate_business_data('2022-01-01', '2022-02-01')
+    assert AggregateContext.for_frame(df).totals['n_rows'] == len(df)
+    key, frame_ref = id(df), weakref.ref(df)
+
+    del df
+    gc.collect()
+    assert frame_ref() is None
+    assert key not in AggregateContext._registry
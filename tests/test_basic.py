@@ -13,3 +13,11 @@ def test_imports():
         assert True
     except ImportError:
         assert False, "Ошибка импорта модулей"
+
+def test_main_import_is_lazy():
+    """Импорт main не загружает sklearn, joblib и matplotlib"""
+    import subprocess
+    import sys
+    code = "import sys, main; print(sorted(m for m in ('sklearn', 'joblib', 'matplotlib') if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
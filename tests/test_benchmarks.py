@@ -0,0 +1,56 @@
+import importlib.util
+import os
+
+_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'run_benchmarks.py')
+_spec = importlib.util.spec_from_file_location('run_benchmarks', _PATH)
+run_benchmarks = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(run_benchmarks)
+
+
+def _report(seconds: dict, parts: int = 100, n_estimators: int = 20) -> dict:
+    stages = {name: {'seconds': value, 'rows_per_second': 1000 / value, 'peak_mb': 10.0}
+              for name, value in seconds.items()}
+    return {'config': {'start': '2022-01-01', 'end': '2024-01-01', 'repeat': 3, 'n_estimators': n_estimators},
+            'results': [{'parts': parts, 'rows': 1000, 'stages': stages}]}
+
+
+def test_regression_gate_flags_slow_stages():
+    """Замедление сверх порога дает код 1, шум коротких этапов и ускорения — нет"""
+    baseline = _report({'training': 1.0, 'metrics': 0.01, 'anomalies': 0.5})
+    report = _report({'training': 1.4, 'metrics': 0.05, 'anomalies': 0.3})
+
+    assert run_benchmarks.compare(report, baseline, 0.25, 0.05) == [(100, 'training', 1.4)]
+    assert run_benchmarks.regression_gate(report, baseline, 0.25, 0.05) == 1
+    assert run_benchmarks.regression_gate(report, baseline, 0.5, 0.05) == 0
+
+    # Размеры каталога, которых нет в базе, не сравниваются
+    report['results'].append(_report({'training': 5.0}, parts=10)['results'][0])
+    assert run_benchmarks.regression_gate(report, baseline, 0.5, 0.05) == 0
+
+
+def test_regression_gate_rejects_incomparable_runs():
+    """Другие параметры запуска, строки или пропавший этап базы — ошибка, а не успешная проверка"""
+    baseline = _report({'training': 1.0, 'metrics': 0.5})
+    assert run_benchmarks.comparison_problems(_report({'training': 1.0, 'metrics': 0.5}), baseline) == []
+
+    other_config = _report({'training': 1.0, 'metrics': 0.5}, n_estimators=100)
+    missing_stage = _report({'metrics': 0.5})
+    other_rows = _report({'training': 1.0, 'metrics': 0.5})
+    other_rows['results'][0]['rows'] = 2000
+    for report in (other_config, missing_stage, other_rows, _report({'training': 1.0}, parts=10)):
+        assert len(run_benchmarks.comparison_problems(report, baseline)) == 1
+        assert run_benchmarks.regression_gate(report, baseline, 0.25, 0.05) == 1
+
+
+def test_plot_includes_memory_panel(tmp_path):
+    """При замере памяти на графике появляется третья панель"""
+    report = _report({'training': 1.0, 'metrics': 0.2})
+    report['results'].append(_report({'training': 3.0, 'metrics': 0.5}, parts=1000)['results'][0])
+    fig = run_benchmarks.plot_curves(report, str(tmp_path / 'curves.png'))
+    assert len(fig.axes) == 3
+    assert (tmp_path / 'curves.png').stat().st_size > 0
+
+    for result in report['results']:
+        for stats in result['stages'].values():
+            del stats['peak_mb']
+    assert len(run_benchmarks.plot_curves(report, str(tmp_path / 'curves.png')).axes) == 2
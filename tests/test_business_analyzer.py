@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.analysis.aggregates import AggregateContext
+from src.analysis.business_analyzer import BusinessAnalyzer
+from src.analysis.stock_policy import BufferStockPolicy, ReorderPointPolicy, ServiceLevelPolicy, StockPolicy
+from src.data.generator import DataGenerator
+
+
+def _reference_recommendations(df: pd.DataFrame, revenue_df: pd.DataFrame) -> pd.DataFrame:
+    """Исходная реализация через iterrows"""
+    rows = []
+    for _, part in revenue_df.iterrows():
+        part_data = df[df['part_name'] == part['part_name']]
+        avg_demand = part_data['demand'].mean()
+        current_stock = part_data['stock'].iloc[-1]
+        optimal_stock = avg_demand * 7 + avg_demand * 1.5
+        status = 'Оптимальный' if current_stock >= optimal_stock * 0.8 else 'Недостаточный'
+        if part['abc_category'] == 'A':
+            priority = 'Высокий'
+            action = 'Увеличить страховой запас' if status == 'Недостаточный' else 'Поддерживать текущий уровень'
+        elif part['abc_category'] == 'B':
+            priority = 'Средний'
+            action = 'Оптимизировать запас' if status == 'Недостаточный' else 'Мониторить'
+        else:
+            priority, action = 'Низкий', 'Минимизировать запас'
+        rows.append({'Запчасть': part['part_name'], 'ABC Категория': part['abc_category'],
+                     'Приоритет': priority, 'Текущий запас': current_stock,
+                     'Рекомендуемый запас': int(optimal_stock), 'Статус': status, 'Действие': action})
+    return pd.DataFrame(rows)
+
+
+def test_recommendations_match_reference():
+    """Векторные рекомендации совпадают с построчной реализацией"""
+    df = DataGenerator(n_parts=60).generate_business_data('2022-01-01', '2022-03-01')
+    analyzer = BusinessAnalyzer()
+    revenue_df = analyzer.analyze_business_metrics(df)['revenue_analysis']
+
+    result = analyzer.generate_recommendations(df, revenue_df)
+    expected = _reference_recommendations(df, revenue_df)
+    assert set(result['Статус']) == {'Оптимальный', 'Недостаточный'}
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    # Точка заказа выводится только для политики (s, S)
+    result = BusinessAnalyzer(ReorderPointPolicy()).generate_recommendations(df, revenue_df)
+    assert list(result.columns) == list(expected.columns) + ['Точка заказа']
+
+
+def test_scenarios_match_single_policy_runs():
+    """Пакетный расчет сценариев совпадает с отдельными запусками политики"""
+    df = DataGenerator(n_parts=30).generate_business_data('2022-01-01', '2022-03-01')
+    stats = BusinessAnalyzer()._part_demand_stats(AggregateContext(df))
+    lead_times = {name: 3 + i % 10 for i, name in enumerate(stats.index)}
+    policy = ReorderPointPolicy(lead_times=lead_times)
+
+    scenarios = policy.evaluate_scenarios(stats, service_levels=[0.9, 0.99], lead_times=[5, 14])
+    assert len(scenarios) == 2 * 2 * len(stats)
+    for (level, lead_time), group in scenarios.groupby(['service_level', 'lead_time']):
+        single = ReorderPointPolicy(lead_time=lead_time, service_level=level).compute(stats)
+        np.testing.assert_allclose(group['order_up_to'], single['order_up_to'])
+
+    per_part = policy.evaluate_scenarios(stats, service_levels=[0.95])
+    np.testing.assert_allclose(per_part['reorder_point'], policy.compute(stats)['reorder_point'])
+    assert (policy.compute(stats)['order_up_to'] > policy.compute(stats)['reorder_point']).all()
+
+
+def test_buffer_policy_collapses_service_levels():
+    """Буферная политика не зависит от уровня сервиса: один сценарий на срок поставки"""
+    stats = pd.DataFrame({'avg_demand': [10.0, 4.0], 'demand_std': [1.0, 5.0]}, index=['a', 'b'])
+    scenarios = BufferStockPolicy().evaluate_scenarios(stats, service_levels=[0.9, 0.99], lead_times=[5, 14])
+    assert len(scenarios) == 2 * len(stats)
+    assert scenarios['service_level'].isna().all()
+    np.testing.assert_allclose(scenarios['order_up_to'], [65.0, 26.0, 155.0, 62.0])
+
+    with pytest.raises(TypeError):
+        StockPolicy()
+
+
+def test_service_level_policy_grows_with_variance():
+    """Страховой запас растет с разбросом спроса и уровнем сервиса"""
+    stats = pd.DataFrame({'avg_demand': [10.0, 10.0], 'demand_std': [1.0, 5.0]}, index=['a', 'b'])
+    low = ServiceLevelPolicy(lead_time=4, service_level=0.9).compute(stats)['order_up_to']
+    high = ServiceLevelPolicy(lead_time=4, service_level=0.99).compute(stats)['order_up_to']
+    assert low['b'] > low['a'] > 40
+    assert (high > low).all()
+
+
+def test_service_level_is_validated():
+    """Уровень сервиса вне (0, 1) отклоняется, а не дает бесконечный страховой запас"""
+    stats = pd.DataFrame({'avg_demand': [10.0], 'demand_std': [1.0]}, index=['a'])
+    for level in (0, 1, 1.5, -0.1, float('nan')):
+        with pytest.raises(ValueError):
+            ServiceLevelPolicy(service_level=level)
+        with pytest.raises(ValueError):
+            ReorderPointPolicy().evaluate_scenarios(stats, service_levels=[0.9, level])
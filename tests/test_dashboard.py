@@ -0,0 +1,44 @@
+import os
+from src.analysis.business_analyzer import BusinessAnalyzer
+from src.data.generator import DataGenerator
+from src.visualization.dashboard import DashboardCreator
+
+
+def _business_metrics(n_parts):
+    df = DataGenerator(n_parts=n_parts).generate_business_data('2022-01-01', '2022-02-01')
+    return BusinessAnalyzer().analyze_business_metrics(df)
+
+
+def test_render_writes_reports_and_skips_unchanged(tmp_path):
+    """Отчеты пишутся на диск, повторная отрисовка с теми же данными пропускается"""
+    creator = DashboardCreator(str(tmp_path), formats=('png', 'svg', 'html'), top_n=5)
+    metrics = _business_metrics(30)
+    paths = creator.render(metrics)
+    assert [os.path.basename(p) for p in paths] == ['dashboard.png', 'dashboard.svg', 'dashboard.html']
+    assert all(os.path.getsize(p) > 0 for p in paths)
+
+    os.utime(paths[0], (0, 0))
+    creator.render(metrics)
+    assert os.path.getmtime(paths[0]) == 0
+
+    metrics['service_level'] = 0.5
+    creator.render(metrics)
+    assert os.path.getmtime(paths[0]) != 0
+
+
+def test_revenue_chart_is_downsampled():
+    """На графике выручки топ-N запчастей и столбец «Прочие» с остатком выручки"""
+    metrics = _business_metrics(30)
+    data = DashboardCreator(top_n=5).dashboard_data(metrics)
+    assert len(data['revenue']['labels']) == 6
+    assert data['revenue']['labels'][-1] == 'Прочие'
+    total = metrics['revenue_analysis']['revenue'].sum() / 1e6
+    assert abs(sum(data['revenue']['values']) - total) < 1e-6
+
+
+def test_render_many_in_parallel(tmp_path):
+    """Дашборды нескольких групп рисуются в пуле процессов"""
+    metrics = _business_metrics(10)
+    paths = DashboardCreator(str(tmp_path)).render_many({'склад_1': (metrics, None), 'склад_2': (metrics, None)},
+                                                       n_workers=2)
+    assert all(os.path.exists(p) for group in paths.values() for p in group)
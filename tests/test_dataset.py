@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from src.data.dataset import DatasetStore
+from src.data.generator import DataGenerator
+
+
+def test_roundtrip_with_chunked_writes(tmp_path):
+    """Данные, записанные блоками, читаются в исходном порядке и значениях"""
+    generator = DataGenerator(n_parts=20)
+    df = generator.generate_business_data('2022-11-01', '2023-02-01')
+    store = DatasetStore(str(tmp_path))
+    for chunk in generator.iter_business_data('2022-11-01', '2023-02-01', chunk_rows=500):
+        store.write(chunk)
+
+    result = DatasetStore(str(tmp_path)).read()
+    assert isinstance(result['part_name'].dtype, pd.CategoricalDtype)
+    assert result['demand'].dtype == np.int32
+    expected = df.reset_index(drop=True)
+    pd.testing.assert_frame_equal(result.astype({'part_name': str}), expected,
+                                  check_dtype=False)
+
+
+def test_filters_and_projection(tmp_path):
+    """Фильтры по датам и запчастям и проекция колонок"""
+    df = DataGenerator(n_parts=30).generate_business_data('2022-12-01', '2023-01-31')
+    store = DatasetStore(str(tmp_path), n_buckets=4)
+    store.write(df)
+
+    parts = list(df['part_name'].unique()[:3])
+    result = store.read(columns=['demand'], start_date='2022-12-30', end_date='2023-01-02', parts=parts)
+    mask = df['part_name'].isin(parts) & df['date'].between('2022-12-30', '2023-01-02')
+    assert list(result.columns) == ['date', 'part_name', 'demand']
+    assert len(result) == mask.sum() == 3 * 4
+    np.testing.assert_array_equal(result['demand'], df.loc[mask, 'demand'])
+    assert store._segments(store._to_days('2023-01-05'), None, np.array([0], dtype=np.int32))
+    assert len(store._segments(None, None, np.array([0], dtype=np.int32))) == 2
+
+
+def test_roundtrip_without_anomaly_flag(tmp_path):
+    """История без флага is_anomaly записывается и читается, флаг заполняется False"""
+    generator = DataGenerator(n_parts=10)
+    df = generator.generate_business_data('2022-12-01', '2023-01-31')
+    store = DatasetStore(str(tmp_path))
+    store.write(df.drop(columns='is_anomaly').iloc[:300])
+    store.write(df.iloc[300:])
+
+    result = DatasetStore(str(tmp_path)).read()
+    expected = df.reset_index(drop=True).assign(is_anomaly=lambda d: d['is_anomaly'] & (d.index >= 300))
+    pd.testing.assert_frame_equal(result.astype({'part_name': str}), expected, check_dtype=False)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+from src.features.store import IncrementalFeatureStore
+
+
+def test_incremental_features_match_batch(tmp_path):
+    """Признаки по партиям совпадают с расчетом по всей истории"""
+    df = DataGenerator(n_parts=8).generate_business_data('2022-01-01', '2022-03-01')
+    engineer = FeatureEngineer(lags=(1, 7), windows=(7, 14))
+    expected = engineer.create_features(df)
+
+    store = IncrementalFeatureStore(engineer)
+    cutoffs = pd.to_datetime(['2022-01-05', '2022-01-20', '2022-01-21'])
+    parts = [df[df['date'] < cutoffs[0]]]
+    parts += [df[(df['date'] >= lo) & (df['date'] < hi)] for lo, hi in zip(cutoffs[:-1], cutoffs[1:])]
+    parts.append(df[df['date'] >= cutoffs[-1]])
+
+    results = [store.update(parts[0]), store.update(parts[1])]
+    store.save(tmp_path / 'state.npz')
+    store = IncrementalFeatureStore.load(tmp_path / 'state.npz')
+    results += [store.update(batch) for batch in parts[2:]]
+    result = pd.concat(results)
+
+    assert result.index.equals(expected.index)
+    for column in engineer.feature_columns:
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-6)
+
+
+def test_rejects_out_of_order_records():
+    """Записи не позже последней даты запчасти отклоняются"""
+    df = DataGenerator().generate_business_data('2022-01-01', '2022-01-10')
+    store = IncrementalFeatureStore()
+    store.update(df)
+    try:
+        store.update(df.tail(5))
+        assert False, "Ожидалась ошибка"
+    except ValueError:
+        pass
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+
+
+def _reference_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Исходная реализация: маска по каждой запчасти"""
+    df = df.copy()
+    for part in df['part_name'].unique():
+        part_mask = df['part_name'] == part
+        df.loc[part_mask, 'demand_lag_7'] = df.loc[part_mask, 'demand'].shift(7)
+        df.loc[part_mask, 'demand_rolling_mean_7'] = df.loc[part_mask, 'demand'].rolling(7).mean()
+        df.loc[part_mask, 'demand_rolling_std_7'] = df.loc[part_mask, 'demand'].rolling(7).std()
+    df['stock_demand_ratio'] = df['stock'] / (df['demand'] + 1)
+    return df.dropna()
+
+
+def test_grouped_features_match_reference():
+    """Групповые признаки совпадают с исходной реализацией"""
+    df = DataGenerator(n_parts=20).generate_business_data('2022-01-01', '2022-04-01')
+    expected = _reference_features(df)
+    engineer = FeatureEngineer()
+    result = engineer.create_features(df)
+
+    assert result.index.equals(expected.index)
+    for column in engineer.window_feature_columns + ['stock_demand_ratio']:
+        assert result[column].dtype == np.float32
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-6)
+
+
+def test_features_do_not_depend_on_row_order():
+    """Перемешанные строки дают те же признаки"""
+    df = DataGenerator().generate_business_data('2022-01-01', '2022-03-01')
+    engineer = FeatureEngineer(lags=(1, 7), windows=(3, 14), compact=False)
+    result = engineer.create_features(df)
+    shuffled = engineer.create_features(df.sample(frac=1, random_state=0)).loc[result.index]
+    pd.testing.assert_frame_equal(result, shuffled, check_exact=False)
+
+
+def test_feature_matrix_matches_get_dummies():
+    """Float32-матрица совпадает с one-hot таблицей get_dummies и не зависит от набора дат"""
+    engineer = FeatureEngineer()
+    df = engineer.create_features(DataGenerator().generate_business_data('2022-01-01', '2022-03-01'))
+    X, y = engineer.prepare_feature_matrix(df)
+    expected = pd.get_dummies(df[engineer.feature_columns], columns=['day_of_week', 'month', 'quarter'])
+    expected = expected.reindex(columns=engineer.training_columns, fill_value=False)
+
+    assert X.dtype == np.float32 and X.flags['C_CONTIGUOUS']
+    assert X.shape == (len(df), len(engineer.training_columns))
+    np.testing.assert_array_equal(X, expected.to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(y, df['demand'].to_numpy())
+
+
+def test_cyclical_encoding():
+    """Циклическое кодирование: соседние месяцы через границу года близки"""
+    engineer = FeatureEngineer(encoding='cyclical')
+    df = engineer.create_features(DataGenerator().generate_business_data('2022-12-01', '2023-02-01'))
+    X, _ = engineer.prepare_features_for_training(df)
+
+    assert len(engineer.training_columns) == len(engineer.numeric_columns) + 5
+    december = X.loc[df['month'] == 12, ['month_sin', 'month_cos']].iloc[0]
+    january = X.loc[df['month'] == 1, ['month_sin', 'month_cos']].iloc[0]
+    assert np.hypot(*(december - january)) < 0.6
+    np.testing.assert_array_equal(X['quarter'], df['quarter'])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from main import AviationDataAnalyzer
+from src.analysis.business_analyzer import BusinessAnalyzer
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+from src.models import trainer as trainer_module
+from src.models.forecaster import DemandForecaster
+
+
+def _forecaster(df, engineer):
+    X, y = engineer.prepare_features_for_training(engineer.create_features(df))
+    model = RandomForestRegressor(n_estimators=10, random_state=42).fit(X, y)
+    return DemandForecaster(model, list(X.columns), engineer), model
+
+
+def test_first_step_matches_batch_features():
+    """Прогноз на первый день совпадает с прогнозом по признакам, посчитанным по всей таблице"""
+    df = DataGenerator(n_parts=6).generate_business_data('2022-01-01', '2022-04-01')
+    engineer = FeatureEngineer(lags=(1, 7), windows=(7, 14), causal=True)
+    last_date = df['date'].max()
+    history = df[df['date'] < last_date]
+    forecaster, model = _forecaster(history, engineer)
+
+    # Запас и цена прогнозного дня равны последним известным значениям
+    df = df.copy()
+    previous = history[history['date'] == history['date'].max()].set_index('part_name')
+    is_last = df['date'] == last_date
+    df.loc[is_last, 'stock'] = df.loc[is_last, 'part_name'].map(previous['stock']).to_numpy()
+    df.loc[is_last, 'price'] = df.loc[is_last, 'part_name'].map(previous['price']).to_numpy()
+    processed = engineer.create_features(df)
+    processed = processed[processed['date'] == last_date]
+    X = engineer.prepare_features_for_prediction(processed, forecaster.columns)
+    expected = pd.Series(model.predict(X), index=processed['part_name'].astype(str).to_numpy())
+
+    forecast = forecaster.forecast(history, horizon=3)
+    assert len(forecast) == 3 * 6
+    first = forecast[forecast['date'] == last_date].set_index('part_name')['demand_forecast']
+    np.testing.assert_allclose(first.loc[expected.index], expected, rtol=1e-6)
+
+
+def test_recommendations_use_forecast_mean():
+    """Рекомендуемый запас считается по прогнозному среднему спросу"""
+    df = DataGenerator(n_parts=6).generate_business_data('2022-01-01', '2022-04-01')
+    analyzer = BusinessAnalyzer()
+    revenue_df = analyzer.analyze_business_metrics(df)['revenue_analysis']
+    forecast = pd.DataFrame({'date': df['date'].max(), 'part_name': revenue_df['part_name'], 'demand_forecast': 10.0})
+
+    recommendations = analyzer.generate_recommendations(df, revenue_df, forecast=forecast)
+    assert (recommendations['Рекомендуемый запас'] == int(10.0 * (7 + 1.5))).all()
+
+
+def test_unknown_model_columns_are_rejected():
+    """Колонки модели, которые прогноз не строит, дают ошибку, а не нули"""
+    df = DataGenerator(n_parts=3).generate_business_data('2022-01-01', '2022-03-01')
+    engineer = FeatureEngineer(causal=True)
+    _, model = _forecaster(df, engineer)
+    with pytest.raises(ValueError, match='supplier_delay'):
+        DemandForecaster(model, engineer.training_columns + ['supplier_delay'], engineer)
+
+
+def test_forecast_demand_reuses_trained_model(monkeypatch):
+    """Повторный прогноз по тем же данным не переобучает модель"""
+    analyzer = AviationDataAnalyzer(data_generator=DataGenerator(n_parts=3), date_range=('2022-01-01', '2022-06-01'))
+    analyzer.model_params = {'n_estimators': 5, 'random_state': 42, 'n_jobs': 1}
+    first = analyzer.forecast_demand(horizon=5)
+    forecaster = analyzer.forecaster
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Модель обучена повторно")
+
+    monkeypatch.setattr(trainer_module.ModelTrainer, 'train_demand_model', fail)
+    pd.testing.assert_frame_equal(analyzer.forecast_demand(horizon=5), first)
+    assert analyzer.forecaster is forecaster
@@ -0,0 +1,48 @@
+import pandas as pd
+from src.data.generator import DataGenerator
+
+
+def test_generation_is_reproducible():
+    """Одинаковый seed дает одинаковые данные"""
+    df1 = DataGenerator(seed=7).generate_business_data('2022-01-01', '2022-03-01')
+    df2 = DataGenerator(seed=7).generate_business_data('2022-01-01', '2022-03-01')
+    pd.testing.assert_frame_equal(df1, df2)
+
+
+def test_chunked_generation_matches_full():
+    """Потоковая генерация не зависит от размера блока"""
+    generator = DataGenerator(n_parts=12)
+    full = generator.generate_business_data('2022-01-01', '2022-06-01')
+    chunks = list(generator.iter_business_data('2022-01-01', '2022-06-01', chunk_rows=50))
+    assert max(len(chunk) for chunk in chunks) <= 50
+    pd.testing.assert_frame_equal(full, pd.concat(chunks))
+
+
+def test_part_values_do_not_depend_on_catalog_order():
+    """Значения запчасти не зависят от порядка запчастей в каталоге"""
+    generator = DataGenerator()
+    reversed_config = dict(reversed(list(generator.parts_config.items())))
+    df1 = generator.generate_business_data('2022-01-01', '2022-02-01')
+    df2 = DataGenerator(parts_config=reversed_config).generate_business_data('2022-01-01', '2022-02-01')
+    key = ['date', 'part_name']
+    df1 = df1.sort_values(key).reset_index(drop=True)
+    df2 = df2.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(df1, df2)
+
+
+def test_chunk_limit_holds_for_large_catalogs():
+    """Блоки не превышают chunk_rows, даже если запчастей больше, чем строк в блоке"""
+    generator = DataGenerator(n_parts=12)
+    full = generator.generate_business_data('2022-01-01', '2022-01-10')
+    chunks = list(generator.iter_business_data('2022-01-01', '2022-01-10', chunk_rows=5))
+    assert max(len(chunk) for chunk in chunks) <= 5
+    pd.testing.assert_frame_equal(full, pd.concat(chunks))
+
+
+def test_empty_period_gives_empty_frame():
+    """Пустой период дает пустую таблицу с теми же колонками и типами"""
+    generator = DataGenerator()
+    empty = generator.generate_business_data('2022-02-01', '2022-01-01')
+    expected = generator.generate_business_data('2022-01-01', '2022-01-02').iloc[:0]
+    assert len(empty) == 0
+    pd.testing.assert_frame_equal(empty, expected, check_index_type=False)
@@ -0,0 +1,50 @@
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from src.analysis.business_analyzer import BusinessAnalyzer
+from src.analysis.metrics_calculator import BusinessMetricsAccumulator, MetricsCalculator, RegressionMetricsAccumulator
+from src.data.generator import DataGenerator
+
+
+def test_regression_accumulator_matches_sklearn():
+    """Метрики по блокам и объединенным накопителям совпадают с расчетом по всем данным"""
+    rng = np.random.default_rng(0)
+    y_true = rng.poisson(20, 100_000).astype(float)
+    y_pred = y_true + rng.normal(0, 3, len(y_true))
+
+    shards = [RegressionMetricsAccumulator() for _ in range(3)]
+    for i, (true_block, pred_block) in enumerate(zip(np.array_split(y_true, 30), np.array_split(y_pred, 30))):
+        shards[i % 3].update(true_block, pred_block)
+    merged = shards[0].merge(shards[1]).merge(shards[2])
+
+    np.testing.assert_allclose(merged.abs_error_sum / merged.n, mean_absolute_error(y_true, y_pred), rtol=1e-12)
+    np.testing.assert_allclose(merged.sq_error_sum / merged.n, mean_squared_error(y_true, y_pred), rtol=1e-12)
+    np.testing.assert_allclose(1 - merged.sq_error_sum / merged.y_m2, r2_score(y_true, y_pred), rtol=1e-12)
+
+    # Эталон — исходный расчет через sklearn по всем данным сразу
+    mae = mean_absolute_error(y_true, y_pred)
+    expected = {
+        'MAE': round(mae, 3),
+        'RMSE': round(np.sqrt(mean_squared_error(y_true, y_pred)), 3),
+        'MAPE': round(np.mean(np.abs((y_true - y_pred) / (y_true + 1e-8))) * 100, 1),
+        'R2_score': round(r2_score(y_true, y_pred), 3),
+        'Improvement_vs_baseline': round((3.0 - mae) / 3.0 * 100, 1)
+    }
+    assert merged.finalize(baseline_mae=3.0) == expected
+    assert MetricsCalculator().calculate_ml_metrics(y_true, y_pred, 3.0) == expected
+
+
+def test_business_accumulator_matches_batch():
+    """Бизнес-метрики по блокам совпадают с расчетом по всей таблице"""
+    generator = DataGenerator(n_parts=8)
+    df = generator.generate_business_data('2022-01-01', '2022-06-01')
+    analyzer = BusinessAnalyzer()
+    business_metrics = analyzer.analyze_business_metrics(df)
+    recommendations = analyzer.generate_recommendations(df, business_metrics['revenue_analysis'])
+
+    accumulators = [BusinessMetricsAccumulator(), BusinessMetricsAccumulator()]
+    for i, chunk in enumerate(generator.iter_business_data('2022-01-01', '2022-06-01', chunk_rows=100)):
+        # Первая половина периода в одном накопителе, вторая — в другом
+        accumulators[int(chunk['date'].iloc[0] >= np.datetime64('2022-03-15'))].update(chunk)
+    result = accumulators[0].merge(accumulators[1]).finalize(recommendations)
+
+    assert result == MetricsCalculator().calculate_business_metrics(df, recommendations)
@@ -0,0 +1,96 @@
+import threading
+from main import AviationDataAnalyzer
+from src.analysis.stock_policy import ServiceLevelPolicy
+from src.data.dataset import DatasetStore
+from src.data.generator import DataGenerator
+from src.pipeline.dag import Pipeline, source_version
+
+
+def test_only_changed_stages_rerun(tmp_path):
+    """Повторный запуск берет результаты из кэша, изменение настройки перезапускает только зависимые этапы"""
+    calls = []
+
+    def stage(name):
+        def run(*inputs):
+            calls.append(name)
+            return sum(inputs) + 1
+        return run
+
+    def build(threshold):
+        return (Pipeline(str(tmp_path))
+                .add('data', stage('data'))
+                .add('model', stage('model'), ['data'])
+                .add('analysis', stage('analysis'), ['data'], config={'threshold': threshold})
+                .add('report', stage('report'), ['model', 'analysis']))
+
+    assert build(0.8).run() == {'data': 1, 'model': 2, 'analysis': 2, 'report': 5}
+    assert sorted(calls) == ['analysis', 'data', 'model', 'report']
+
+    calls.clear()
+    assert build(0.8).run(['report']) == {'report': 5}
+    assert calls == []
+
+    build(0.9).run()
+    assert calls == ['analysis', 'report']
+
+
+def test_main_thread_stage_runs_without_pipeline_threads():
+    """Этап с пулом процессов выполняется в главном потоке, когда потоки конвейера остановлены"""
+    n_threads = threading.active_count()
+    seen = {}
+
+    def model(data):
+        seen['main'] = threading.current_thread() is threading.main_thread()
+        seen['threads'] = threading.active_count()
+        return data + 1
+
+    pipeline = (Pipeline()
+                .add('data', lambda: 1)
+                .add('model', model, ['data'], in_main_thread=True)
+                .add('analysis', lambda data: data * 10, ['data'])
+                .add('report', lambda model, analysis: model + analysis, ['model', 'analysis']))
+    assert pipeline.run(['report']) == {'report': 12}
+    assert seen == {'main': True, 'threads': n_threads}
+    assert pipeline.stages['model'].in_main_thread
+
+
+def test_analyzer_pipeline_reuses_model(tmp_path):
+    """Смена политики запасов не переобучает модель"""
+    analyzer = AviationDataAnalyzer(data_generator=DataGenerator(n_parts=3), report_dir=str(tmp_path / 'reports'))
+    analyzer.model_params = {'n_estimators': 5, 'random_state': 42, 'n_jobs': 1}
+    first = analyzer.build_pipeline(str(tmp_path / 'cache'))
+    first.run()
+    assert set(first.executed) == set(first.stages)
+
+    analyzer.business_analyzer.stock_policy = ServiceLevelPolicy(service_level=0.99)
+    second = analyzer.build_pipeline(str(tmp_path / 'cache'))
+    second.run()
+    assert sorted(second.executed) == ['business_metrics', 'recommendations']
+
+
+def test_data_key_tracks_store_and_date_range(tmp_path):
+    """Дозапись в хранилище и смена периода генерации сбрасывают кэш данных"""
+    store_path = str(tmp_path / 'store')
+    generator = DataGenerator(n_parts=2)
+    DatasetStore(store_path).write(generator.generate_business_data('2022-01-01', '2022-02-01'))
+    analyzer = AviationDataAnalyzer(dataset_path=store_path)
+    before = analyzer.build_pipeline().keys()
+
+    DatasetStore(store_path).write(generator.generate_business_data('2022-02-02', '2022-03-01'))
+    after = analyzer.build_pipeline().keys()
+    assert after['data'] != before['data'] and after['model'] != before['model']
+
+    generated = AviationDataAnalyzer(data_generator=generator)
+    shorter = AviationDataAnalyzer(data_generator=generator, date_range=('2022-01-01', '2023-01-01'))
+    assert generated.build_pipeline().keys()['data'] != shorter.build_pipeline().keys()['data']
+
+
+def test_source_version_follows_module_code(tmp_path):
+    """Хэш кода меняется вместе с исходным файлом модуля"""
+    module = tmp_path / 'stage_module.py'
+    module.write_text('def stage():\n    return 1\n')
+    namespace = {}
+    exec(compile(module.read_text(), str(module), 'exec'), namespace)
+    first = source_version(namespace['stage'])
+    module.write_text('def stage():\n    return 2\n')
+    assert source_version(namespace['stage']) != first
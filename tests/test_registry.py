@@ -0,0 +1,54 @@
+import numpy as np
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+from src.models.registry import ModelRegistry
+
+PARAMS = {'n_estimators': 5, 'max_depth': 4, 'random_state': 42, 'n_jobs': 1}
+
+
+def _training_data(df):
+    engineer = FeatureEngineer()
+    df_processed = engineer.create_features(df)
+    X, y = engineer.prepare_features_for_training(df_processed)
+    return X, y, df_processed['part_name'].astype(str)
+
+
+def test_only_changed_parts_are_retrained(tmp_path):
+    """Повторное обучение затрагивает только запчасти с новыми данными"""
+    df = DataGenerator(n_parts=6).generate_business_data('2022-01-01', '2022-03-01')
+    X, y, groups = _training_data(df)
+    registry = ModelRegistry(str(tmp_path), PARAMS, n_workers=2)
+    assert len(registry.train(X, y, groups)) == 6
+
+    changed = df['part_name'].unique()[0]
+    df.loc[(df['part_name'] == changed) & (df['date'] == df['date'].max()), 'demand'] += 5
+    X, y, groups = _training_data(df)
+    registry = ModelRegistry(str(tmp_path), PARAMS, n_workers=1)
+    assert registry.train(X, y, groups) == [changed]
+    assert len(list(tmp_path.glob('*.joblib'))) == 6
+
+
+def test_predict_routes_rows_to_part_models(tmp_path):
+    """Каждая строка прогнозируется моделью своей запчасти"""
+    df = DataGenerator(n_parts=4).generate_business_data('2022-01-01', '2022-03-01')
+    X, y, groups = _training_data(df)
+    registry = ModelRegistry(str(tmp_path), PARAMS, n_workers=1)
+    registry.train(X, y, groups)
+
+    predictions = ModelRegistry(str(tmp_path)).predict(X, groups)
+    for name in groups.unique():
+        rows = (groups == name).to_numpy()
+        np.testing.assert_array_equal(predictions[rows], registry.model(name).predict(X[rows].to_numpy(np.float32)))
+
+
+def test_missing_groups_are_pruned(tmp_path):
+    """Модели групп, которых нет в новых данных, удаляются из реестра и с диска"""
+    df = DataGenerator(n_parts=4).generate_business_data('2022-01-01', '2022-03-01')
+    registry = ModelRegistry(str(tmp_path), PARAMS, n_workers=1)
+    registry.train(*_training_data(df))
+
+    removed = df['part_name'].unique()[0]
+    registry = ModelRegistry(str(tmp_path), PARAMS, n_workers=1)
+    assert registry.train(*_training_data(df[df['part_name'] != removed])) == []
+    assert removed not in ModelRegistry(str(tmp_path)).entries
+    assert len(list(tmp_path.glob('*.joblib'))) == 3
@@ -0,0 +1,73 @@
+import json
+import pytest
+from main import AviationDataAnalyzer
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+from src.models.search import HyperparameterSearch
+
+PARAM_SPACE = {'n_estimators': [5, 10], 'max_depth': [3, 6, None]}
+
+
+def _search(log_path, **kwargs):
+    return HyperparameterSearch(PARAM_SPACE, feature_space={'windows': [(7,), (3, 7)]}, n_trials=6,
+                                n_splits=3, log_path=str(log_path), **kwargs)
+
+
+def test_halving_prunes_and_resumes(tmp_path):
+    """Слабые конфигурации отсекаются, повторный запуск берет результаты из журнала"""
+    df = DataGenerator().generate_business_data('2022-01-01', '2022-05-01')
+    log_path = tmp_path / 'trials.jsonl'
+
+    search = _search(log_path, n_workers=2)
+    best = search.run(df)
+    results = search.results
+    assert results['complete'].sum() < len(results)
+    assert results.iloc[0]['complete']
+    n_logged = len(log_path.read_text().splitlines())
+    assert n_logged == results['folds_evaluated'].sum() + 1
+
+    resumed = _search(log_path, n_workers=1)
+    assert resumed.run(df) == best
+    assert len(log_path.read_text().splitlines()) == n_logged
+    assert all('config' in json.loads(line) for line in log_path.read_text().splitlines()[1:])
+
+    # Журнал другого поиска не подмешивает чужие оценки
+    for other, data in ((_search(log_path, n_workers=1, seed=7), df), (_search(log_path, n_workers=1), df.iloc[:-1])):
+        with pytest.raises(ValueError):
+            other.run(data)
+    assert len(log_path.read_text().splitlines()) == n_logged
+
+
+def test_configs_are_sampled_without_repeats():
+    """Конфигурации не повторяются, бюджет ограничен размером пространства"""
+    configs = HyperparameterSearch(PARAM_SPACE, n_trials=50)._sample_configs()
+    assert len(configs) == 6
+    assert len({json.dumps(config, sort_keys=True) for config in configs.values()}) == 6
+    assert len(HyperparameterSearch(PARAM_SPACE, n_trials=4)._sample_configs()) == 4
+
+
+def test_configs_are_scored_on_common_rows():
+    """Конфигурации с разными окнами оцениваются на одних и тех же строках"""
+    df = DataGenerator().generate_business_data('2022-01-01', '2022-03-01')
+    configs = [{'lags': [7], 'windows': [3]}, {'lags': [1, 14], 'windows': [7, 28]}]
+    index = HyperparameterSearch.common_index(df, configs)
+
+    expected = None
+    for config in configs:
+        rows = FeatureEngineer(lags=config['lags'], windows=config['windows']).create_features(df).index
+        expected = rows if expected is None else expected.intersection(rows)
+    assert index.equals(expected)
+
+
+def test_best_config_is_used_by_full_analysis(tmp_path):
+    """Лучшая конфигурация поиска используется при обучении в полном анализе"""
+    analyzer = AviationDataAnalyzer(data_generator=DataGenerator(n_parts=2), report_dir=str(tmp_path / 'reports'))
+    best = analyzer.run_hyperparameter_search(n_trials=3, param_space={'n_estimators': [5, 10], 'max_depth': [4, 8]},
+                                              feature_space={'windows': [(3,), (14,)]})
+    analyzer.run_full_analysis()
+
+    model = analyzer.model_trainer.model
+    assert model.n_estimators == best['model_params']['n_estimators']
+    assert model.max_depth == best['model_params']['max_depth']
+    assert analyzer.feature_engineer.windows == tuple(best['windows'])
+    assert f"demand_rolling_mean_{best['windows'][0]}" in analyzer.model_trainer.feature_columns
@@ -0,0 +1,86 @@
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+from src.models.artifact import ModelArtifact
+from src.models.server import PredictionServer
+from src.models.trainer import ModelTrainer
+
+
+def _saved_model(path: str, n_records: int) -> tuple:
+    """Обученная и сохраненная модель, последние записи в формате запроса и их прогноз"""
+    engineer = FeatureEngineer()
+    df = engineer.create_features(DataGenerator().generate_business_data('2022-01-01', '2022-05-01'))
+    X, y = engineer.prepare_features_for_training(df)
+    trainer = ModelTrainer({'n_estimators': 10, 'random_state': 42}, n_splits=2, n_workers=1)
+    trainer.train_demand_model(X, y)
+    ModelArtifact.save(path, trainer, engineer)
+
+    columns = ['date', 'part_name', 'stock', 'price', 'demand'] + engineer.window_feature_columns
+    records = df[columns].tail(n_records).assign(date=lambda d: d['date'].dt.strftime('%Y-%m-%d'))
+    return json.loads(records.to_json(orient='records')), trainer.predict(X.tail(n_records))
+
+
+def test_server_matches_in_process_predictions(tmp_path):
+    """Сохраненная модель через HTTP-сервис дает те же прогнозы"""
+    records, expected = _saved_model(str(tmp_path / 'model'), 40)
+
+    server = PredictionServer(ModelArtifact.load(str(tmp_path / 'model')), port=0)
+    server.start()
+    host, port = server.address
+    try:
+        def post(chunk):
+            request = urllib.request.Request(f'http://{host}:{port}/predict',
+                                             data=json.dumps({'records': chunk}).encode())
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())['predictions']
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(post, [records[i:i + 5] for i in range(0, 40, 5)]))
+        with urllib.request.urlopen(f'http://{host}:{port}/stats') as response:
+            stats = json.loads(response.read())
+        statuses = [_post_status(host, port, body) for body in
+                    (b'[1, 2]', b'{"records": 5}', b'{"records": [{"date": "2022-05-01", "stock": []}]}', b'not json')]
+    finally:
+        server.stop()
+
+    np.testing.assert_allclose(np.concatenate(results), expected)
+    assert stats['requests'] == 8
+    assert stats['p99_ms'] >= stats['p50_ms']
+    assert statuses == [400, 400, 400, 400]
+
+
+def test_bad_request_does_not_fail_its_batch(tmp_path):
+    """Ошибка в одном запросе партии не попадает в ответы других клиентов"""
+    records, expected = _saved_model(str(tmp_path / 'model'), 4)
+    with_gap = [{**records[0], 'demand_lag_7': None}]
+    bad_type = [{**records[1], 'stock': 'много'}]
+    extra_column = [{**record, 'comment': None} for record in records]
+
+    # Долгое ожидание партии, чтобы одновременные запросы попали в один вызов predict
+    server = PredictionServer(ModelArtifact.load(str(tmp_path / 'model')), port=0, max_wait_ms=300)
+    server.start()
+    host, port = server.address
+    try:
+        bodies = [json.dumps({'records': chunk}).encode() for chunk in (with_gap, bad_type, extra_column)]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            statuses = list(pool.map(lambda body: _post_status(host, port, body), bodies))
+        predictions = server.predict_records(extra_column)
+    finally:
+        server.stop()
+
+    assert statuses == [400, 400, 200]
+    np.testing.assert_allclose(predictions, expected)
+
+
+def _post_status(host: str, port: int, body: bytes) -> int:
+    """Код ответа на запрос с произвольным телом"""
+    request = urllib.request.Request(f'http://{host}:{port}/predict', data=body)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from src.analysis.aggregates import AggregateContext
+from src.analysis.business_analyzer import BusinessAnalyzer
+from src.analysis.metrics_calculator import MetricsCalculator
+from src.analysis.sharding import ShardedAnalyzer
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+
+
+def test_sharded_matches_single_process():
+    """Признаки, ABC-анализ и метрики по шардам совпадают с расчетом в одном процессе"""
+    df = DataGenerator(n_parts=9).generate_business_data('2022-01-01', '2022-04-01')
+    engineer = FeatureEngineer(lags=(1, 7), windows=(7,))
+    df_processed, aggregates = ShardedAnalyzer(engineer, n_workers=2, n_shards=4).run(df)
+    pd.testing.assert_frame_equal(df_processed, engineer.create_features(df))
+
+    analyzer, calculator = BusinessAnalyzer(), MetricsCalculator()
+    results = []
+    for context in (aggregates, AggregateContext(df)):
+        business_metrics = analyzer.analyze_business_metrics(df, context)
+        recommendations = analyzer.generate_recommendations(df, business_metrics['revenue_analysis'], context)
+        results.append((business_metrics, recommendations, calculator.calculate_business_metrics(df, recommendations, context)))
+
+    (sharded, sharded_recs, sharded_metrics), (expected, expected_recs, expected_metrics) = results
+    pd.testing.assert_frame_equal(sharded['revenue_analysis'], expected['revenue_analysis'])
+    pd.testing.assert_frame_equal(sharded['supply_issues'], expected['supply_issues'])
+    pd.testing.assert_frame_equal(sharded_recs, expected_recs)
+    assert sharded_metrics == expected_metrics
+
+
+def test_sharded_keeps_row_order_for_any_index():
+    """Порядок строк сохраняется при убывающем и неуникальном индексе таблицы"""
+    df = DataGenerator(n_parts=9).generate_business_data('2022-01-01', '2022-03-01')
+    df.index = np.arange(len(df))[::-1] // 2
+    engineer = FeatureEngineer(lags=(1, 7), windows=(7,))
+    df_processed, aggregates = ShardedAnalyzer(engineer, n_workers=1, n_shards=4).run(df)
+
+    pd.testing.assert_frame_equal(df_processed, engineer.create_features(df))
+    pd.testing.assert_frame_equal(aggregates.shortage_rows, AggregateContext(df).shortage_rows)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from main import AviationDataAnalyzer
+from src.analysis.aggregates import AggregateContext, StreamingAggregates
+from src.data.generator import DataGenerator
+from src.features.matrix import load_feature_matrix
+
+
+def test_streaming_matches_in_memory(tmp_path):
+    """Потоковый анализ дает те же метрики, рекомендации и признаки, что и расчет в памяти"""
+    analyzer = AviationDataAnalyzer(data_generator=DataGenerator(n_parts=12))
+    streaming = analyzer.run_streaming_analysis(chunk_rows=1000, features_path=tmp_path / 'features')
+
+    df = analyzer.load_data()
+    df['is_anomaly'] = analyzer.anomaly_detector.detect(df)
+    context = AggregateContext(df)
+    business_metrics = analyzer.business_analyzer.analyze_business_metrics(df, context)
+    recommendations = analyzer.business_analyzer.generate_recommendations(
+        df, business_metrics['revenue_analysis'], context
+    )
+    expected = analyzer.metrics_calculator.calculate_business_metrics(df, recommendations, context)
+
+    assert streaming['business_metrics'] == expected
+    assert streaming['aggregates'].totals['anomalies_count'] == business_metrics['anomalies_count'] > 0
+    pd.testing.assert_frame_equal(streaming['recommendations'], recommendations)
+
+    X, y = analyzer.feature_engineer.prepare_features_for_training(analyzer.feature_engineer.create_features(df))
+    X_disk, y_disk, columns = load_feature_matrix(tmp_path / 'features')
+    assert columns == list(X.columns)
+    np.testing.assert_allclose(X_disk, X.to_numpy(dtype=np.float32), rtol=1e-5, atol=1e-4)
+    np.testing.assert_array_equal(y_disk, y.to_numpy(dtype=np.float32))
+
+
+def test_merge_of_shards_matches_full_table():
+    """Объединение агрегатов по шардам запчастей совпадает с агрегатами всей таблицы"""
+    df = DataGenerator(n_parts=10).generate_business_data('2022-01-01', '2022-04-01')
+    names = sorted(df['part_name'].unique())
+    shards = [StreamingAggregates().update(df[df['part_name'].isin(names[i::3])]) for i in range(3)]
+    merged = shards[0].merge(shards[1]).merge(shards[2])
+    context = AggregateContext(df)
+
+    pd.testing.assert_frame_equal(merged.per_part, context.per_part, check_dtype=False)
+    assert merged.totals == context.totals
+
+
+def test_streaming_keeps_worst_shortage_rows():
+    """Из строк с дефицитом хранятся только худшие, как при отборе по всей таблице"""
+    df = DataGenerator(n_parts=10).generate_business_data('2022-01-01', '2022-07-01')
+    aggregates = StreamingAggregates(max_shortage_rows=25)
+    for start in range(0, len(df), 300):
+        aggregates.update(df.iloc[start:start + 300])
+
+    shortage = AggregateContext(df).shortage_rows
+    worst = (shortage['demand'] - shortage['stock']).sort_values(ascending=False, kind='stable').index[:25]
+    assert len(shortage) > 25
+    pd.testing.assert_frame_equal(aggregates.shortage_rows, shortage.loc[shortage.index.isin(worst)])
+    assert aggregates.totals == AggregateContext(df).totals
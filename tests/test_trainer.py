@@ -0,0 +1,35 @@
+import pytest
+from src.data.generator import DataGenerator
+from src.features.engineer import FeatureEngineer
+from src.models import trainer as trainer_module
+from src.models.trainer import ModelTrainer
+
+PARAMS = {'n_estimators': 10, 'random_state': 42, 'n_jobs': 1}
+
+
+@pytest.fixture(scope='module')
+def training_data():
+    engineer = FeatureEngineer()
+    df = engineer.create_features(DataGenerator().generate_business_data('2022-01-01', '2022-07-01'))
+    return engineer.prepare_features_for_training(df)
+
+
+def test_parallel_cv_matches_serial(training_data):
+    """MAE по фолдам в пуле процессов совпадает с последовательным расчетом"""
+    X, y = training_data
+    serial = ModelTrainer(PARAMS, n_workers=1).cross_validate(X, y)
+    parallel = ModelTrainer(PARAMS, n_workers=2).cross_validate(X, y)
+    assert serial == parallel
+
+
+def test_cached_folds_are_not_retrained(training_data, tmp_path, monkeypatch):
+    """Повторный запуск с теми же данными и параметрами берет MAE из кэша"""
+    X, y = training_data
+    first = ModelTrainer(PARAMS, n_workers=1, cache_dir=str(tmp_path)).cross_validate(X, y)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Фолд обучен повторно")
+
+    monkeypatch.setattr(trainer_module, '_fit_fold', fail)
+    second = ModelTrainer(PARAMS, n_workers=1, cache_dir=str(tmp_path)).cross_validate(X, y)
+    assert first == second